@@ -0,0 +1,139 @@
+"""
+저메모리 모드(memory_budget_mb) 최대 메모리 확인 (synthetic_data로 만든 대용량 입력 사용)
+
+  1) 입력 생성 : synthetic_data (기본 아티스트 2000명 × 500행 = 100만 행, csv)
+  2) 모드별 실행: 모드마다 새 프로세스에서 generate_report_excel 1회 → 그 프로세스의 최대 RSS / wall 초
+       low    = memory_budget_mb=--budget-mb
+       normal = 보통 모드 (비교용, --modes에서 빼면 생략)
+
+low 모드의 최대 RSS가 --budget-mb를 넘으면 exit code 1.
+입력 생성과 모드별 실행을 각각 다른 프로세스에서 하므로 서로의 최대치가 섞이지 않음.
+결과는 JSON으로 stdout (+ --out 파일)에 기록.
+
+  python benchmarks/bench_memory.py --budget-mb 256 --data-dir bench_1m --out memory.json
+  python benchmarks/bench_memory.py --artists 200 --rows-per-artist 500 --modes low
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from synthetic_data import SONG_COST_FILE, REVENUE_FILE  # noqa: E402
+
+MODES = ("low", "normal")
+
+
+def run_child(argv):
+    """--child: 한 모드를 이 프로세스에서 실행하고 {"peak_rss_mb", "wall_sec", ...}을 stdout에 JSON으로."""
+    import revenue2report_xlsx as r2r
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--child", choices=MODES, required=True)
+    parser.add_argument("--song-cost", required=True)
+    parser.add_argument("--revenue", required=True)
+    parser.add_argument("--ym", required=True)
+    parser.add_argument("--budget-mb", type=int, required=True)
+    parser.add_argument("--detail-backend", required=True)
+    parser.add_argument("--verify", type=float, required=True)
+    args = parser.parse_args(argv)
+
+    if r2r.peak_rss_bytes() is None:
+        raise SystemExit("이 OS에서는 최대 RSS를 잴 수 없습니다 (resource 모듈 없음).")
+    check_dict = r2r.new_check_dict()
+    t = time.perf_counter()
+    zip_file = r2r.generate_report_excel(
+        args.ym, "2024-01-01", args.song_cost, args.revenue, check_dict,
+        detail_backend=args.detail_backend, verify=args.verify,
+        memory_budget_mb=args.budget_mb if args.child == "low" else None
+    )
+    wall = time.perf_counter() - t
+    if zip_file is None:
+        raise SystemExit("보고서 생성 실패")
+    zip_file.close()
+    summary = check_dict["run_summary"]
+    print(json.dumps({
+        "peak_rss_mb": r2r.peak_rss_bytes() / (1024 * 1024),
+        "wall_sec": wall,
+        "timings": summary["timings"],
+        "artists": summary["artists"],
+        "zip_bytes": summary["zip"]["zip_bytes"],
+        "verify_errors": check_dict["verification_summary"]["total_errors"],
+    }))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="revenue2report 저메모리 모드 최대 메모리 확인")
+    parser.add_argument("--artists", type=int, default=2000)
+    parser.add_argument("--rows-per-artist", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ym", default="202410")
+    parser.add_argument("--input-format", choices=["xlsx", "csv", "parquet"], default="csv")
+    parser.add_argument("--budget-mb", type=int, default=256, help="low 모드 메모리 예산 (최대 RSS 상한)")
+    parser.add_argument("--modes", default=",".join(MODES), help="쉼표로 구분한 실행 모드 (low / normal)")
+    parser.add_argument("--detail-backend", default="native")
+    parser.add_argument("--verify", type=float, default=1.0, help="재검증 비율 (검증 표도 메모리에 포함)")
+    parser.add_argument("--data-dir", help="입력 파일 폴더 (이미 있으면 다시 만들지 않음. 기본: 임시 폴더)")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    modes = args.modes.split(",")
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        song_path = os.path.join(data_dir, f"{SONG_COST_FILE}.{args.input_format}")
+        revenue_path = os.path.join(data_dir, f"{REVENUE_FILE}.{args.input_format}")
+        if not (os.path.exists(song_path) and os.path.exists(revenue_path)):
+            subprocess.run(
+                [sys.executable, os.path.join(REPO_ROOT, "benchmarks", "synthetic_data.py"),
+                 "--out-dir", data_dir, "--months", args.ym, "--artists", str(args.artists),
+                 "--rows-per-artist", str(args.rows_per_artist), "--seed", str(args.seed),
+                 "--format", args.input_format],
+                check=True, stdout=subprocess.DEVNULL
+            )
+
+        results = {}
+        for mode in modes:
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode,
+                 "--song-cost", song_path, "--revenue", revenue_path, "--ym", args.ym,
+                 "--budget-mb", str(args.budget_mb), "--detail-backend", args.detail_backend,
+                 "--verify", str(args.verify)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            results[mode] = json.loads(out.strip().splitlines()[-1])
+            print(f"{mode}: 최대 RSS {results[mode]['peak_rss_mb']:,.0f} MB, "
+                  f"{results[mode]['wall_sec']:,.1f}초", file=sys.stderr)
+
+    result = {
+        "python": sys.version.split()[0],
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {"artists": args.artists, "rows_per_artist": args.rows_per_artist, "seed": args.seed,
+                   "ym": args.ym, "input_format": args.input_format, "budget_mb": args.budget_mb,
+                   "detail_backend": args.detail_backend, "verify": args.verify},
+        "revenue_rows": args.artists * args.rows_per_artist,
+        "modes": results,
+    }
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+    low = results.get("low")
+    if low is not None and low["peak_rss_mb"] > args.budget_mb:
+        print(f"[실패] low 모드 최대 RSS {low['peak_rss_mb']:,.0f} MB > 예산 {args.budget_mb:,} MB",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv[1:]:
+        run_child(sys.argv[1:])
+    else:
+        sys.exit(main())
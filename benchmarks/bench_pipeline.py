@@ -0,0 +1,239 @@
+"""
+파이프라인 단계별 벤치마크 (synthetic_data로 만든 입력 사용)
+
+  1) ingest  : parse_song_cost + parse_online_revenue (csv/parquet이면 표 파싱)
+  2) detail  : 세부매출내역 생성 + 저장 (아티스트 전체, DETAIL_BACKENDS 별로)
+  3) report  : build_report_lists + create_report_excel + 저장 (아티스트 전체)
+  4) package : 2)·3)에서 만든 bytes를 ZipPackager로 묶기 (ZIP_POLICIES 별로)
+  5) verify  : 2)·3)의 bytes를 다시 읽어 원본과 비교 (generate_report_excel의 verify=1과 같은 작업)
+
+각 단계는 --repeat 번 반복한 중앙값(wall / cpu 초). 결과는 JSON으로 stdout (+ --out 파일)에 기록하고,
+--compare 로 이전 결과 JSON을 주면 단계별 배율(이번/이전)을 같이 출력.
+
+  python benchmarks/bench_pipeline.py --artists 500 --rows-per-artist 100 --out pipeline.json
+  python benchmarks/bench_pipeline.py --artists 500 --rows-per-artist 100 --compare pipeline.json
+"""
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import revenue2report_xlsx as r2r  # noqa: E402
+from synthetic_data import generate_inputs  # noqa: E402
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(func, repeat):
+    """func()를 repeat 번 실행해서 (마지막 반환값, {"wall_sec", "cpu_sec", "runs_wall_sec"})."""
+    walls, cpus = [], []
+    result = None
+    for _ in range(repeat):
+        w, c = time.perf_counter(), time.process_time()
+        result = func()
+        walls.append(time.perf_counter() - w)
+        cpus.append(time.process_time() - c)
+    return result, {"wall_sec": statistics.median(walls),
+                    "cpu_sec": statistics.median(cpus),
+                    "runs_wall_sec": walls}
+
+
+def save_to_bytes(wb):
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def bench_ingest(song_path, revenue_path, ym, repeat):
+    result = {}
+    cost_data, result["song_cost"] = measure(lambda: r2r.parse_song_cost(song_path, ym), repeat)
+    revenue_data, result["revenue_stream"] = measure(
+        lambda: r2r.parse_online_revenue(revenue_path, ym), repeat
+    )
+    return cost_data, revenue_data, result
+
+
+def bench_ingest_table(song_path, revenue_path, ym, repeat):
+    result = {}
+    cost_data, result["song_cost"] = measure(lambda: r2r.parse_song_cost_table(song_path, ym), repeat)
+    revenue_data, result["revenue_table"] = measure(
+        lambda: r2r.parse_online_revenue_table(revenue_path, ym), repeat
+    )
+    return cost_data, revenue_data, result
+
+
+def bench_detail(ym, revenue_data, backends, repeat):
+    """DETAIL_BACKENDS 별로 측정. 반환: (첫 backend의 파일 목록, {backend: 측정값})"""
+    result = {}
+    first_files = None
+    for backend in backends:
+        create = r2r.DETAIL_BACKENDS[backend]
+
+        def run():
+            return [
+                (f"{artist}(세부매출내역).xlsx", save_to_bytes(create(artist, ym, rows)))
+                for artist, rows in revenue_data.items()
+            ]
+        files, timing = measure(run, repeat)
+        result[backend] = dict(timing, xlsx_bytes=sum(len(data) for _, data in files))
+        if first_files is None:
+            first_files = files
+    return first_files, result
+
+
+def bench_report(ym, cost_data, revenue_data, repeat):
+    empty_cost = {"정산요율": 0, "전월잔액": 0, "당월차감액": 0, "당월잔액": 0}
+
+    def run():
+        files = []
+        for artist, rows in revenue_data.items():
+            lists = r2r.build_report_lists(ym, cost_data.get(artist, empty_cost), rows)
+            files.append((f"{artist}(정산서).xlsx", save_to_bytes(r2r.create_report_excel(artist, *lists))))
+        return files
+    return measure(run, repeat)
+
+
+def bench_verify(cost_data, revenue_data, detail_files, report_files, repeat):
+    empty_cost = {"정산요율": 0, "전월잔액": 0, "당월차감액": 0, "당월잔액": 0}
+
+    def run():
+        check_dict = r2r.new_check_dict()
+        for artist, (_, detail), (_, report) in zip(revenue_data, detail_files, report_files):
+            values, revenues = r2r.read_back_artist({"정산서": report, "세부매출내역": detail})
+            r2r.record_read_back(check_dict, artist, cost_data.get(artist, empty_cost), revenue_data[artist],
+                                 values, revenues)
+        return check_dict["verification_summary"]["total_errors"]
+    errors, timing = measure(run, repeat)
+    return dict(timing, errors=errors)
+
+
+def bench_package(files, policies, level, repeat):
+    result = {}
+    for policy in policies:
+        def run():
+            with tempfile.TemporaryFile() as zip_file:
+                packager = r2r.ZipPackager(zip_file, policy=policy, level=level)
+                for name, data in files:
+                    packager.put(name, data)
+                packager.close()
+                return packager.stats
+        stats, timing = measure(run, repeat)
+        # 압축 스레드 CPU는 process_time에 포함되므로 packager 자체 집계도 같이 남김
+        result[policy] = dict(timing, zip_bytes=stats["zip_bytes"], raw_bytes=stats["raw_bytes"],
+                              packer_cpu_sec=stats["cpu_sec"])
+    return result
+
+
+def flatten_walls(stages, prefix=""):
+    """{"ingest": {"song_cost": {"wall_sec": ..}}} → {"ingest.song_cost": wall_sec}"""
+    flat = {}
+    for key, value in stages.items():
+        if not isinstance(value, dict):
+            continue
+        if "wall_sec" in value:
+            flat[prefix + key] = value["wall_sec"]
+        else:
+            flat.update(flatten_walls(value, prefix + key + "."))
+    return flat
+
+
+def compare(current, previous):
+    cur, prev = flatten_walls(current["stages"]), flatten_walls(previous["stages"])
+    return {k: cur[k] / prev[k] for k in cur if k in prev and prev[k] > 0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="revenue2report 단계별 벤치마크")
+    parser.add_argument("--artists", type=int, default=200)
+    parser.add_argument("--rows-per-artist", type=int, default=50)
+    parser.add_argument("--albums-per-artist", type=int, default=3)
+    parser.add_argument("--album-skew", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ym", default="202410")
+    parser.add_argument("--input-format", choices=["xlsx", "csv", "parquet"], default="xlsx",
+                        help="입력 파일 형식 (csv / parquet이면 표 파싱)")
+    parser.add_argument("--detail-backends", default=",".join(r2r.DETAIL_BACKENDS),
+                        help="쉼표로 구분한 DETAIL_BACKENDS 이름 (package 단계에는 첫 번째 결과 사용)")
+    parser.add_argument("--zip-policies", default=",".join(r2r.ZIP_POLICIES),
+                        help="쉼표로 구분한 ZIP_POLICIES 이름")
+    parser.add_argument("--zip-level", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=3, help="단계별 반복 횟수")
+    parser.add_argument("--data-dir", help="입력 파일을 만들 폴더 (기본: 임시 폴더, 끝나면 삭제)")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    params = {
+        "artists": args.artists, "rows_per_artist": args.rows_per_artist,
+        "albums_per_artist": args.albums_per_artist, "album_skew": args.album_skew,
+        "seed": args.seed, "ym": args.ym, "input_format": args.input_format,
+        "zip_level": args.zip_level,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        song_path, revenue_path = generate_inputs(
+            data_dir, months=(args.ym,), artists=args.artists,
+            rows_per_artist=args.rows_per_artist, albums_per_artist=args.albums_per_artist,
+            album_skew=args.album_skew, seed=args.seed, fmt=args.input_format
+        )
+        stages = {}
+        cost_data, revenue_data, stages["ingest"] = bench_ingest(
+            song_path, revenue_path, args.ym, args.repeat
+        ) if args.input_format == "xlsx" else bench_ingest_table(
+            song_path, revenue_path, args.ym, args.repeat
+        )
+        detail_files, stages["detail"] = bench_detail(
+            args.ym, revenue_data, args.detail_backends.split(","), args.repeat
+        )
+        report_files, stages["report"] = bench_report(args.ym, cost_data, revenue_data, args.repeat)
+        # ZIP 항목 순서는 generate_report_excel과 같게 (아티스트별 세부매출내역 → 정산서)
+        files = [f for pair in zip(detail_files, report_files) for f in pair]
+        stages["package"] = bench_package(files, args.zip_policies.split(","), args.zip_level, args.repeat)
+        stages["verify"] = bench_verify(cost_data, revenue_data, detail_files, report_files, args.repeat)
+
+        input_bytes = {"song_cost": os.path.getsize(song_path),
+                       "online_revenue": os.path.getsize(revenue_path)}
+
+    result = {
+        "python": sys.version.split()[0],
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": params,
+        "repeat": args.repeat,
+        "input_bytes": input_bytes,
+        "revenue_rows": sum(len(v) for v in revenue_data.values()),
+        "stages": stages,
+    }
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous.get("params") != params:
+            print("[주의] 이전 결과와 파라미터가 다름", file=sys.stderr)
+        result["compare"] = {"revision": previous.get("revision"),
+                             "ratio": compare(result, previous)}
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
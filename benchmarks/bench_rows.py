@@ -0,0 +1,163 @@
+"""
+online revenue 행 저장 방식별 메모리 / 시간 비교 (synthetic_data로 만든 입력 사용)
+
+  dicts : 이전 방식. 행마다 {"album", "major", "middle", "service", "revenue"} dict,
+          아티스트별 list에 담고 정산서용 service_list를 아티스트마다 dict로 한 번 더 복사
+  rows  : RevenueRows (문자열 컬럼은 코드 array("i") + 코드 → 문자열 표, 금액은 array("d"), 아티스트별 구간),
+          정산서는 같은 컬럼을 그대로 읽고 앨범별 합계는 코드로 묶음
+
+단계:
+  1) records : iter_revenue_records 형식 tuple → 저장소 (xlsx stream 파싱 / 원장 load 경로)
+  2) frame   : clean_revenue_frame DataFrame → 저장소 (CSV / Parquet 경로)
+  3) report  : 저장소의 아티스트 전체에 build_report_lists 입력 만들기 (아티스트마다 만들고 버림)
+
+메모리는 tracemalloc 기준 (retained = 만든 뒤 남은 bytes, peak = 만드는 중 최대), 시간은 추적 없이 잰 wall 초.
+records 단계의 입력 tuple은 미리 만들어 두므로 그 문자열은 측정에 들어가지 않음
+(frame 단계는 DataFrame에서 꺼내며 만드는 문자열도 포함 → 코드로 바꾸면 행마다 문자열이 남지 않음).
+결과는 JSON으로 stdout (+ --out 파일)에 기록.
+
+  python benchmarks/bench_rows.py --artists 2000 --rows-per-artist 100 --out rows.json
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import revenue2report_xlsx as r2r  # noqa: E402
+from synthetic_data import generate_inputs  # noqa: E402
+
+EMPTY_COST = {"정산요율": 0, "전월잔액": 0, "당월차감액": 0, "당월잔액": 0}
+
+
+def dicts_from_records(records):
+    artist_revenue_dict = defaultdict(list)
+    for aartist, album, major, middle, service, revenue in records:
+        artist_revenue_dict[aartist].append(
+            {"album": album, "major": major, "middle": middle, "service": service, "revenue": revenue}
+        )
+    return artist_revenue_dict
+
+
+def dicts_from_frame(df):
+    records = [
+        {"album": a, "major": mj, "middle": md, "service": sv, "revenue": rv}
+        for a, mj, md, sv, rv in zip(
+            df["album"].tolist(), df["major"].tolist(), df["middle"].tolist(),
+            df["service"].tolist(), df["revenue"].tolist()
+        )
+    ]
+    artist_revenue_dict = defaultdict(list)
+    for artist, idx in df.groupby("aartist", sort=False).indices.items():
+        artist_revenue_dict[artist] = [records[i] for i in idx]
+    return artist_revenue_dict
+
+
+def dicts_report_inputs(ym, details):
+    service_list = [
+        {"album": d["album"], "major": d["major"], "middle": d["middle"], "service": d["service"],
+         "year": ym[:4], "month": ym[4:], "revenue": d["revenue"]}
+        for d in details
+    ]
+    album_dict = defaultdict(float)
+    for d in details:
+        album_dict[d["album"]] += d["revenue"]
+    return service_list, album_dict
+
+
+def rows_report_inputs(ym, details):
+    return r2r.build_report_lists(ym, EMPTY_COST, details)
+
+
+LAYOUTS = {
+    "dicts": {"records": dicts_from_records, "frame": dicts_from_frame, "report": dicts_report_inputs},
+    "rows": {"records": r2r.RevenueRows.from_records, "frame": r2r.RevenueRows.from_frame,
+             "report": rows_report_inputs},
+}
+
+
+def measure(func):
+    """
+    func() → (반환값, {"wall_sec", "retained_bytes", "peak_bytes"}).
+    tracemalloc은 할당마다 느려지므로 시간은 추적 없이 한 번, 메모리는 추적하면서 한 번 더 실행해서 잼.
+    """
+    gc.collect()
+    t = time.perf_counter()
+    func()
+    wall = time.perf_counter() - t
+    gc.collect()
+    tracemalloc.start()
+    try:
+        base = tracemalloc.get_traced_memory()[0]
+        result = func()
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, {"wall_sec": wall, "retained_bytes": current - base, "peak_bytes": peak - base}
+
+
+def bench_layout(layout, ym, records, df):
+    funcs = LAYOUTS[layout]
+    result = {}
+    _, result["records"] = measure(lambda: funcs["records"](iter(records)))
+    store, result["frame"] = measure(lambda: funcs["frame"](df))
+
+    def report():
+        for artist in store:
+            funcs["report"](ym, store[artist])
+    _, result["report"] = measure(report)
+    n = len(records)
+    for stage in ("records", "frame"):
+        result[stage]["bytes_per_row"] = result[stage]["retained_bytes"] / n
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="revenue2report 매출 행 저장 방식 비교")
+    parser.add_argument("--artists", type=int, default=2000)
+    parser.add_argument("--rows-per-artist", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--ym", default="202410")
+    parser.add_argument("--layouts", default=",".join(LAYOUTS), help="쉼표로 구분한 저장 방식 (dicts / rows)")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _, revenue_path = generate_inputs(
+            tmp, months=(args.ym,), artists=args.artists, rows_per_artist=args.rows_per_artist,
+            seed=args.seed, fmt="csv"
+        )
+        df = r2r.clean_revenue_frame(r2r.read_table(revenue_path, args.ym, "online revenue", r2r.REVENUE_COLUMNS))
+    records = list(r2r.revenue_frame_records(df))
+
+    layouts = {}
+    for layout in args.layouts.split(","):
+        layouts[layout] = bench_layout(layout, args.ym, records, df)
+        print(f"{layout}: 행당 {layouts[layout]['records']['bytes_per_row']:,.0f} bytes, "
+              f"정산서 입력 peak {layouts[layout]['report']['peak_bytes'] / 1024:,.0f} KB", file=sys.stderr)
+
+    result = {
+        "python": sys.version.split()[0],
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "params": {"artists": args.artists, "rows_per_artist": args.rows_per_artist, "seed": args.seed,
+                   "ym": args.ym},
+        "revenue_rows": len(records),
+        "layouts": layouts,
+    }
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+시작 시간 벤치마크
+
+  1) cold import   : 새 인터프리터에서 `import revenue2report_xlsx` 에 걸리는 시간
+  2) worker 준비   : 프로세스 풀 worker가 실제 렌더링 직전까지 로드하는 것
+                     (모듈 + openpyxl Workbook + 스타일 레지스트리)
+  3) 스크립트 실행 : Streamlit 페이지 첫 실행 / rerun 한 번에 걸리는 스크립트 시간
+                     (streamlit.testing AppTest로 측정)
+
+각 항목은 --repeat 번 반복한 중앙값(초). 결과는 JSON으로 stdout (+ --out 파일)에 기록.
+
+  python benchmarks/bench_startup.py --repeat 5 --out startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_ROOT, "revenue2report_xlsx.py")
+
+HEAVY_MODULES = ("streamlit", "pandas", "openpyxl")
+
+IMPORT_SNIPPET = """
+import json, sys, time
+t = time.perf_counter()
+import revenue2report_xlsx
+elapsed = time.perf_counter() - t
+print(json.dumps({"sec": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+WORKER_SNIPPET = """
+import json, time
+t = time.perf_counter()
+import revenue2report_xlsx
+from openpyxl import Workbook
+revenue2report_xlsx.cell_styles()
+print(json.dumps({"sec": time.perf_counter() - t}))
+"""
+
+
+def run_snippet(code):
+    out = subprocess.run(
+        [sys.executable, "-c", code], cwd=REPO_ROOT,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def bench_subprocess(code, repeat):
+    results = [run_snippet(code) for _ in range(repeat)]
+    summary = {"median_sec": statistics.median(r["sec"] for r in results),
+               "runs_sec": [r["sec"] for r in results]}
+    if "loaded" in results[0]:
+        summary["heavy_modules_loaded"] = results[0]["loaded"]
+    return summary
+
+
+def bench_script_runs(repeat):
+    """AppTest로 페이지를 한 번 띄운 뒤 rerun을 반복하며 스크립트 실행 시간을 잰다."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=120)
+    t = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - t
+
+    reruns = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        at.run()
+        reruns.append(time.perf_counter() - t)
+    return {"first_run_sec": first,
+            "rerun_median_sec": statistics.median(reruns),
+            "reruns_sec": reruns}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="revenue2report 시작 시간 벤치마크")
+    parser.add_argument("--repeat", type=int, default=5, help="항목별 반복 횟수")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    parser.add_argument("--skip-streamlit", action="store_true",
+                        help="streamlit이 없는 환경: 스크립트 실행 시간 측정 생략")
+    args = parser.parse_args(argv)
+
+    result = {
+        "python": sys.version.split()[0],
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "cold_import": bench_subprocess(IMPORT_SNIPPET, args.repeat),
+        "worker_ready": bench_subprocess(WORKER_SNIPPET, args.repeat),
+    }
+    if not args.skip_streamlit:
+        result["script_run"] = bench_script_runs(args.repeat)
+
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
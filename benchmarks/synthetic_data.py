@@ -0,0 +1,154 @@
+"""
+벤치마크용 가짜 입력 파일 생성기 (seed가 같으면 항상 같은 파일)
+
+generate_report_excel이 기대하는 것과 같은 레이아웃으로
+  - input_song cost.xlsx     : 월(YYYYMM)별 시트, 아티스트명 / 정산 요율 / 전월 잔액 / 당월 차감액 / 당월 잔액
+  - input_online revenue.xlsx: 월(YYYYMM)별 시트, 앨범아티스트 / 앨범명 / 대분류 / 중분류 / 서비스명 / 권리사정산금액 ...
+을 만든다. (--format csv / parquet이면 한 파일에 진행기간 컬럼으로 월 구분)
+
+  python benchmarks/synthetic_data.py --artists 1000 --rows-per-artist 200 --out-dir bench_data
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from revenue2report_xlsx import SONG_COST_COLUMNS, REVENUE_COLUMNS, YM_COLUMN  # noqa: E402
+
+SONG_COST_FILE = "input_song cost"
+REVENUE_FILE = "input_online revenue"
+
+# 실제 유통사 export처럼 사용하지 않는 컬럼도 섞어 둠
+REVENUE_EXTRA_COLUMNS = ["곡명", "판매수량", "비고"]
+
+MAJORS = {
+    "스트리밍": ["국내", "해외"],
+    "다운로드": ["국내", "해외"],
+    "영상": ["국내"],
+}
+SERVICES = ["멜론", "지니뮤직", "FLO", "벅스", "VIBE", "YouTube Music", "Spotify", "Apple Music"]
+
+
+def artist_names(count):
+    return [f"아티스트{i:05d}" for i in range(count)]
+
+
+def album_weights(albums_per_artist, album_skew):
+    """album_skew = 0이면 앨범별 행 수가 균등, 클수록 첫 앨범에 몰림 (Zipf 지수)."""
+    return [1.0 / (rank ** album_skew) for rank in range(1, albums_per_artist + 1)]
+
+
+def amount_cell(rnd, value, text_ratio):
+    """금액 셀: 대부분 숫자, 일부는 '1,234' 같은 문자열 (to_num 경로도 같이 측정)."""
+    if rnd.random() < text_ratio:
+        return f"{value:,.0f}"
+    return round(value, 4)
+
+
+def song_cost_rows(rnd, names):
+    for a in names:
+        prev = rnd.randint(0, 5_000_000)
+        deduct = min(prev, rnd.randint(0, 500_000))
+        yield [a, rnd.choice([50, 60, 70, "70%"]), prev, deduct, prev - deduct]
+
+
+def revenue_rows(rnd, names, albums, weights, rows_per_artist, text_ratio):
+    for a in names:
+        for _ in range(rows_per_artist):
+            major = rnd.choice(list(MAJORS))
+            yield [
+                a,
+                rnd.choices(albums[a], weights=weights)[0],
+                major,
+                rnd.choice(MAJORS[major]),
+                rnd.choice(SERVICES),
+                amount_cell(rnd, rnd.uniform(0, 20_000), text_ratio),
+                f"곡{rnd.randint(1, 12)}",
+                rnd.randint(1, 5_000),
+                None,
+            ]
+
+
+def write_input(path, fmt, header, months_rows):
+    """
+    months_rows: [(ym, 행 iterator), ...]
+    xlsx는 월별 시트, csv/parquet은 한 파일에 YM_COLUMN(진행기간) 컬럼을 붙여서 저장.
+    """
+    if fmt == "xlsx":
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        for ym, rows in months_rows:
+            ws = wb.create_sheet(ym)
+            ws.append(header)
+            for row in rows:
+                ws.append(row)
+        wb.save(path)
+        return
+
+    import pandas as pd
+
+    records = [[ym] + row for ym, rows in months_rows for row in rows]
+    # 금액 컬럼에 숫자/문자열이 섞여 있으므로 파일에는 모두 문자열로 저장 (실제 export와 같음)
+    df = pd.DataFrame(records, columns=[YM_COLUMN] + header).astype(str).replace("None", "")
+    if fmt == "csv":
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+    else:
+        df.to_parquet(path, index=False)
+
+
+def generate_inputs(out_dir, months=("202410",), artists=100, rows_per_artist=50,
+                    albums_per_artist=3, album_skew=1.0, text_ratio=0.05, seed=0, fmt="xlsx"):
+    """
+    out_dir에 두 입력 파일을 만들고 (song cost 경로, online revenue 경로)를 반환.
+
+    - months: 만들 시트(YYYYMM) 목록
+    - artists: 아티스트 수
+    - rows_per_artist: 월별 아티스트 1명당 매출 행 수
+    - albums_per_artist / album_skew: 아티스트당 앨범 수, 앨범별 행 쏠림 정도
+    - text_ratio: 금액을 "1,234" 형태 문자열로 넣을 비율
+    - fmt: "xlsx" / "csv" / "parquet" (같은 seed면 형식과 관계없이 같은 값)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rnd = random.Random(seed)
+    names = artist_names(artists)
+    weights = album_weights(albums_per_artist, album_skew)
+    albums = {a: [f"{a} 앨범{j + 1}" for j in range(albums_per_artist)] for a in names}
+
+    song_path = os.path.join(out_dir, f"{SONG_COST_FILE}.{fmt}")
+    write_input(song_path, fmt, list(SONG_COST_COLUMNS.values()),
+                [(ym, list(song_cost_rows(rnd, names))) for ym in months])
+
+    revenue_path = os.path.join(out_dir, f"{REVENUE_FILE}.{fmt}")
+    write_input(revenue_path, fmt, list(REVENUE_COLUMNS.values()) + REVENUE_EXTRA_COLUMNS,
+                [(ym, list(revenue_rows(rnd, names, albums, weights, rows_per_artist, text_ratio)))
+                 for ym in months])
+
+    return song_path, revenue_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="벤치마크용 입력 엑셀 생성")
+    parser.add_argument("--out-dir", required=True)
+    parser.add_argument("--months", default="202410", help="쉼표로 구분한 YYYYMM 목록")
+    parser.add_argument("--artists", type=int, default=100)
+    parser.add_argument("--rows-per-artist", type=int, default=50)
+    parser.add_argument("--albums-per-artist", type=int, default=3)
+    parser.add_argument("--album-skew", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--format", choices=["xlsx", "csv", "parquet"], default="xlsx")
+    args = parser.parse_args(argv)
+
+    paths = generate_inputs(
+        args.out_dir, months=args.months.split(","), artists=args.artists,
+        rows_per_artist=args.rows_per_artist, albums_per_artist=args.albums_per_artist,
+        album_skew=args.album_skew, seed=args.seed, fmt=args.format
+    )
+    for p in paths:
+        print(p)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+정산 보고서 일괄 생성 CLI (Streamlit 없이 실행)
+
+revenue2report_xlsx의 파싱/렌더링 코드를 그대로 사용하며, streamlit은 import 하지 않음.
+cron 등에서 월말 배치를 돌릴 때 사용.
+
+예)
+  python -m revenue2report_cli --ym 202410 \\
+      --song-cost "input_song cost.xlsx" --revenue "input_online revenue.xlsx" \\
+      --out 정산결과보고서.zip --workers 8 --json
+
+  # 분기 한 번에 (ZIP 안 202407/ 202408/ 202409/ 폴더)
+  python -m revenue2report_cli --ym 202407-202409 \\
+      --song-cost "input_song cost.xlsx" --revenue "input_online revenue.xlsx" --out 2024Q3.zip
+
+종료 코드 (ZIP은 0, 3, 4일 때 모두 저장됨)
+  0: 정상
+  1: 생성 실패 (입력 파일 오류 등, ZIP 없음)
+  2: 인자 오류 (argparse)
+  3: --verify 재검증 불일치
+  4: --memory-budget 예산 초과 (재검증 불일치가 같이 있으면 3)
+"""
+import argparse
+import json
+import sys
+
+import revenue2report_xlsx as r2r
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_VERIFY_MISMATCH = 3
+EXIT_OVER_BUDGET = 4
+
+
+class ConsoleReporter(r2r.ProgressReporter):
+    """
+    진행률/오류를 stderr로 출력.
+    터미널이면 한 줄을 계속 덮어쓰고, 로그 파일(비 tty)이면 10% 단위로만 한 줄씩 남김.
+    """
+
+    def __init__(self, stream=None, quiet=False):
+        self.stream = stream if stream is not None else sys.stderr
+        self.quiet = quiet
+        self.is_tty = self.stream.isatty()
+        self._last_step = -1
+
+    def error(self, message):
+        if self.is_tty and self._last_step >= 0:
+            self.stream.write("\n")
+        print(f"[오류] {message}", file=self.stream)
+
+    def progress(self, ratio, message):
+        if self.quiet:
+            return
+        if self.is_tty:
+            self.stream.write(f"\r\x1b[K{ratio:6.1%} {message}")
+            self.stream.flush()
+            self._last_step = 0
+            return
+        step = int(ratio * 10)
+        if step != self._last_step:
+            self._last_step = step
+            print(f"{ratio:6.1%} {message}", file=self.stream, flush=True)
+
+    def done(self, message):
+        if self.quiet:
+            return
+        if self.is_tty:
+            self.stream.write("\n")
+        print(message, file=self.stream, flush=True)
+
+
+def build_parser():
+    file_types = " / ".join(r2r.INPUT_FILE_TYPES)
+    parser = argparse.ArgumentParser(
+        prog="python -m revenue2report_cli",
+        description=f"song cost / online revenue 파일({file_types})로 아티스트별 정산 보고서 ZIP 생성"
+    )
+    parser.add_argument("--ym", required=True,
+                        help="진행기간 (YYYYMM). 여러 달은 202401-202403 / 202401,202406 (ZIP 안 달별 폴더)")
+    parser.add_argument("--song-cost", help=f"input_song cost 경로 ({file_types}). --ledger면 생략 가능")
+    parser.add_argument("--revenue", help=f"input_online revenue 경로 ({file_types}). --ledger면 생략 가능")
+    parser.add_argument("--out", required=True, help="결과 ZIP 경로")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="아티스트별 렌더링 프로세스 수 (기본 1 = 순차 처리)")
+    parser.add_argument("--zip-policy", choices=list(r2r.ZIP_POLICIES.keys()), default="auto",
+                        help="ZIP 압축 방식")
+    parser.add_argument("--zip-level", type=int, choices=range(1, 10), default=6, metavar="1-9",
+                        help="deflate 압축 레벨")
+    parser.add_argument("--detail-backend", choices=list(r2r.DETAIL_BACKENDS.keys()), default="openpyxl",
+                        help="세부매출내역 렌더링 방식 (native = SpreadsheetML 직접 작성)")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="단계별/아티스트별 최대 메모리도 측정 (tracemalloc, 실행이 느려짐)")
+    parser.add_argument("--ledger", metavar="PATH",
+                        help="정산 원장(SQLite) 경로: 파싱 결과 저장 / 재사용, 전월 잔액 연속성 확인. "
+                             "입력 파일을 생략하면 원장에 저장된 달로 재발행")
+    parser.add_argument("--verify", type=float, nargs="?", const=1.0, default=0.0, metavar="RATIO",
+                        help="생성한 xlsx를 ZIP에서 다시 읽어 원본과 비교. RATIO(0~1)만큼의 아티스트만 "
+                             "무작위로 확인 (값 없이 쓰면 전체)")
+    parser.add_argument("--verify-seed", type=int, help="--verify 표본 추출 seed")
+    parser.add_argument("--memory-budget", type=int, metavar="MB",
+                        help="저메모리 모드: 매출 행을 원장(없으면 임시 SQLite)에 두고 아티스트마다 읽어서 생성. "
+                             "끝난 뒤 최대 RSS가 MB를 넘으면 경고 (--workers 무시, 1개 프로세스로 처리)")
+    parser.add_argument("--json", action="store_true",
+                        help="완료 후 실행 요약(단계별 시간, ZIP 통계)을 JSON으로 stdout에 출력")
+    parser.add_argument("--quiet", action="store_true", help="진행률 출력 안 함 (오류만 출력)")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        yms = r2r.parse_ym_list(args.ym)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.workers < 1:
+        parser.error("--workers는 1 이상이어야 합니다.")
+    if not 0.0 <= args.verify <= 1.0:
+        parser.error("--verify는 0~1 사이여야 합니다.")
+    if args.memory_budget is not None and args.memory_budget < 1:
+        parser.error("--memory-budget은 1 이상이어야 합니다.")
+    if args.memory_budget is not None and args.workers > 1:
+        print("[참고] --memory-budget에서는 --workers를 무시하고 1개 프로세스로 처리합니다.", file=sys.stderr)
+    if not (args.song_cost and args.revenue) and not args.ledger:
+        parser.error("--song-cost와 --revenue가 필요합니다. (--ledger를 쓰면 저장된 달은 생략 가능)")
+
+    check_dict = r2r.new_check_dict()
+    generate = r2r.generate_report_excel if len(yms) == 1 else r2r.generate_report_batch
+    zip_file = generate(
+        yms[0] if len(yms) == 1 else yms, None,  # 정산서에 발행 날짜를 적지 않으므로 report_date 없음
+        args.song_cost,
+        args.revenue,
+        check_dict,
+        workers=args.workers,
+        zip_policy=args.zip_policy,
+        zip_level=args.zip_level,
+        reporter=ConsoleReporter(quiet=args.quiet),
+        trace_memory=args.trace_memory,
+        detail_backend=args.detail_backend,
+        ledger=r2r.LedgerStore(args.ledger) if args.ledger else None,
+        verify=args.verify,
+        verify_seed=args.verify_seed,
+        memory_budget_mb=args.memory_budget
+    )
+    if zip_file is None:
+        return EXIT_FAILED
+
+    with zip_file:
+        r2r.save_zip_file(zip_file, args.out)
+
+    summary = dict(check_dict["run_summary"])
+    summary["out"] = args.out
+    months = check_dict.get("months", {yms[0]: check_dict})
+    if "months" in check_dict:
+        summary["artist_compare_result"] = {ym: m["artist_compare_result"] for ym, m in months.items()}
+    else:
+        summary["artist_compare_result"] = check_dict["artist_compare_result"]
+    if args.ledger:
+        continuity = {ym: m["balance_continuity"] for ym, m in months.items()}
+        summary["balance_continuity"] = continuity if "months" in check_dict else continuity[yms[0]]
+        for ym, c in continuity.items():
+            if c and c["mismatches"]:
+                print(f"[주의] {ym} 전월 잔액이 {c['prev_ym']} 당월 잔액과 다른 아티스트 "
+                      f"{len(c['mismatches'])}명", file=sys.stderr)
+    if args.verify:
+        ver_sum = check_dict["verification_summary"]
+        summary["verification_summary"] = {
+            "total_errors": ver_sum["total_errors"],
+            "artist_error_list": sorted(set(ver_sum["artist_error_list"]), key=str),
+        }
+        if ver_sum["total_errors"]:
+            print(f"[주의] 재검증 불일치 {ver_sum['total_errors']}건 "
+                  f"(아티스트 {len(summary['verification_summary']['artist_error_list'])}명)", file=sys.stderr)
+    mem = summary.get("memory")
+    if mem and mem["over_budget"]:
+        print(f"[주의] 최대 메모리(RSS) {mem['peak_rss_mb']:,.0f} MB가 예산 {mem['budget_mb']:,} MB를 넘었습니다.",
+              file=sys.stderr)
+    # 아티스트별 전체 지표는 ZIP 안 run_metrics.json에 있으므로 여기선 단계별 + 느린 아티스트만
+    rm = check_dict["run_metrics"]
+    summary["stages"] = rm["stages"]
+    summary["slowest_artists"] = sorted(rm["artists"], key=lambda a: a["wall_sec"], reverse=True)[:10]
+    if args.json:
+        json.dump(summary, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write("\n")
+    elif not args.quiet:
+        t = summary["timings"]
+        print(
+            f"{args.out}: {len(yms)}개월, 아티스트 보고서 {summary['artists']}건, "
+            f"파싱 {t['ingest_sec']:.1f}초 + 생성/압축 {t['render_package_sec']:.1f}초 "
+            f"+ 재검증 {t['verify_sec']:.1f}초 = {t['total_sec']:.1f}초",
+            file=sys.stderr
+        )
+    if args.verify and summary["verification_summary"]["total_errors"]:
+        return EXIT_VERIFY_MISMATCH
+    if mem and mem["over_budget"]:
+        return EXIT_OVER_BUDGET
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
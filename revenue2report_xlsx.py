@@ -1,16 +1,39 @@
-import streamlit as st
 import re
+import os
 import time
 import io
+import json
+import codecs
+import hashlib
+import importlib
+import importlib.util
 import zipfile
-import openpyxl
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
-from collections import defaultdict
-import pandas as pd
+import weakref
+import tempfile
+import shutil
+import queue
+import threading
+import tracemalloc
+import sqlite3
+import traceback
+import uuid
+from array import array
+from copy import copy
+from contextlib import contextmanager, nullcontext, ExitStack
+from functools import lru_cache, partial
+from collections import defaultdict, OrderedDict
+from collections.abc import Mapping
+from operator import itemgetter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from multiprocessing import get_context
+
+# streamlit / pandas / openpyxl은 무거우므로 실제로 쓰는 함수 안에서 import 한다.
+#   - CLI, 프로세스 풀 worker는 streamlit을 전혀 로드하지 않음
+#   - pandas는 CSV / Parquet 파싱과 세부 검증 화면에서만 로드
 
 def main():
+    import streamlit as st
+
     st.title("아티스트 음원 정산 보고서 자동 생성기 (Excel 기반)")
 
     # 1) 섹션1: 보고서 생성(파일 업로드 + 진행기간/발행일 입력 등)
@@ -42,65 +65,208 @@ def sanitize_sheet_title(s: str) -> str:
 # 1) 섹션1: 보고서 생성(파일 업로드 + 진행기간/발행일 입력)
 # ------------------------------------------
 def section_one_report_input():
+    import streamlit as st
+
     st.subheader("1) 정산 보고서 생성")
 
     default_ym = st.session_state.get("ym", "")
     default_report_date = st.session_state.get("report_date", "")
 
-    ym = st.text_input("진행기간(YYYYMM)", default_ym)
+    ym = st.text_input(
+        "진행기간(YYYYMM)", default_ym,
+        help="여러 달을 한 번에 만들려면 202401-202403 처럼 범위나 202401, 202406 처럼 목록으로 입력 (달별 폴더로 ZIP 하나)"
+    )
     report_date = st.text_input("보고서 발행 날짜 (YYYY-MM-DD)", default_report_date)
 
-    uploaded_song_cost = st.file_uploader("input_song cost.xlsx 업로드", type=["xlsx"])
-    uploaded_online_revenue = st.file_uploader("input_online revenue.xlsx 업로드", type=["xlsx"])
+    file_types = " / ".join(INPUT_FILE_TYPES)
+    uploaded_song_cost = st.file_uploader(
+        f"input_song cost 업로드 ({file_types})", type=INPUT_FILE_TYPES
+    )
+    uploaded_online_revenue = st.file_uploader(
+        f"input_online revenue 업로드 ({file_types})", type=INPUT_FILE_TYPES
+    )
+    st.caption(f"{' / '.join(INPUT_FILE_TYPES[1:])} 파일은 xlsx와 같은 컬럼명을 사용하며, "
+               f"'{YM_COLUMN}' 컬럼이 있으면 해당 월 행만 읽습니다.")
+
+    with st.expander("고급 설정"):
+        workers = st.number_input(
+            "렌더링 프로세스 수 (1 = 순차 처리)",
+            min_value=1, max_value=os.cpu_count() or 1, value=1, step=1
+        )
+        zip_policy = st.selectbox(
+            "ZIP 압축 방식",
+            options=list(ZIP_POLICIES.keys()),
+            format_func=lambda k: {"auto": "자동 (xlsx는 무압축, 나머지 deflate)",
+                                   "deflated": "모두 deflate",
+                                   "stored": "모두 무압축"}[k]
+        )
+        zip_level = st.slider("deflate 압축 레벨", min_value=1, max_value=9, value=6)
+        detail_backend = st.radio(
+            "세부매출내역 생성 방식",
+            options=list(DETAIL_BACKENDS.keys()),
+            format_func=lambda k: {"openpyxl": "openpyxl",
+                                   "native": "직접 작성 (빠름)"}[k],
+            horizontal=True
+        )
+        trace_memory = st.checkbox(
+            "단계별 메모리 사용량 측정 (tracemalloc, 실행이 느려짐)",
+            help="tracemalloc은 서버 프로세스 전체에 하나이므로, 측정하는 작업은 다른 작업이 없을 때 단독으로 실행됨"
+        )
+        verify_on = st.checkbox("생성한 엑셀을 다시 읽어서 원본과 비교 (재검증)", value=True)
+        verify_pct = st.slider(
+            "재검증할 아티스트 비율 (%)", min_value=1, max_value=100, value=100, disabled=not verify_on,
+            help="100 미만이면 무작위로 고른 아티스트만 확인 (빠른 점검용)"
+        )
+        low_memory = st.checkbox(
+            "저메모리 모드 (대용량 입력)",
+            help="매출 행을 원장/임시 SQLite 파일에 두고 아티스트마다 읽어서 만듦 "
+                 "(렌더링 프로세스 수 설정은 무시되고 1개 프로세스로 처리)"
+        )
+        memory_budget_mb = st.number_input(
+            "메모리 예산 (MB)", min_value=128, value=512, step=64, disabled=not low_memory,
+            help="실행 중 최대 메모리(RSS)가 예산을 넘었는지 검증 요약에 표시 "
+                 "(서버 프로세스의 이전 실행 최대치가 더 크면 이번 실행만의 값은 알 수 없음)"
+        )
+        use_ledger = st.checkbox("정산 원장(SQLite)에 파싱 결과 저장 / 재사용")
+        ledger_path = st.text_input("원장 파일 경로", LEDGER_DEFAULT_PATH, disabled=not use_ledger)
+        ledger = LedgerStore(ledger_path) if use_ledger else None
+        if ledger is not None:
+            stored = ledger.stored_months()
+            st.caption(
+                f"원장에 저장된 달: {', '.join(stored)} (입력 파일 없이 재발행 가능)" if stored
+                else "원장에 저장된 달이 없습니다. 이번 실행의 파싱 결과부터 저장됩니다."
+            )
+
+    parse_cache = st.session_state.setdefault("parse_cache", ParseCache())
+    if len(parse_cache):
+        status_txt = {"hit": "재사용", "partial": "일부 재사용", "miss": "새로 파싱"}
+        last = ", ".join(f"{k}={status_txt[v]}" for k, v in parse_cache.last_status.items())
+        st.caption(
+            f"파싱 캐시: {len(parse_cache)}/{parse_cache.max_entries}개 보관 · "
+            f"적중 {parse_cache.hits} / 미적중 {parse_cache.misses} · 마지막 실행: {last}"
+        )
 
-    if st.button("정산 보고서 생성 시작"):
-        if not re.match(r'^\d{6}$', ym):
-            st.error("진행기간은 YYYYMM 6자리로 입력하세요.")
+    # 생성은 백그라운드 작업으로 실행 → 이 세션(또는 ?job= 주소로 다시 접속한 세션)이 진행 상황을 읽어 감
+    registry = job_registry()
+    job_id = st.session_state.get("job_id") or st.query_params.get("job")
+    job = registry.get(job_id) if job_id else None
+    if job_id and job is None:
+        st.session_state.pop("job_id", None)
+        st.query_params.pop("job", None)
+        st.info("이전 작업을 찾을 수 없습니다. (서버가 다시 시작되었거나 보관 기간이 지남)")
+    running = job is not None and job.status in ("queued", "running")
+
+    if st.button("정산 보고서 생성 시작", disabled=running):
+        try:
+            yms = parse_ym_list(ym)
+        except ValueError as e:
+            st.error(str(e))
             return
         if not report_date:
             st.error("보고서 발행 날짜를 입력하세요.")
             return
-        if not uploaded_song_cost or not uploaded_online_revenue:
-            st.error("두 개의 엑셀 파일을 모두 업로드해야 합니다.")
+        if (not uploaded_song_cost or not uploaded_online_revenue) and ledger is None:
+            st.error("두 개의 입력 파일을 모두 업로드해야 합니다. (원장을 쓰면 저장된 달은 파일 없이 재발행 가능)")
             return
 
         st.session_state["ym"] = ym
         st.session_state["report_date"] = report_date
 
-        check_dict = {
-            "song_artists": [],
-            "revenue_artists": [],
-            "artist_compare_result": {},
-            "verification_summary": {
-                "total_errors": 0,
-                "artist_error_list": []
-            },
-            "details_verification": {
-                "정산서": [],
-                "세부매출": []
-            }
-        }
-
-        zip_data = generate_report_excel(
-            ym, report_date,
-            uploaded_song_cost,
-            uploaded_online_revenue,
-            check_dict
+        # 작업 스레드가 읽는 동안 rerun이 같은 업로드 객체의 위치를 바꾸지 않도록 따로 스트림을 엶 (내용은 공유)
+        # 업로드가 없으면 원장에서
+        file_song_cost = io.BytesIO(uploaded_song_cost.getvalue()) if uploaded_song_cost else None
+        file_online_revenue = io.BytesIO(uploaded_online_revenue.getvalue()) if uploaded_online_revenue else None
+        options = dict(
+            parse_cache=parse_cache,
+            workers=int(workers),
+            zip_policy=zip_policy,
+            zip_level=zip_level,
+            trace_memory=trace_memory,
+            detail_backend=detail_backend,
+            ledger=ledger,
+            verify=verify_pct / 100 if verify_on else 0.0,
+            memory_budget_mb=int(memory_budget_mb) if low_memory else None
         )
+        job_id = registry.submit(
+            ym, partial(run_report_job, yms, report_date, file_song_cost, file_online_revenue, options),
+            exclusive=trace_memory
+        )
+        st.session_state["job_id"] = job_id
+        st.query_params["job"] = job_id
+        job = registry.get(job_id)
 
-        if zip_data is not None:
-            st.success("정산 보고서 생성 완료! 아래 섹션에서 ZIP 다운로드 가능")
-            st.session_state["report_done"] = True
-            st.session_state["zip_data"] = zip_data
-            st.session_state["check_dict"] = check_dict
-        else:
+    if job is not None:
+        st.session_state["job_id"] = job.id
+        show_report_job(job.id, poll=job.status in ("queued", "running"))
+
+
+def show_report_job(job_id, poll):
+    """
+    백그라운드 작업 진행 상황. poll이면 JOB_POLL_SEC마다 이 부분만 다시 그림.
+    작업이 끝나면 결과(ZIP, 검증 딕셔너리)를 세션에 붙이고 전체 화면을 다시 실행.
+    """
+    import streamlit as st
+
+    @st.fragment(run_every=JOB_POLL_SEC if poll else None)
+    def panel():
+        job = job_registry().get(job_id)
+        if job is None:
+            return
+        snap = job.snapshot()
+        finished = snap["status"] in ("done", "error")
+        if finished and st.session_state.get("attached_job") != job_id:
+            st.session_state["attached_job"] = job_id
+            if job.result is not None:
+                # 이전 ZIP은 닫지 않음 (작업 목록이 아직 들고 있을 수 있음. 참조가 모두 사라지면 정리됨)
+                st.session_state["report_done"] = True
+                st.session_state["zip_data"] = job.result["zip_data"]
+                st.session_state["check_dict"] = job.result["check_dict"]
+            st.rerun()
+
+        artists = snap["artists"]
+        verify_bad = sum(1 for info in artists.values() if info["verify_errors"])
+        end = snap["finished_at"] or time.time()
+        elapsed = end - snap["started_at"] if snap["started_at"] else 0.0
+        st.caption(f"작업 {job_id} ({snap['label']}) · 이 주소로 다시 접속해도 진행 상황을 이어서 볼 수 있습니다.")
+        if snap["status"] == "queued":
+            st.info("대기 중 (앞선 작업이 끝나면 시작합니다)")
+        elif snap["status"] == "running":
+            st.progress(min(max(snap["ratio"], 0.0), 1.0), text=snap["message"])
+            st.caption(f"경과 {elapsed:,.0f}초 · 완료 아티스트 {len(artists)}명"
+                       + (f" · 재검증 불일치 아티스트 {verify_bad}명" if verify_bad else ""))
+        for message in snap["errors"]:
+            st.error(message)
+        if snap["status"] == "done":
+            st.success(f"정산 보고서 생성 완료! ({elapsed:,.1f}초) 아래 섹션에서 ZIP 다운로드 가능")
+        elif snap["status"] == "error":
             st.error("보고서 생성 중 오류가 발생했습니다.")
 
+        if artists:
+            import pandas as pd
+
+            # 실행 중에는 최근에 끝난 아티스트만, 끝나면 전체 (재검증 불일치 먼저)
+            names = list(artists)
+            if finished:
+                names.sort(key=lambda name: -(artists[name]["verify_errors"] or 0))
+            else:
+                names = names[:-11:-1]
+            with st.expander("아티스트별 상태", expanded=not finished):
+                st.dataframe(pd.DataFrame({
+                    "아티스트": [str(name) for name in names],
+                    "행 수": [artists[name]["rows"] for name in names],
+                    "생성(초)": [artists[name]["wall_sec"] for name in names],
+                    "재검증 불일치": [artists[name]["verify_errors"] for name in names],
+                }), hide_index=True)
+
+    panel()
+
 
 # ------------------------------------------
 # 2) 섹션2: 검증 결과 표시
 # ------------------------------------------
 def section_two_verification():
+    import streamlit as st
+
     if st.session_state.get("report_done", False):
         st.subheader("2) 검증 결과")
 
@@ -109,27 +275,65 @@ def section_two_verification():
             st.info("검증 데이터가 없습니다.")
             return
 
-        tab1, tab2 = st.tabs(["검증 요약", "세부 검증 내용"])
+        tab1, tab_perf, tab2 = st.tabs(["검증 요약", "성능", "세부 검증 내용"])
 
         with tab1:
-            ar = cd.get("artist_compare_result", {})
-            st.write("**아티스트 목록 비교**")
-            st.write(f"- Song cost 아티스트 수 = {ar.get('song_count')}")
-            st.write(f"- Revenue 아티스트 수 = {ar.get('revenue_count')}")
-            st.write(f"- 공통 아티스트 수 = {ar.get('common_count')}")
-            if ar.get("missing_in_song"):
-                st.warning(f"Song에 없고 Revenue에만 있는 아티스트: {ar['missing_in_song']}")
-            if ar.get("missing_in_revenue"):
-                st.warning(f"Revenue에 없고 Song에만 있는 아티스트: {ar['missing_in_revenue']}")
+            months = cd.get("months")
+            if months:
+                show_month_artist_compare(months)
+            else:
+                ar = cd.get("artist_compare_result", {})
+                st.write("**아티스트 목록 비교**")
+                st.write(f"- Song cost 아티스트 수 = {ar.get('song_count')}")
+                st.write(f"- Revenue 아티스트 수 = {ar.get('revenue_count')}")
+                st.write(f"- 공통 아티스트 수 = {ar.get('common_count')}")
+                if ar.get("missing_in_song"):
+                    st.warning(f"Song에 없고 Revenue에만 있는 아티스트: {ar['missing_in_song']}")
+                if ar.get("missing_in_revenue"):
+                    st.warning(f"Revenue에 없고 Song에만 있는 아티스트: {ar['missing_in_revenue']}")
+                if "balance_continuity" in cd:
+                    show_balance_continuity(cd["balance_continuity"])
+
+            zs = cd.get("run_summary", {}).get("zip")
+            if zs:
+                ratio = zs["zip_bytes"] / zs["raw_bytes"] if zs["raw_bytes"] else 1.0
+                st.write("**ZIP 패키징**")
+                st.write(
+                    f"- 압축 방식 = {zs['policy']} (레벨 {zs['level']}), 파일 {zs['entries']}개\n"
+                    f"- 원본 {zs['raw_bytes'] / (1024 * 1024):,.1f} MB → "
+                    f"ZIP {zs['zip_bytes'] / (1024 * 1024):,.1f} MB ({ratio:.0%})\n"
+                    f"- 압축/기록 CPU 시간 = {zs['cpu_sec']:.2f}초"
+                )
+
+            mem = cd.get("run_summary", {}).get("memory")
+            if mem and mem["peak_rss_mb"] is not None:
+                text = f"저메모리 모드: 최대 메모리(RSS) {mem['peak_rss_mb']:,.0f} MB / 예산 {mem['budget_mb']:,} MB"
+                if mem["over_budget"] is None:
+                    st.caption(text + " (서버 프로세스의 이전 실행 최대치라 이번 실행의 예산 초과 여부는 알 수 없음)")
+                elif mem["over_budget"]:
+                    st.warning(text + " (예산 초과)")
+                else:
+                    st.write(f"**{text}**")
 
             ver_sum = cd.get("verification_summary", {})
             total_err = ver_sum.get("total_errors", 0)
             artists_err = ver_sum.get("artist_error_list", [])
-            if total_err == 0:
-                st.success("모든 항목이 정상 계산되었습니다. (오류 0건)")
+            vs = cd.get("run_summary", {}).get("verify")
+            if vs is None:
+                st.info("생성 파일 재검증을 하지 않았습니다. (고급 설정에서 선택)")
             else:
-                st.error(f"총 {total_err}건의 계산 오류 발생!")
-                st.warning(f"문제 발생 아티스트: {list(set(artists_err))}")
+                st.write(
+                    f"**생성 파일 재검증**: 아티스트 {vs['artists']}명 ({vs['ratio']:.0%}) · "
+                    f"{cd['run_summary']['timings']['verify_sec']:.1f}초"
+                )
+                if total_err == 0:
+                    st.success("모든 항목이 정상 계산되었습니다. (오류 0건)")
+                else:
+                    st.error(f"총 {total_err}건의 계산 오류 발생!")
+                    st.warning(f"문제 발생 아티스트: {list(set(artists_err))}")
+
+        with tab_perf:
+            show_run_metrics(cd)
 
         with tab2:
             show_detailed_verification(cd)
@@ -142,27 +346,410 @@ def section_two_verification():
 # 3) 섹션3: 결과 ZIP 다운로드
 # ------------------------------------------
 def section_three_download_zip():
+    import streamlit as st
+
     if st.session_state.get("report_done", False):
         st.subheader("3) 결과 ZIP 다운로드")
 
         zip_data = st.session_state.get("zip_data")
-        if zip_data:
+        if zip_data is not None:
+            size = zip_file_size(zip_data)
+            st.caption(f"ZIP 크기: {size / (1024 * 1024):,.1f} MB")
+            # 세션에는 스풀 파일만 들고 있고, 실제 내용은 버튼을 눌렀을 때 읽음
             st.download_button(
                 label="ZIP 다운로드",
-                data=zip_data,
+                data=lambda: read_zip_file(zip_data),
                 file_name="정산결과보고서.zip",
                 mime="application/zip"
             )
+            # 브라우저 다운로드는 Streamlit이 ZIP 전체를 bytes로 올려야 하므로,
+            # 큰 ZIP은 서버 경로에 나눠서 복사하는 방법도 제공
+            if size > ZIP_SPOOL_MAX_SIZE:
+                default_path = os.path.join(ZIP_SAVE_DIR, f"정산결과보고서_{st.session_state.get('ym', '')}.zip")
+                path = st.text_input("서버에 저장할 경로", default_path,
+                                     help="ZIP을 메모리에 올리지 않고 임시 파일에서 그대로 복사")
+                if st.button("서버 경로에 저장"):
+                    try:
+                        save_zip_file(zip_data, path)
+                    except OSError as e:
+                        st.error(f"저장 중 오류가 발생했습니다: {e}")
+                    else:
+                        st.success(f"저장 완료: {path}")
         else:
             st.warning("ZIP 데이터가 없습니다.")
     else:
         st.info("아직 보고서가 생성되지 않았습니다.")
 
 
+# --------------------------------------------------
+# 진행/오류 알림 (엔진 → UI)
+# --------------------------------------------------
+class ProgressReporter:
+    """
+    generate_report_excel이 진행률/오류를 알리는 인터페이스.
+    기본 구현은 아무것도 하지 않음 (Streamlit/CLI가 각자 구현).
+    """
+
+    def error(self, message):
+        pass
+
+    def progress(self, ratio, message):
+        pass
+
+    def done(self, message):
+        pass
+
+    def artist_done(self, name, record):
+        """아티스트 1명 렌더링 완료 (name = ZIP 안 경로 기준 아티스트, record = RunMetrics.artist 지표)."""
+        pass
+
+    def artist_verified(self, name, errors):
+        """아티스트 1명 재검증 완료 (errors = 불일치 수)."""
+        pass
+
+
+# --------------------------------------------------
+# 백그라운드 작업 (보고서 생성을 스크립트 실행과 분리)
+# --------------------------------------------------
+#   Streamlit 버튼 핸들러 안에서 생성하면 위젯을 건드리거나 다시 접속할 때 작업이 끊기므로,
+#   서버 프로세스에 하나뿐인 JobRegistry가 스레드에서 실행하고 화면은 job id로 진행 상황만 읽어 감.
+JOB_MAX_RUNNING = 2         # 동시에 실행하는 작업 수 (나머지는 대기)
+JOB_KEEP_FINISHED = 8       # 결과를 들고 있는 끝난 작업 수
+JOB_RESULT_TTL_SEC = 3600   # 끝난 뒤 이 시간이 지난 작업은 목록에서 제거
+JOB_POLL_SEC = 1.0          # 실행 중인 작업의 진행 상황을 다시 그리는 간격
+
+
+class ReportJob:
+    """
+    백그라운드 작업 1건의 상태. 작업 스레드(JobReporter)가 쓰고 화면이 snapshot()으로 읽음.
+    status: "queued" → "running" → "done" / "error"
+    """
+
+    def __init__(self, job_id, label):
+        self.id = job_id
+        self.label = label
+        self.status = "queued"
+        self.ratio = 0.0
+        self.message = "대기 중"
+        self.errors = []
+        self.artists = {}  # {아티스트: {"rows", "wall_sec", "verify_errors"}} (끝난 순서)
+        self.result = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def update(self, **fields):
+        with self._lock:
+            for key, value in fields.items():
+                setattr(self, key, value)
+
+    def add_error(self, message):
+        with self._lock:
+            self.errors.append(message)
+
+    def update_artist(self, name, **fields):
+        with self._lock:
+            self.artists.setdefault(name, {"rows": None, "wall_sec": None, "verify_errors": None}).update(fields)
+
+    def snapshot(self):
+        """화면 표시용 복사본 dict (result 제외)."""
+        with self._lock:
+            return {
+                "id": self.id, "label": self.label, "status": self.status,
+                "ratio": self.ratio, "message": self.message, "errors": list(self.errors),
+                "artists": {name: dict(info) for name, info in self.artists.items()},
+                "created_at": self.created_at, "started_at": self.started_at, "finished_at": self.finished_at,
+            }
+
+
+class JobReporter(ProgressReporter):
+    """generate_report_excel의 진행 알림을 ReportJob에 기록."""
+
+    def __init__(self, job):
+        self.job = job
+
+    def error(self, message):
+        self.job.add_error(message)
+
+    def progress(self, ratio, message):
+        self.job.update(ratio=ratio, message=message)
+
+    def done(self, message):
+        self.job.update(message=message)
+
+    def artist_done(self, name, record):
+        self.job.update_artist(name, rows=record["rows"], wall_sec=record["wall_sec"])
+
+    def artist_verified(self, name, errors):
+        self.job.update_artist(name, verify_errors=errors)
+
+
+class JobRegistry:
+    """
+    보고서 생성 작업을 스레드에서 실행하고 job id로 찾는 저장소.
+
+      job_id = registry.submit("202410", run)   # run(reporter) → 세션에 붙일 결과 dict (실패면 None)
+      job = registry.get(job_id)                # 없으면 (정리됐거나 서버 재시작) None
+
+    - 동시에 max_running 개까지 실행하고 나머지는 queued로 대기
+    - exclusive=True인 작업(tracemalloc 측정)은 다른 작업이 모두 끝난 뒤 혼자 실행. 기다리는 동안에는
+      새 작업도 시작하지 않고 그 뒤에서 대기 (tracemalloc은 프로세스 전역이라 다른 작업의 할당 / reset_peak이 섞임)
+    - 끝난 작업은 keep_finished 개, JOB_RESULT_TTL_SEC 동안만 결과를 보관 (제거할 때 결과를 닫지는 않음:
+      세션이 아직 들고 있을 수 있으므로 참조가 모두 사라질 때 정리됨)
+    """
+
+    def __init__(self, max_running=JOB_MAX_RUNNING, keep_finished=JOB_KEEP_FINISHED):
+        self.keep_finished = keep_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_running, thread_name_prefix="report-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._slots = threading.Condition()
+        self._active = 0             # 실행 중인 작업 수
+        self._exclusive = False      # 단독 작업이 실행 중
+        self._exclusive_waiting = 0  # 단독 실행을 기다리는 작업 수
+
+    def submit(self, label, run, exclusive=False):
+        job = ReportJob(uuid.uuid4().hex[:12], label)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, run, exclusive)
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    @contextmanager
+    def _slot(self, exclusive):
+        """실행 자리 하나를 잡고 있는 구간. exclusive면 다른 작업이 하나도 없을 때까지 기다림."""
+        with self._slots:
+            if exclusive:
+                self._exclusive_waiting += 1
+                self._slots.wait_for(lambda: self._active == 0)
+                self._exclusive_waiting -= 1
+                self._exclusive = True
+            else:
+                self._slots.wait_for(lambda: not self._exclusive and not self._exclusive_waiting)
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._slots:
+                self._active -= 1
+                if exclusive:
+                    self._exclusive = False
+                self._slots.notify_all()
+
+    def _run(self, job, run, exclusive=False):
+        if exclusive:
+            job.update(message="다른 작업이 끝나기를 기다리는 중 (메모리 측정은 단독 실행)")
+        with self._slot(exclusive):
+            job.update(status="running", started_at=time.time(), message="시작")
+            try:
+                result = run(JobReporter(job))
+            except Exception:
+                job.add_error(f"보고서 생성 중 예외가 발생했습니다:\n{traceback.format_exc()}")
+                result = None
+            job.update(result=result, status="done" if result is not None else "error", finished_at=time.time())
+
+    def _prune(self):
+        now = time.time()
+        finished = [job for job in self._jobs.values() if job.finished_at is not None]
+        expired = finished[:max(0, len(finished) - self.keep_finished)]
+        expired += [job for job in finished if now - job.finished_at > JOB_RESULT_TTL_SEC]
+        for job in expired:
+            self._jobs.pop(job.id, None)
+
+
+def job_registry():
+    """서버 프로세스에 하나뿐인 JobRegistry (rerun / 세션이 바뀌어도 같은 객체)."""
+    import streamlit as st
+
+    @st.cache_resource
+    def registry():
+        return JobRegistry()
+    return registry()
+
+
+# --------------------------------------------------
+# 실행 지표 (단계별 / 아티스트별 시간·메모리)
+# --------------------------------------------------
+class RunMetrics:
+    """
+    파이프라인 단계와 아티스트별 wall 시간, CPU 시간, 최대 메모리를 모음.
+
+      with metrics.stage("ingest.song_cost"): ...           → metrics.stages["ingest.song_cost"]
+      with metrics.artist("아티스트A", rows=120) as rec: ...  → metrics.artists에 rec 추가
+
+    - cpu_sec = thread_time (이 스레드의 CPU 시간). 같은 서버에서 도는 다른 작업은 섞이지 않고,
+      ZIP 압축 스레드(ZipPackager.stats["cpu_sec"])와 worker 프로세스(각자 아티스트 기록)도 여기엔 빠짐
+    - trace_memory=True면 tracemalloc으로 구간 시작 대비 최대 추가 메모리(peak_bytes)를 기록.
+      tracemalloc은 할당이 많은 openpyxl 렌더링을 눈에 띄게 느리게 하므로 기본은 끔 (peak_bytes=None)
+    - tracemalloc과 reset_peak은 프로세스 전역이므로 한 프로세스에서 측정하는 실행은 하나뿐이어야 함
+      (Streamlit에서는 JobRegistry가 exclusive 작업으로 단독 실행)
+    - 같은 이름의 구간을 여러 번 지나면 시간은 더하고 peak_bytes는 최댓값을 남김
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.artists = []
+        self._peaks = []  # 중첩 구간 스택: [구간 시작 시 메모리, 하위 구간 포함 최대 메모리]
+        self._own_tracing = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._own_tracing = True
+
+    def stop(self):
+        if self._own_tracing:
+            tracemalloc.stop()
+            self._own_tracing = False
+
+    @contextmanager
+    def measure(self, record):
+        """with 블록의 wall/cpu 시간을 record에 더하고, peak_bytes를 갱신."""
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing:
+            # reset_peak은 전역이므로, 바깥 구간의 최대치를 먼저 옮겨 두고 초기화
+            current, peak = tracemalloc.get_traced_memory()
+            if self._peaks:
+                self._peaks[-1][1] = max(self._peaks[-1][1], peak)
+            tracemalloc.reset_peak()
+            self._peaks.append([current, current])
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield record
+        finally:
+            record["wall_sec"] += time.perf_counter() - wall
+            record["cpu_sec"] += time.thread_time() - cpu
+            if tracing:
+                base, peak = self._peaks.pop()
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                record["peak_bytes"] = max(record["peak_bytes"] or 0, peak - base)
+                if self._peaks:
+                    self._peaks[-1][1] = max(self._peaks[-1][1], peak)
+
+    def stage(self, name):
+        record = self.stages.setdefault(name, {"wall_sec": 0.0, "cpu_sec": 0.0, "peak_bytes": None})
+        return self.measure(record)
+
+    def artist(self, name, rows, ym=None):
+        """아티스트 1명(의 ym 보고서) 구간. render_sec / save_sec은 render_artist가 채움."""
+        record = {"artist": name, "ym": ym, "rows": rows, "wall_sec": 0.0, "cpu_sec": 0.0, "peak_bytes": None,
+                  "render_sec": 0.0, "save_sec": 0.0}
+        self.artists.append(record)
+        return self.measure(record)
+
+    def to_dict(self):
+        return {"trace_memory": self.trace_memory, "stages": self.stages, "artists": self.artists}
+
+
+def peak_rss_bytes():
+    """
+    현재 프로세스의 최대 RSS (bytes). resource 모듈이 없는 OS(Windows)면 None.
+    프로세스 시작 이후의 최대치이므로, 계속 떠 있는 Streamlit 서버에서는 이전 실행의 최대치일 수 있음.
+    Linux에서는 subprocess가 부모 프로세스의 최대치를 물려받으므로 (fork 시점 RSS 포함), 측정할 자식은 작은 부모에서 띄울 것.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if os.uname().sysname == "Darwin" else peak * 1024  # Linux는 KB 단위
+
+
 # --------------------------------------------------
 # 검증 표시 함수
 # --------------------------------------------------
+def show_month_artist_compare(months):
+    """여러 달 생성 결과: 달별 아티스트 목록 비교 표 + 한쪽에만 있는 아티스트 경고."""
+    import streamlit as st
+
+    st.write("**진행기간별 아티스트 목록 비교**")
+    st.dataframe([
+        {"진행기간": ym, "Song cost": ar["song_count"], "Revenue": ar["revenue_count"],
+         "공통": ar["common_count"], "Song에 없음": len(ar["missing_in_song"]),
+         "Revenue에 없음": len(ar["missing_in_revenue"])}
+        for ym, ar in ((ym, m["artist_compare_result"]) for ym, m in months.items())
+    ])
+    for ym, m in months.items():
+        ar = m["artist_compare_result"]
+        if ar["missing_in_song"]:
+            st.warning(f"[{ym}] Song에 없고 Revenue에만 있는 아티스트: {ar['missing_in_song']}")
+        if ar["missing_in_revenue"]:
+            st.warning(f"[{ym}] Revenue에 없고 Song에만 있는 아티스트: {ar['missing_in_revenue']}")
+        if "balance_continuity" in m:
+            show_balance_continuity(m["balance_continuity"], ym)
+
+
+def show_balance_continuity(continuity, ym=None):
+    """원장 잔액 연속성 (LedgerStore.balance_continuity 결과): 전월 잔액 vs 지난달 당월 잔액."""
+    import streamlit as st
+
+    prefix = f"[{ym}] " if ym else ""
+    if continuity is None:
+        st.caption(f"{prefix}원장에 지난달 song cost가 없어 전월 잔액 연속성은 확인하지 않았습니다.")
+    elif continuity["mismatches"]:
+        st.warning(
+            f"{prefix}전월 잔액이 {continuity['prev_ym']} 당월 잔액과 다른 아티스트 "
+            f"{len(continuity['mismatches'])}명 (비교 {continuity['checked']}명)"
+        )
+        st.dataframe(continuity["mismatches"])
+    else:
+        st.success(
+            f"{prefix}전월 잔액이 {continuity['prev_ym']} 당월 잔액과 모두 일치합니다. "
+            f"(아티스트 {continuity['checked']}명)"
+        )
+
+
+def show_run_metrics(check_dict, top_n=10):
+    """성능 탭: 단계별 시간/메모리 + 가장 오래 걸린 아티스트 top_n."""
+    import streamlit as st
+
+    rm = check_dict.get("run_metrics")
+    if not rm:
+        st.info("실행 지표가 없습니다.")
+        return
+
+    def mb(n):
+        return None if n is None else round(n / (1024 * 1024), 1)
+
+    rs = check_dict.get("run_summary", {})
+    if rs:
+        t = rs["timings"]
+        months = f"{len(rs['yms'])}개월, " if "yms" in rs else ""
+        st.write(
+            f"전체 {t['total_sec']:.1f}초 = 파싱 {t['ingest_sec']:.1f}초 + 생성/압축 {t['render_package_sec']:.1f}초 "
+            f"({months}아티스트 보고서 {rs['artists']}건, 프로세스 {rs['workers']}개)"
+        )
+    if not rm["trace_memory"]:
+        st.caption("메모리는 '고급 설정 > 단계별 메모리 사용량 측정'을 켠 경우에만 기록됩니다.")
+
+    st.write("**단계별**")
+    st.dataframe([
+        {"단계": name, "시간(초)": round(v["wall_sec"], 3), "CPU(초)": round(v["cpu_sec"], 3),
+         "최대 메모리(MB)": mb(v["peak_bytes"])}
+        for name, v in rm["stages"].items()
+    ])
+
+    st.write(f"**가장 오래 걸린 아티스트 (상위 {top_n}명)**")
+    slowest = sorted(rm["artists"], key=itemgetter("wall_sec"), reverse=True)[:top_n]
+    st.dataframe([
+        {"진행기간": a["ym"], "아티스트": a["artist"], "매출 행 수": a["rows"], "시간(초)": round(a["wall_sec"], 3),
+         "생성(초)": round(a["render_sec"], 3), "저장(초)": round(a["save_sec"], 3),
+         "CPU(초)": round(a["cpu_sec"], 3), "최대 메모리(MB)": mb(a["peak_bytes"])}
+        for a in slowest
+    ])
+    st.caption("저장(초)에는 wb.save와 (순차 처리일 때) ZIP 압축 시간이 포함됩니다. 전체 지표는 ZIP의 run_metrics.json 참고.")
+
+
 def show_detailed_verification(check_dict):
+    import streamlit as st
+
     dv = check_dict.get("details_verification", {})
     if not dv:
         st.warning("세부 검증 데이터가 없습니다.")
@@ -171,74 +758,171 @@ def show_detailed_verification(check_dict):
     tabA, tabB = st.tabs(["정산서 검증", "세부매출 검증"])
 
     with tabA:
-        rows = dv.get("정산서", [])
-        if not rows:
-            st.info("정산서 검증 데이터가 없습니다.")
-        else:
-            df = pd.DataFrame(rows)
-            bool_cols = [c for c in df.columns if c.startswith("match_")]
-
-            def highlight_boolean(val):
-                if val is True:
-                    return "background-color: #AAFFAA"
-                elif val is False:
-                    return "background-color: #FFAAAA"
-                else:
-                    return ""
+        show_verification_table(dv.get("정산서"), "정산서")
 
-            int_columns = [
-                "원본_곡비", "정산서_곡비",
-                "원본_공제금액", "정산서_공제금액",
-                "원본_공제후잔액", "정산서_공제후잔액",
-                "원본_정산율(%)", "정산서_정산율(%)"
-            ]
-            format_dict = {col: "{:.0f}" for col in int_columns if col in df.columns}
+    with tabB:
+        show_verification_table(dv.get("세부매출"), "세부매출")
 
-            st.dataframe(
-                df.style
-                  .format(format_dict)
-                  .applymap(highlight_boolean, subset=bool_cols)
-            )
 
-    with tabB:
-        rows = dv.get("세부매출", [])
-        if not rows:
-            st.info("세부매출 검증 데이터가 없습니다.")
+VERIFY_PAGE_SIZES = (50, 100, 500, 1000)
+
+
+def show_verification_table(table, title):
+    """
+    VerificationTable 하나를 페이지 단위로 표시.
+    필터(아티스트 / 불일치만)는 컬럼 배열에서 행 번호만 고르고, 현재 페이지 행만 DataFrame으로 풀어서
+    색 표시(Styler)도 그 페이지에만 적용 → 검증 행 수와 관계없이 화면이 바로 열림.
+    """
+    import math
+    import streamlit as st
+
+    if table is None or not len(table):
+        st.info(f"{title} 검증 데이터가 없습니다.")
+        return
+
+    st.caption(f"전체 {table.rows:,}행 / 불일치 {table.mismatches:,}행 "
+               f"(아티스트 {len(table.artist_mismatches):,}명)")
+
+    # 아티스트 선택지: 불일치 많은 아티스트 먼저, 나머지는 추가된 순서
+    bad_artists = sorted(table.artist_mismatches, key=table.artist_mismatches.get, reverse=True)
+    ok_artists = [a for a in table.artists() if a not in table.artist_mismatches]
+
+    def artist_label(a):
+        if a is None:
+            return "(전체 아티스트)"
+        n = table.artist_mismatches.get(a)
+        return f"{a} (불일치 {n:,})" if n else str(a)
+
+    col_artist, col_filter, col_size = st.columns([3, 2, 1])
+    artist = col_artist.selectbox("아티스트", [None] + bad_artists + ok_artists,
+                                  format_func=artist_label, key=f"verify_artist_{title}")
+    mismatches_only = col_filter.checkbox("불일치 행만 보기", value=table.mismatches > 0,
+                                          key=f"verify_bad_only_{title}")
+    page_size = col_size.selectbox("페이지당 행 수", VERIFY_PAGE_SIZES, index=1, key=f"verify_page_size_{title}")
+
+    rows = table.select(artist, mismatches_only)
+    if not len(rows):
+        if mismatches_only:
+            st.success("불일치 행이 없습니다.")
         else:
-            df = pd.DataFrame(rows)
-            bool_cols = [c for c in df.columns if c.startswith("match_")]
-
-            def highlight_boolean(val):
-                if val is True:
-                    return "background-color: #AAFFAA"
-                elif val is False:
-                    return "background-color: #FFAAAA"
-                else:
-                    return ""
+            st.info("조건에 맞는 행이 없습니다.")
+        return
+    pages = math.ceil(len(rows) / page_size)
+    # 필터가 바뀌면 페이지 입력도 새로 (이전 페이지 번호가 범위를 넘지 않도록 key에 필터 포함)
+    page = st.number_input(f"페이지 (1~{pages:,})", min_value=1, max_value=pages, value=1, step=1,
+                           key=f"verify_page_{title}_{artist}_{mismatches_only}_{page_size}")
+    start = (int(page) - 1) * page_size
+    page_rows = rows[start:start + page_size]
+    st.caption(f"{len(rows):,}행 중 {start + 1:,}~{start + len(page_rows):,}행 (불일치 행 먼저)")
 
-            int_columns = ["원본_매출액", "정산서_매출액"]
-            format_dict = {col: "{:.0f}" for col in int_columns if col in df.columns}
+    df = table.take(page_rows)
+    match_col = table.columns[-1]
+
+    def highlight_boolean(val):
+        return "background-color: #AAFFAA" if val else "background-color: #FFAAAA"
+
+    styler = df.style.format({col: "{:,.2f}" for col in table.columns[-3:-1]})
+    # Styler.applymap은 pandas 2.1에서 map으로 이름이 바뀜
+    style_map = getattr(styler, "map", None) or styler.applymap
+    st.dataframe(style_map(highlight_boolean, subset=[match_col]))
+
+
+# --------------------------------------------------
+# 공통 스타일 레지스트리
+# --------------------------------------------------
+#   모든 렌더러가 아래의 Font/Fill/Border/Alignment 객체를 공유한다.
+#   apply_style()은 워크북마다 스타일 조합을 처음 한 번만 스타일 테이블에 등록하고,
+#   그 다음부터는 등록된 style id 묶음(StyleArray)을 셀에 복사해서 붙이기만 함.
+@lru_cache(maxsize=None)
+def cell_styles():
+    """스타일명 → {"font"/"fill"/"border"/"alignment": 객체}. 처음 호출할 때 한 번만 생성."""
+    from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
+
+    dotted_side = Side(style="dotted", color="000000")
+    thin_side = Side(style="thin", color="000000")
+    dotted_border = Border(top=dotted_side, bottom=dotted_side, left=dotted_side, right=dotted_side)
+    thin_border = Border(top=thin_side, left=thin_side, right=thin_side, bottom=thin_side)
+
+    bold_font = Font(bold=True)
+    center = Alignment(horizontal="center", vertical="center")
+    center_h = Alignment(horizontal="center")
+    right = Alignment(horizontal="right", vertical="center")
+
+    report_header_fill = PatternFill("solid", fgColor="4CD9E0")  # 헤더
+    report_even_fill = PatternFill("solid", fgColor="FFFFFF")    # 짝수줄
+    report_odd_fill = PatternFill("solid", fgColor="E5FCFF")     # 홀수줄
+    report_sum_fill = PatternFill("solid", fgColor="E5FCFF")
+    detail_header_fill = PatternFill("solid", fgColor="FFC000")
+    detail_sum_fill = PatternFill("solid", fgColor="FFD966")
+
+    return {
+        # 정산서 (섹션 1~4)
+        "report_title": {"font": Font(bold=True, size=12)},
+        "report_header": {"fill": report_header_fill, "font": bold_font, "alignment": center, "border": dotted_border},
+        "report_header_h": {"fill": report_header_fill, "font": bold_font, "alignment": center_h, "border": dotted_border},
+        "report_even": {"fill": report_even_fill, "alignment": center, "border": dotted_border},
+        "report_odd": {"fill": report_odd_fill, "alignment": center, "border": dotted_border},
+        "report_even_h": {"fill": report_even_fill, "alignment": center_h, "border": dotted_border},
+        "report_odd_h": {"fill": report_odd_fill, "alignment": center_h, "border": dotted_border},
+        "report_sum": {"fill": report_sum_fill, "font": bold_font, "alignment": center, "border": dotted_border},
+        "report_sum_h": {"fill": report_sum_fill, "font": bold_font, "alignment": center_h, "border": dotted_border},
+        "report_heading": {"font": Font(size=14, bold=True, color="000000"), "alignment": center},
+        "thin_border": {"border": thin_border},
+
+        # 세부매출내역
+        "detail_header": {"fill": detail_header_fill, "font": bold_font, "alignment": center, "border": thin_border},
+        "detail_body": {"alignment": right, "border": thin_border},
+        "detail_sum_label": {"fill": detail_sum_fill, "font": bold_font, "alignment": center, "border": thin_border},
+        "detail_sum_value": {"fill": detail_sum_fill, "font": bold_font, "alignment": right, "border": thin_border},
+        # 병합된 B~F: merge_cells가 MergedCell에 남기는 바깥쪽 테두리만
+        "detail_sum_merged": {"border": Border(top=thin_side, bottom=thin_side)},
+        "detail_sum_merged_end": {"border": Border(top=thin_side, bottom=thin_side, right=thin_side)},
+
+        # (간단 버전) create_detail_workbook
+        "simple_header": {"font": Font(bold=True, color="FFFFFF"), "fill": PatternFill("solid", fgColor="4CAF50"), "alignment": center},
+        "simple_sum_label": {"alignment": center_h},
+        "simple_sum_value": {"font": Font(bold=True, color="000000"), "fill": detail_sum_fill},
+    }
+
+
+# Workbook → {(스타일명, 적용 전 style id 묶음): 적용 후 style id 묶음}
+_STYLE_IDS = weakref.WeakKeyDictionary()
+
+
+def apply_style(cell, name):
+    """
+    cell_styles()[name]을 cell에 적용 (일반 셀 / MergedCell / WriteOnlyCell 모두 가능).
+
+    셀의 기존 스타일 위에 덧씌우는 것과 결과가 같으며,
+    같은 워크북에서 같은 조합이 다시 나오면 Font/Fill 등을 다시 해시/등록하지 않고
+    캐시된 style id 묶음만 복사한다.
+    """
+    wb = cell.parent.parent
+    cache = _STYLE_IDS.get(wb)
+    if cache is None:
+        cache = _STYLE_IDS[wb] = {}
+
+    key = (name, tuple(cell._style or ()))  # 새 셀은 _style이 None
+    style_ids = cache.get(key)
+    if style_ids is None:
+        for attr, value in cell_styles()[name].items():
+            setattr(cell, attr, value)
+        cache[key] = copy(cell._style)
+    else:
+        cell._style = copy(style_ids)
 
-            st.dataframe(
-                df.style
-                  .format(format_dict)
-                  .applymap(highlight_boolean, subset=bool_cols)
-            )
 
 # --------------------------------------------------
-# 정산서 스타일
+# 정산서 섹션별 값 기록
 # --------------------------------------------------
-def write_service_table(ws, start_row, service_list):
+def write_service_table(ws, start_row, service_rows):
     """
     (1) 음원 서비스별 정산내역 작성
 
     인자:
       - ws: openpyxl Worksheet
       - start_row: 섹션을 시작할 엑셀 행(1-based)
-      - service_list: [
-          {"album":..., "major":..., "middle":..., "service":..., "year":..., "month":..., "revenue":...},
-          ...
-        ]
+      - service_rows: {"rows": ArtistRows, "year":..., "month":...}
 
     반환:
       dict = {
@@ -266,22 +950,22 @@ def write_service_table(ws, start_row, service_list):
     # (C) 데이터
     data_start = header_row + 1
     r = data_start
-    for item in service_list:
-        ws.cell(row=r, column=2, value=item.get("album",""))
-        ws.cell(row=r, column=3, value=item.get("major",""))
-        ws.cell(row=r, column=4, value=item.get("middle",""))
-        ws.cell(row=r, column=5, value=item.get("service",""))
-        year_str  = str(item.get("year","2024"))
-        month_str = str(item.get("month","12"))
-        ws.cell(row=r, column=6, value=f"{year_str}년 {month_str}월")
-        ws.cell(row=r, column=7, value=item.get("revenue",0.0))
+    rows = service_rows["rows"]
+    period = f"{service_rows['year']}년 {service_rows['month']}월"
+    for album, major, middle, service, revenue in rows.rows():
+        ws.cell(row=r, column=2, value=album)
+        ws.cell(row=r, column=3, value=major)
+        ws.cell(row=r, column=4, value=middle)
+        ws.cell(row=r, column=5, value=service)
+        ws.cell(row=r, column=6, value=period)
+        ws.cell(row=r, column=7, value=revenue)
         r += 1
     data_end = r - 1
 
     # (D) 합계행
     sum_row = data_end + 1
     ws.cell(row=sum_row, column=2, value="합계")
-    total_val = sum(x.get("revenue",0.0) for x in service_list)
+    total_val = sum(rows.revenues)
     ws.cell(row=sum_row, column=7, value=total_val)
 
     next_start_row = sum_row + 2  # 다음 섹션은 합계행 + 1~2행 띄우고 시작
@@ -296,75 +980,6 @@ def write_service_table(ws, start_row, service_list):
     }
 
 
-def style_service_table(ws, info):
-    """
-    (1) 음원 서비스별 정산내역 스타일 적용
-
-    info = {
-      "section_title_row": ...,
-      "header_row": ...,
-      "data_start": ...,
-      "data_end": ...,
-      "sum_row": ...,
-      ...
-    }
-    """
-
-    dotted_side = Side(style="dotted", color="000000")
-    header_bg = PatternFill("solid", fgColor="4CD9E0")  # 헤더
-    band_e = "FFFFFF"  # 짝수줄
-    band_o = "E5FCFF"  # 홀수줄
-    sum_fill = PatternFill("solid", fgColor="E5FCFF")
-
-    # 섹션 헤더(제목)은 row=info["section_title_row"], col=2
-    # 원한다면 스타일 지정 가능
-    title_row = info["section_title_row"]
-    cell_title = ws.cell(row=title_row, column=2)
-    cell_title.font = Font(bold=True, size=12)
-
-    # 1) 헤더
-    hr = info["header_row"]
-    for c in range(2, 8):
-        cell = ws.cell(row=hr, column=c)
-        cell.fill = header_bg
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-        cell.border = Border(top=dotted_side, bottom=dotted_side,
-                             left=dotted_side, right=dotted_side)
-
-    # 2) 본문 (data_start ~ data_end)
-    ds = info["data_start"]
-    de = info["data_end"]
-    for r in range(ds, de+1):
-        offset = r - ds
-        row_fill = band_e if (offset % 2 == 0) else band_o
-        for c in range(2, 8):
-            cell = ws.cell(row=r, column=c)
-            cell.fill = PatternFill("solid", fgColor=row_fill)
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-            cell.border = Border(top=dotted_side, bottom=dotted_side,
-                                 left=dotted_side, right=dotted_side)
-
-    # 3) 합계행
-    sr = info["sum_row"]
-    # B~F 병합, G 따로
-    ws.merge_cells(start_row=sr, start_column=2, end_row=sr, end_column=6)
-    for c in range(2, 7):
-        cell = ws.cell(row=sr, column=c)
-        cell.fill = sum_fill
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-        cell.border = Border(top=dotted_side, bottom=dotted_side,
-                             left=dotted_side, right=dotted_side)
-
-    cell_g = ws.cell(row=sr, column=7)
-    cell_g.fill = sum_fill
-    cell_g.font = Font(bold=True)
-    cell_g.alignment = Alignment(horizontal="center", vertical="center")
-    cell_g.border = Border(top=dotted_side, bottom=dotted_side,
-                           left=dotted_side, right=dotted_side)
-
-
 def write_album_table(ws, start_row, album_list):
     """
     (2) 앨범별 정산 내역
@@ -408,65 +1023,6 @@ def write_album_table(ws, start_row, album_list):
     }
 
 
-def style_album_table(ws, info):
-    """
-    (2) 앨범별 정산 내역 스타일
-    """
-
-    dotted_side = Side(style="dotted", color="000000")
-    header_bg = PatternFill("solid", fgColor="4CD9E0")
-    band_e = "FFFFFF"
-    band_o = "E5FCFF"
-    sum_fill = PatternFill("solid", fgColor="E5FCFF")
-
-    # 섹션 제목
-    cell_title = ws.cell(row=info["section_title_row"], column=2)
-    cell_title.font = Font(bold=True, size=12)
-
-    # 헤더
-    hr = info["header_row"]
-    for c in [2,6,7]:
-        cell = ws.cell(row=hr, column=c)
-        cell.fill = header_bg
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-        cell.border = Border(left=dotted_side, right=dotted_side,
-                             top=dotted_side, bottom=dotted_side)
-
-    # 데이터
-    ds = info["data_start"]
-    de = info["data_end"]
-    for r in range(ds, de+1):
-        offset = r - ds
-        row_fill = band_e if (offset % 2 == 0) else band_o
-
-        for c in [2,6,7]:
-            cell = ws.cell(row=r, column=c)
-            cell.fill = PatternFill("solid", fgColor=row_fill)
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-            cell.border = Border(left=dotted_side, right=dotted_side,
-                                 top=dotted_side, bottom=dotted_side)
-
-    # 합계행
-    sr = info["sum_row"]
-    # B~F 병합? -> 여기선 B6~B6..(?) 구조가 다르므로
-    # 예시로 "B~F" 대신 "B~F"는 사실 안 쓰는 컬럼이 있을 수 있음
-    ws.merge_cells(start_row=sr, start_column=2, end_row=sr, end_column=6)
-    for c in range(2, 7):
-        cell = ws.cell(row=sr, column=c)
-        cell.fill = sum_fill
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal="center")
-        cell.border = Border(left=dotted_side, right=dotted_side,
-                             top=dotted_side, bottom=dotted_side)
-
-    cell_g = ws.cell(row=sr, column=7)
-    cell_g.fill = sum_fill
-    cell_g.font = Font(bold=True)
-    cell_g.alignment = Alignment(horizontal="center")
-    cell_g.border = Border(left=dotted_side, right=dotted_side,
-                           top=dotted_side, bottom=dotted_side)
-
 def write_deduction_table(ws, start_row, ded_list):
     """
     (3) 공제 내역
@@ -509,36 +1065,6 @@ def write_deduction_table(ws, start_row, ded_list):
         "next_start_row": next_start_row
     }
 
-def style_deduction_table(ws, info):
-
-    dotted_side = Side(style="dotted", color="000000")
-    header_bg = PatternFill("solid", fgColor="4CD9E0")
-    band_e = "FFFFFF"
-    band_o = "E5FCFF"
-
-    # 제목
-    ws.cell(row=info["section_title_row"], column=2).font = Font(bold=True, size=12)
-
-    hr = info["header_row"]
-    for c in [2,3,4,6,7]:
-        cell = ws.cell(row=hr, column=c)
-        cell.fill = header_bg
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-        cell.border = Border(left=dotted_side, right=dotted_side,
-                             top=dotted_side, bottom=dotted_side)
-
-    ds = info["data_start"]
-    de = info["data_end"]
-    for r in range(ds, de+1):
-        offset = r - ds
-        row_fill = band_e if (offset % 2 == 0) else band_o
-        for c in [2,3,4,5,6,7]:
-            cell = ws.cell(row=r, column=c)
-            cell.fill = PatternFill("solid", fgColor=row_fill)
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-            cell.border = Border(left=dotted_side, right=dotted_side,
-                                 top=dotted_side, bottom=dotted_side)
 
 def write_rate_table(ws, start_row, rate_list):
     """
@@ -582,475 +1108,2717 @@ def write_rate_table(ws, start_row, rate_list):
         "next_start_row": next_start_row
     }
 
-def style_rate_table(ws, info):
+# --------------------------------------------------
+# 정산서 골격 (프로세스당 한 번 생성해서 아티스트마다 복사)
+# --------------------------------------------------
+# 정산서 행 종류 → {열: 스타일명}. 모든 행의 A~H열에는 thin 테두리가 덧씌워짐
+REPORT_ROW_STYLES = {
+    "blank": {},
+    "title": {2: "report_title"},
+    "service_header": dict.fromkeys(range(2, 8), "report_header"),
+    "service_even": dict.fromkeys(range(2, 8), "report_even"),
+    "service_odd": dict.fromkeys(range(2, 8), "report_odd"),
+    "service_sum": dict.fromkeys(range(2, 8), "report_sum"),
+    "album_header": dict.fromkeys((2, 6, 7), "report_header"),
+    "album_even": dict.fromkeys((2, 6, 7), "report_even"),
+    "album_odd": dict.fromkeys((2, 6, 7), "report_odd"),
+    "album_sum": dict.fromkeys(range(2, 8), "report_sum_h"),
+    "deduction_header": dict.fromkeys((2, 3, 4, 6, 7), "report_header"),
+    "deduction_even": dict.fromkeys(range(2, 8), "report_even"),
+    "deduction_odd": dict.fromkeys(range(2, 8), "report_odd"),
+    "rate_header": dict.fromkeys((2, 3, 4, 7), "report_header_h"),
+    "rate_even": dict.fromkeys(range(2, 8), "report_even_h"),
+    "rate_odd": dict.fromkeys(range(2, 8), "report_odd_h"),
+    "rate_sum": dict.fromkeys(range(2, 8), "report_sum_h"),
+}
+REPORT_COLUMNS = range(1, 9)      # A~H
+REPORT_BORDER_EXTRA_ROWS = 9      # 마지막 섹션 뒤로 테두리를 더 그리는 행 수
+REPORT_COLUMN_WIDTHS = {"A": 5, "B": 25, "C": 16, "D": 15, "E": 16, "F": 16, "G": 16, "H": 5}
+
+# 아티스트 워크북으로 복사하는 스타일 테이블
+REPORT_STYLE_TABLES = ("_fonts", "_fills", "_borders", "_alignments", "_number_formats", "_protections")
+
+
+@lru_cache(maxsize=None)
+def report_template():
+    """
+    정산서 골격: {"wb": 스타일이 등록된 워크북, "rows": {행 종류: [A~H열 StyleArray]}}
 
-    dotted_side = Side(style="dotted", color="000000")
-    header_bg = PatternFill("solid", fgColor="4CD9E0")
-    band_e = "FFFFFF"
-    band_o = "E5FCFF"
-    sum_fill = PatternFill("solid", fgColor="E5FCFF")
-
-    ws.cell(row=info["section_title_row"], column=2).font = Font(bold=True, size=12)
-
-    hr = info["header_row"]
-    for c in [2,3,4,7]:
-        cell = ws.cell(row=hr, column=c)
-        cell.fill = header_bg
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal="center")
-        cell.border = Border(left=dotted_side, right=dotted_side,
-                             top=dotted_side, bottom=dotted_side)
-
-    ds = info["data_start"]
-    de = info["data_end"]
-    for r in range(ds, de+1):
-        offset = r - ds
-        row_fill = band_e if (offset % 2 == 0) else band_o
-        for c in [2,3,4,5,6,7]:
-            cell = ws.cell(row=r, column=c)
-            cell.fill = PatternFill("solid", fgColor=row_fill)
-            cell.alignment = Alignment(horizontal="center")
-            cell.border = Border(left=dotted_side, right=dotted_side,
-                                 top=dotted_side, bottom=dotted_side)
-
-    # 합계행
-    sr = info["sum_row"]
-    ws.merge_cells(start_row=sr, start_column=2, end_row=sr, end_column=6)
-    for c in range(2, 7):
-        cell = ws.cell(row=sr, column=c)
-        cell.fill = sum_fill
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal="center")
-        cell.border = Border(left=dotted_side, right=dotted_side,
-                             top=dotted_side, bottom=dotted_side)
-
-    cell_g = ws.cell(row=sr, column=7)
-    cell_g.fill = sum_fill
-    cell_g.font = Font(bold=True)
-    cell_g.alignment = Alignment(horizontal="center")
-    cell_g.border = Border(left=dotted_side, right=dotted_side,
-                           top=dotted_side, bottom=dotted_side)
-
-def create_report_excel(artist, service_list, album_list, deduction_list, rate_list):
-    wb = openpyxl.Workbook()
+    각 StyleArray는 셀에 역할 스타일 → thin 테두리를 차례로 적용한 최종 결과이므로,
+    아티스트마다 셀 단위로 Font/Border 등을 만들지 않고 style id 묶음만 복사하면 된다.
+    """
+    from openpyxl import Workbook
+    from openpyxl.cell import Cell
+
+    wb = Workbook()
     ws = wb.active
-    
-    safe_artist = sanitize_sheet_title(artist)
-    ws.title = f"{safe_artist}(정산서)"[:31]  # 31자 제한 고려
+    rows = {}
+    for kind, roles in REPORT_ROW_STYLES.items():
+        styles = []
+        for col in REPORT_COLUMNS:
+            cell = Cell(ws)
+            if col in roles:
+                apply_style(cell, roles[col])
+            apply_style(cell, "thin_border")
+            styles.append(cell._style)
+        rows[kind] = styles
+    return {"wb": wb, "rows": rows}
+
+
+def copy_indexed_list(src):
+    """
+    openpyxl IndexedList 사본. IndexedList(src)는 항목(Font 등)을 모두 다시 해시하므로
+    (openpyxl 스타일 객체의 해시는 꽤 비쌈) 값 → 위치 dict를 그대로 복사한다.
+    """
+    from openpyxl.utils.indexed_list import IndexedList
+
+    dst = IndexedList()
+    list.extend(dst, src)
+    dst._dict = dict(src._dict)
+    return dst
 
-    # 1) 음원 서비스별
-    row_cursor = 12
-    info_service = write_service_table(ws, row_cursor, service_list)
-    style_service_table(ws, info_service)
-    row_cursor = info_service["next_start_row"]
-
-    # 2) 앨범별
-    info_album = write_album_table(ws, row_cursor, album_list)
-    style_album_table(ws, info_album)
-    row_cursor = info_album["next_start_row"]
-
-    # 3) 공제 내역
-    info_ded = write_deduction_table(ws, row_cursor, deduction_list)
-    style_deduction_table(ws, info_ded)
-    row_cursor = info_ded["next_start_row"]
-
-    # 4) 수익 배분
-    info_rate = write_rate_table(ws, row_cursor, rate_list)
-    style_rate_table(ws, info_rate)
-    row_cursor = info_rate["next_start_row"]
-
-    # 전체 외곽 테두리, 열너비 등
-    thin_side = Side(style="thin", color="000000")
-    for r in range(1, row_cursor+10):
-        for c in range(1, 9):
-            cell = ws.cell(row=r, column=c)
-            cell.border = Border(
-                top=thin_side, left=thin_side,
-                right=thin_side, bottom=thin_side
-            )
 
-    ws.column_dimensions["A"].width = 5
-    ws.column_dimensions["B"].width = 25
-    ws.column_dimensions["C"].width = 16
-    ws.column_dimensions["D"].width = 15
-    ws.column_dimensions["E"].width = 16
-    ws.column_dimensions["F"].width = 16
-    ws.column_dimensions["G"].width = 16
-    ws.column_dimensions["H"].width = 5
+def new_report_workbook():
+    """골격의 스타일 테이블을 그대로 복사한 빈 워크북 (골격의 style id가 그대로 유효)."""
+    from openpyxl import Workbook
 
+    template_wb = report_template()["wb"]
+    wb = Workbook()
+    for attr in REPORT_STYLE_TABLES:
+        setattr(wb, attr, copy_indexed_list(getattr(template_wb, attr)))
     return wb
 
 
+def style_report_rows(ws, sections, last_row):
+    """
+    sections = [(섹션 이름, write_*_table 반환 info), ...] 기준으로
+    1~last_row 행에 행 종류별 골격 스타일을 복사하고, 합계행은 B~F 병합.
 
-# --------------------------------------------------
-# 세부매출내역 데이터 및 스타일
-# --------------------------------------------------
-def write_detail_data(ws, detail_list, start_row=1):
+    ws.merge_cells와 결과는 같지만, 병합 영역 테두리 계산(MergedCellRange.format)은
+    어차피 골격 스타일로 덮어쓰므로 건너뛰고 MergedCell을 바로 만든다.
     """
-    세부매출내역 시트에 'detail_list' 데이터를 써넣고,
-    헤더/본문/합계행의 "행 번호"를 반환.
+    from openpyxl.cell import Cell, MergedCell
+    from openpyxl.worksheet.merge import MergedCellRange
+
+    kinds = ["blank"] * (last_row + 1)
+    merged = set()
+    for name, info in sections:
+        kinds[info["section_title_row"]] = "title"
+        kinds[info["header_row"]] = f"{name}_header"
+        ds = info["data_start"]
+        for r in range(ds, info["data_end"] + 1):
+            kinds[r] = f"{name}_even" if ((r - ds) % 2 == 0) else f"{name}_odd"
+        if f"{name}_sum" in REPORT_ROW_STYLES:
+            sr = info["sum_row"]
+            kinds[sr] = f"{name}_sum"
+            ws.merged_cells.add(MergedCellRange(ws, f"B{sr}:F{sr}"))
+            merged.update((sr, c) for c in range(3, 7))
+
+    rows = report_template()["rows"]
+    cells = ws._cells
+    for r in range(1, last_row + 1):
+        for col, style in zip(REPORT_COLUMNS, rows[kinds[r]]):
+            if (r, col) in merged:
+                cell = cells[r, col] = MergedCell(ws, r, col)
+                cell._style = copy(style)
+                continue
+            cell = cells.get((r, col))
+            if cell is None:
+                cells[r, col] = Cell(ws, row=r, column=col, style_array=style)
+            else:
+                cell._style = copy(style)
 
-    detail_list: [{"albumArtist":..., "album":..., "major":..., "middle":..., "service":..., "revenue":...}, ...]
 
-    반환 예시:
-      {
-        "header_row": 1,
-        "data_start": 2,
-        "data_end": 8,
-        "sum_row": 9,
-      }
-    """
-    # 1) 헤더 (start_row에 작성)
-    ws.cell(row=start_row, column=1, value="앨범아티스트")
-    ws.cell(row=start_row, column=2, value="앨범명")
-    ws.cell(row=start_row, column=3, value="대분류")
-    ws.cell(row=start_row, column=4, value="중분류")
-    ws.cell(row=start_row, column=5, value="서비스명")
-    ws.cell(row=start_row, column=6, value="기간")
-    ws.cell(row=start_row, column=7, value="매출 순수익")
+def create_report_excel(artist, service_rows, album_list, deduction_list, rate_list):
+    wb = new_report_workbook()
+    ws = wb.active
 
-    # 2) 본문
-    data_start = start_row + 1
-    r = data_start
-    for d in detail_list:
-        ws.cell(row=r, column=1, value=d.get("aartist", ""))
-        ws.cell(row=r, column=2, value=d.get("album", ""))
-        ws.cell(row=r, column=3, value=d.get("major", ""))
-        ws.cell(row=r, column=4, value=d.get("middle", ""))
-        ws.cell(row=r, column=5, value=d.get("service", ""))
-        ws.cell(row=r, column=6, value=f"{d.get('year','2024')}년 {d.get('month','12')}월")
-        ws.cell(row=r, column=7, value=d.get("revenue", 0.0))
-        r += 1
-    data_end = r - 1  # 실제 마지막 데이터 행
+    safe_artist = sanitize_sheet_title(artist)
+    ws.title = f"{safe_artist}(정산서)"[:31]  # 31자 제한 고려
 
-    # 3) 합계행
-    sum_row = data_end + 1
-    ws.cell(row=sum_row, column=1, value="합계")
-    # (단일 셀에 "합계" 쓰고, 7번 칸에 total)
-    total_val = sum(d["revenue"] for d in detail_list)
-    ws.cell(row=sum_row, column=7, value=total_val)
+    # 1) 음원 서비스별 → 2) 앨범별 → 3) 공제 내역 → 4) 수익 배분 (값만 기록)
+    row_cursor = 12
+    sections = []
+    for name, write_table, items in (
+        ("service", write_service_table, service_rows),
+        ("album", write_album_table, album_list),
+        ("deduction", write_deduction_table, deduction_list),
+        ("rate", write_rate_table, rate_list),
+    ):
+        info = write_table(ws, row_cursor, items)
+        sections.append((name, info))
+        row_cursor = info["next_start_row"]
+
+    # 스타일 + 전체 테두리는 골격에서 복사, 열너비
+    style_report_rows(ws, sections, row_cursor + REPORT_BORDER_EXTRA_ROWS)
+    for col, width in REPORT_COLUMN_WIDTHS.items():
+        ws.column_dimensions[col].width = width
 
-    return {
-        "header_row": start_row,
-        "data_start": data_start,
-        "data_end": data_end,
-        "sum_row": sum_row
-    }
+    return wb
 
 
-def apply_detail_style(ws, header_row, data_start, data_end, sum_row):
-    """
-    세부매출내역: 
-      - 헤더 행: 주황(또는 노랑) 배경 + 굵은폰트
-      - 본문(데이터): 검정 실선 테두리
-      - 합계행: 연한 노랑 배경 + 굵은폰트
-      - 전체 테두리는 thin(검정 실선)
+# --------------------------------------------------
+# 세부매출내역 데이터 및 스타일
+# --------------------------------------------------
+DETAIL_HEADERS = ["앨범아티스트", "앨범명", "대분류", "중분류", "서비스명", "기간", "매출 순수익"]
+DETAIL_COLUMN_WIDTHS = {"A": 20, "B": 20, "C": 15, "D": 15, "E": 15, "F": 15, "G": 15}
+# 본문 A열(앨범아티스트) / F열(기간)은 행 dict에 aartist / year / month가 없어 늘 기본값으로 적혀 왔음 (출력 유지)
+DETAIL_ARTIST_CELL = ""
+DETAIL_PERIOD_CELL = "2024년 12월"
+
+
+def write_detail_rows(ws, detail_list):
     """
+    세부매출내역 시트(write-only)에 헤더 → 본문 → 합계행을 한 행씩 append.
 
-    thin_side = Side(style="thin", color="000000")
-    thin_border = Border(top=thin_side, left=thin_side, right=thin_side, bottom=thin_side)
+    detail_list: ArtistRows (album / major / middle / service / revenue 컬럼)
 
-    # 1) 헤더 행
-    header_fill = PatternFill("solid", fgColor="FFC000")
-    for col in range(1, 8):  # A~G
-        cell = ws.cell(row=header_row, column=col)
-        cell.fill = header_fill
-        cell.font = Font(bold=True)
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-        cell.border = thin_border
-
-    # 2) 본문 데이터 (data_start ~ data_end)
-    for row in range(data_start, data_end+1):
-        for col in range(1, 8):
-            cell = ws.cell(row=row, column=col)
-            cell.alignment = Alignment(horizontal="right", vertical="center")
-            cell.border = thin_border
-
-    # 3) 합계행
-    sum_fill = PatternFill("solid", fgColor="FFD966")
-    for col in range(1, 8):
-        cell = ws.cell(row=sum_row, column=col)
-        cell.border = thin_border
-        if col == 1:
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-        elif col == 7:
-            cell.alignment = Alignment(horizontal="right", vertical="center")
-        else:
-            cell.alignment = Alignment(horizontal="center", vertical="center")
+    스타일:
+      - 헤더 행: 주황 배경 + 굵은폰트 + 가운데 정렬
+      - 본문(데이터): 오른쪽 정렬
+      - 합계행: A(합계)/G(금액)만 연한 노랑 배경 + 굵은폰트, A~F 병합
+      - 전체 테두리는 thin(검정 실선)
 
-        if col in (1, 7):
-            # 합계 텍스트와 금액만 색/굵게
-            cell.fill = sum_fill
-            cell.font = Font(bold=True)
-    # A~F 병합
-    ws.merge_cells(start_row=sum_row, start_column=1, end_row=sum_row, end_column=6)
+    반환: 합계행 번호
+    """
+    from openpyxl.cell import WriteOnlyCell
 
+    def styled(value, name):
+        cell = WriteOnlyCell(ws, value=value)
+        apply_style(cell, name)
+        return cell
 
+    # 1) 헤더
+    ws.append([styled(h, "detail_header") for h in DETAIL_HEADERS])
 
+    # 2) 본문
+    for album, major, middle, service, revenue in detail_list.rows():
+        ws.append([
+            styled(DETAIL_ARTIST_CELL, "detail_body"),
+            styled(album, "detail_body"),
+            styled(major, "detail_body"),
+            styled(middle, "detail_body"),
+            styled(service, "detail_body"),
+            styled(DETAIL_PERIOD_CELL, "detail_body"),
+            styled(revenue, "detail_body"),
+        ])
 
-    # (열너비 등)
-    ws.column_dimensions["A"].width = 20
-    ws.column_dimensions["B"].width = 20
-    ws.column_dimensions["C"].width = 15
-    ws.column_dimensions["D"].width = 15
-    ws.column_dimensions["E"].width = 15
-    ws.column_dimensions["F"].width = 15
-    ws.column_dimensions["G"].width = 15
+    # 3) 합계행: A~F 병합
+    #   병합된 B~F는 값/채우기 없이, 병합 영역 바깥쪽 테두리만 남김
+    #   (일반 모드에서 merge_cells가 MergedCell에 남기는 것과 동일)
+    sum_row = len(detail_list) + 2
+    total_val = sum(detail_list.revenues)
+    ws.append(
+        [styled("합계", "detail_sum_label")]
+        + [styled(None, "detail_sum_merged") for _ in range(4)]
+        + [styled(None, "detail_sum_merged_end")]
+        + [styled(total_val, "detail_sum_value")]
+    )
+    ws.merged_cells.add(f"A{sum_row}:F{sum_row}")
+    return sum_row
 
 
 def create_detail_excel(artist, ym, detail_list):
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    
-    safe_artist = sanitize_sheet_title(artist)
-    ws.title = f"{safe_artist}(세부매출내역)"[:31]  # 31자 제한 고려
+    """
+    artist의 세부매출내역 Workbook을 openpyxl write-only 모드로 생성.
 
-    out_info = write_detail_data(ws, detail_list, start_row=1)
+    셀을 한 행씩 스트림에 흘려보내므로 행 수와 관계없이 메모리가 일정함.
+    write-only Workbook은 save()를 한 번만 호출할 수 있음.
+    """
+    from openpyxl import Workbook
 
-    apply_detail_style(
-        ws,
-        header_row=out_info["header_row"],
-        data_start=out_info["data_start"],
-        data_end=out_info["data_end"],
-        sum_row=out_info["sum_row"]
-    )
+    wb = Workbook(write_only=True)
+    safe_artist = sanitize_sheet_title(artist)
+    ws = wb.create_sheet(f"{safe_artist}(세부매출내역)"[:31])  # 31자 제한 고려
+
+    # 열너비는 첫 행을 쓰기 전에 지정해야 함
+    for col, width in DETAIL_COLUMN_WIDTHS.items():
+        ws.column_dimensions[col].width = width
 
-    filename = f"{artist}_세부매출.xlsx"
-    wb.save(filename)
+    write_detail_rows(ws, detail_list)
     return wb  # Workbook 객체 반환 (ZIP으로 저장 시 사용)
 
 
 # --------------------------------------------------
-# 보고서 생성 (엑셀 기반)
+# 세부매출내역 직접 작성 백엔드 (SpreadsheetML을 문자열로 바로 기록)
 # --------------------------------------------------
-def generate_report_excel(ym, report_date, file_song_cost, file_online_revenue, check_dict):
+#   세부매출내역은 열 7개 + 스타일 6개로 고정된 표라서, 셀마다 openpyxl 객체를 만들지 않고
+#   sheet1.xml / sharedStrings.xml 을 문자열로 바로 흘려 씀.
+#   styles.xml 등 나머지 부분은 openpyxl로 빈 세부매출내역을 한 번 저장해서 그대로 가져오므로
+#   열어 보면 openpyxl 백엔드와 셀 값/스타일/병합/열너비가 같음.
+NATIVE_SHEET_TITLE = "__detail_sheet__"  # 템플릿 workbook.xml의 시트명 자리
+NATIVE_ROWS_PER_CHUNK = 1000             # sheet1.xml에 한 번에 write 하는 행 수
+DETAIL_STYLE_ROLES = ("detail_header", "detail_body", "detail_sum_label",
+                      "detail_sum_merged", "detail_sum_merged_end", "detail_sum_value")
+SHARED_STRINGS_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"
+SHARED_STRINGS_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings"
+SHEET_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+
+
+@lru_cache(maxsize=None)
+def native_detail_parts():
     """
-    업로드된 두 엑셀 파일(file_song_cost, file_online_revenue)을 openpyxl로 파싱 →
-    아티스트별로:
-      1) 세부매출내역(artist).xlsx
-      2) 정산서(artist).xlsx
-    을 각각 생성, ZIP으로 묶어 반환 (bytes).
+    빈 세부매출내역(write-only, 열너비 + 스타일 6개 등록)을 openpyxl로 한 번 저장해서 고정 부분을 얻음.
 
-    - ym: "YYYYMM"
-    - report_date: "YYYY-MM-DD"
-    - file_song_cost: 업로드된 엑셀( song cost.xlsx )
-    - file_online_revenue: 업로드된 엑셀( online revenue.xlsx )
-    - check_dict: 검증용 딕셔너리 (실제 계산/비교 결과를 저장)
-
-    반환: zip(bytes) or None
+    반환: {"static": {ZIP 항목명: bytes}, "workbook": 시트명 자리가 있는 workbook.xml,
+           "sheet_head"/"sheet_tail": sheetData 앞/뒤, "style_ids": {스타일명: cellXfs 번호}}
     """
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(NATIVE_SHEET_TITLE)
+    for col, width in DETAIL_COLUMN_WIDTHS.items():
+        ws.column_dimensions[col].width = width
+    style_ids = {}
+    for name in DETAIL_STYLE_ROLES:
+        cell = WriteOnlyCell(ws)
+        apply_style(cell, name)
+        style_ids[name] = wb._cell_styles.add(cell._style)
+
+    buf = io.BytesIO()
+    wb.save(buf)
+    with zipfile.ZipFile(buf) as zf:
+        static = {name: zf.read(name) for name in zf.namelist()}
+
+    head, tail = static.pop("xl/worksheets/sheet1.xml").decode("utf-8").split("<sheetData></sheetData>")
+    # write-only 저장에는 sharedStrings가 없으므로 (문자열은 inlineStr) 관계/형식 선언을 추가
+    rels = static["xl/_rels/workbook.xml.rels"].decode("utf-8")
+    rel_id = f"rId{rels.count('<Relationship ') + 1}"
+    static["xl/_rels/workbook.xml.rels"] = rels.replace(
+        "</Relationships>",
+        f'<Relationship Type="{SHARED_STRINGS_REL_TYPE}" Target="sharedStrings.xml" Id="{rel_id}" /></Relationships>'
+    ).encode("utf-8")
+    content_types = static["[Content_Types].xml"].decode("utf-8")
+    static["[Content_Types].xml"] = content_types.replace(
+        "</Types>",
+        f'<Override PartName="/xl/sharedStrings.xml" ContentType="{SHARED_STRINGS_CONTENT_TYPE}" /></Types>'
+    ).encode("utf-8")
 
-    # ---------------------- (A) 엑셀 파싱 ----------------------
-    try:
-        wb_song = openpyxl.load_workbook(file_song_cost, data_only=True)
-        wb_revenue = openpyxl.load_workbook(file_online_revenue, data_only=True)
-    except Exception as e:
-        st.error(f"엑셀 파일을 읽는 중 오류가 발생했습니다: {e}")
-        return None
+    return {
+        "static": static,
+        "workbook": static.pop("xl/workbook.xml").decode("utf-8"),
+        "sheet_head": head,
+        "sheet_tail": tail,
+        "style_ids": style_ids,
+    }
 
-    # 1) song cost → ym 시트
-    if ym not in wb_song.sheetnames:
-        st.error(f"[song cost] 파일에 '{ym}' 시트가 없습니다.")
-        return None
 
-    ws_sc = wb_song[ym]
-    rows_sc = list(ws_sc.values)
-    if not rows_sc:
-        st.error(f"[song cost] '{ym}' 시트가 비어있습니다.")
-        return None
+@lru_cache(maxsize=None)
+def native_value_rules():
+    """openpyxl이 셀 값을 저장할 때 쓰는 규칙 (수식/오류값/금지문자/숫자 표기)."""
+    from openpyxl.cell.cell import ERROR_CODES, ILLEGAL_CHARACTERS_RE
+    from openpyxl.compat import safe_string
+    from openpyxl.utils.exceptions import IllegalCharacterError
 
-    header_sc = rows_sc[0]
-    body_sc = rows_sc[1:]
+    return frozenset(ERROR_CODES), ILLEGAL_CHARACTERS_RE, safe_string, IllegalCharacterError
 
-    # 필요한 컬럼 인덱스 찾기
-    try:
-        idx_artist = header_sc.index("아티스트명")
-        idx_rate = header_sc.index("정산 요율")
-        idx_prev = header_sc.index("전월 잔액")
-        idx_deduct = header_sc.index("당월 차감액")
-        idx_remain = header_sc.index("당월 잔액")
-    except ValueError as e:
-        st.error(f"[song cost] 시트 컬럼명이 올바른지 확인 필요: {e}")
-        return None
 
-    def to_num(x):
-        if not x:
-            return 0.0
-        if isinstance(x, (int, float)):
-            return float(x)
-        x = str(x).replace("%", "").replace(",", "")
-        try:
-            return float(x)
-        except:
-            return 0.0
+def xml_text(s):
+    return s.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
 
-    artist_cost_dict = {}
-    for row in body_sc:
-        if not row or len(row) < len(header_sc):
-            continue
-        artist_name = row[idx_artist]
-        if not artist_name:
-            continue
-        cost_data = {
-            "정산요율": to_num(row[idx_rate]),
-            "전월잔액": to_num(row[idx_prev]),
-            "당월차감액": to_num(row[idx_deduct]),
-            "당월잔액": to_num(row[idx_remain])
-        }
-        artist_cost_dict[artist_name] = cost_data
 
-    # 2) online revenue → ym 시트
-    if ym not in wb_revenue.sheetnames:
-        st.error(f"[online revenue] 파일에 '{ym}' 시트가 없습니다.")
-        return None
-    ws_or = wb_revenue[ym]
-    rows_or = list(ws_or.values)
-    if not rows_or:
-        st.error(f"[online revenue] '{ym}' 시트가 비어있습니다.")
-        return None
+class NativeDetailSheet:
+    """
+    세부매출내역 한 장을 SpreadsheetML로 바로 쓰는 객체. create_detail_excel의 Workbook처럼 save(stream)만 제공.
+
+    셀 값은 openpyxl과 같은 규칙으로 기록:
+      - 문자열: 공유 문자열(t="s"), 32767자 초과분 잘라냄, 금지 문자가 있으면 IllegalCharacterError
+        ("="로 시작하는 2자 이상은 수식, "#N/A" 등 오류값은 t="e")
+      - 숫자: "%.16g" 표기 (t="n"), bool은 t="b"
+      - None: 값 없이 스타일만, "": 값 없는 inlineStr 셀 (openpyxl write-only와 같음)
+    """
+
+    def __init__(self, title, detail_list):
+        self.title = title
+        self.detail_list = detail_list
+
+    def save(self, stream):
+        parts = native_detail_parts()
+        strings = {}
+        with zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
+            for name, data in parts["static"].items():
+                zf.writestr(name, data)
+            zf.writestr("xl/workbook.xml", parts["workbook"].replace(
+                NATIVE_SHEET_TITLE, xml_text(self.title).replace('"', "&quot;")
+            ))
+            with zf.open("xl/worksheets/sheet1.xml", "w") as sheet:
+                for chunk in self.sheet_xml(parts, strings):
+                    sheet.write(chunk.encode("utf-8"))
+            zf.writestr("xl/sharedStrings.xml", shared_strings_xml(strings))
+
+    def sheet_xml(self, parts, strings):
+        """sheet1.xml을 NATIVE_ROWS_PER_CHUNK 행씩 문자열로 내보내는 generator."""
+        ids = parts["style_ids"]
+        body, label, merged, merged_end, value = (
+            ids["detail_body"], ids["detail_sum_label"], ids["detail_sum_merged"],
+            ids["detail_sum_merged_end"], ids["detail_sum_value"]
+        )
+        cell = partial(native_cell_xml, strings=strings)
+
+        header = "".join(cell(f"{col}1", ids["detail_header"], h) for col, h in zip("ABCDEFG", DETAIL_HEADERS))
+        rows = [f'<row r="1">{header}</row>']
+        yield parts["sheet_head"] + "<sheetData>"
+
+        r = 1
+        for album, major, middle, service, revenue in self.detail_list.rows():
+            r += 1
+            rows.append(
+                f'<row r="{r}">'
+                f'{cell(f"A{r}", body, DETAIL_ARTIST_CELL)}'
+                f'{cell(f"B{r}", body, album)}'
+                f'{cell(f"C{r}", body, major)}'
+                f'{cell(f"D{r}", body, middle)}'
+                f'{cell(f"E{r}", body, service)}'
+                f'{cell(f"F{r}", body, DETAIL_PERIOD_CELL)}'
+                f'{cell(f"G{r}", body, revenue)}'
+                "</row>"
+            )
+            if len(rows) >= NATIVE_ROWS_PER_CHUNK:
+                yield "".join(rows)
+                rows.clear()
+
+        # 합계행: A~F 병합 (B~E / F는 바깥쪽 테두리만)
+        r += 1
+        total_val = sum(self.detail_list.revenues)
+        rows.append(
+            f'<row r="{r}">{cell(f"A{r}", label, "합계")}'
+            + "".join(f'<c r="{col}{r}" s="{merged}" />' for col in "BCDE")
+            + f'<c r="F{r}" s="{merged_end}" />{cell(f"G{r}", value, total_val)}</row>'
+        )
+        yield "".join(rows)
+        yield (f'</sheetData><mergeCells count="1"><mergeCell ref="A{r}:F{r}" /></mergeCells>'
+               + parts["sheet_tail"])
+
+
+def native_cell_xml(ref, style_id, value, strings):
+    """셀 하나의 <c> 요소. 문자열은 strings(문자열 → 공유 문자열 번호)에 등록하고 번호를 기록."""
+    if value is None:
+        return f'<c r="{ref}" s="{style_id}" />'
+    if value == "":  # openpyxl write-only와 같게 값 없는 inlineStr 셀
+        return f'<c r="{ref}" s="{style_id}" t="inlineStr" />'
+    if isinstance(value, str):
+        idx = strings.get(value)
+        if idx is not None:
+            return f'<c r="{ref}" s="{style_id}" t="s"><v>{idx}</v></c>'
+        error_codes, illegal_re, _, illegal_error = native_value_rules()
+        text = value[:32767]
+        if illegal_re.search(text):
+            raise illegal_error(f"{text} cannot be used in worksheets.")
+        if len(text) > 1 and text.startswith("="):
+            return f'<c r="{ref}" s="{style_id}"><f>{xml_text(text[1:])}</f><v /></c>'
+        if text in error_codes:
+            return f'<c r="{ref}" s="{style_id}" t="e"><v>{xml_text(text)}</v></c>'
+        idx = strings[value] = len(strings)
+        return f'<c r="{ref}" s="{style_id}" t="s"><v>{idx}</v></c>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}" s="{style_id}" t="b"><v>{int(value)}</v></c>'
+    safe_string = native_value_rules()[2]
+    return f'<c r="{ref}" s="{style_id}" t="n"><v>{safe_string(value)}</v></c>'
+
+
+def shared_strings_xml(strings):
+    """{문자열: 번호} (번호 순서로 등록됨) → sharedStrings.xml bytes."""
+    items = []
+    for s in strings:
+        s = s[:32767]
+        space = ' xml:space="preserve"' if s != s.strip() else ""
+        items.append(f"<si><t{space}>{xml_text(s)}</t></si>")
+    return (
+        f'<sst xmlns="{SHEET_MAIN_NS}" uniqueCount="{len(strings)}">'
+        + "".join(items) + "</sst>"
+    ).encode("utf-8")
+
+
+def create_detail_native(artist, ym, detail_list):
+    """create_detail_excel과 같은 세부매출내역을 NativeDetailSheet로 생성 (save는 호출 측에서)."""
+    safe_artist = sanitize_sheet_title(artist)
+    return NativeDetailSheet(f"{safe_artist}(세부매출내역)"[:31], detail_list)
+
+
+# 세부매출내역 렌더링 백엔드: (artist, ym, detail_list) → save(stream)이 있는 객체
+DETAIL_BACKENDS = {
+    "openpyxl": create_detail_excel,
+    "native": create_detail_native,
+}
+
+
+# --------------------------------------------------
+# online revenue 행 저장소 (컬럼 단위 + 아티스트별 구간)
+# --------------------------------------------------
+#   행마다 dict를 만들지 않고 컬럼별 array에 담은 뒤 아티스트 순으로 한 번만 정렬해 두고,
+#   아티스트별 (시작, 끝) 구간으로 나눠 씀. 파싱 → 원장 → 세부매출내역 / 정산서 / 검증이 모두 같은 컬럼을 읽음.
+#   앨범 / 대분류 / 중분류 / 서비스명은 같은 값이 수십만 번 반복되므로 코드(array("i")) + 코드 → 문자열 표로 보관.
+#   코드는 문자열 정렬 순서대로 매기므로 코드끼리 비교 / 정렬한 결과가 문자열로 한 것과 같음.
+REVENUE_TEXT_COLUMNS = ("album", "major", "middle", "service")
+
+
+class FirstSeenCodes(dict):
+    """문자열 → 처음 나온 순서 코드. 없는 문자열을 조회하면 다음 코드를 매겨서 돌려줌."""
+    __slots__ = ()
+
+    def __missing__(self, key):
+        code = self[key] = len(self)
+        return code
+
+
+def sorted_codes(index, codes, order=None):
+    """
+    {문자열: 처음 나온 순서 코드} + 그 코드 array → (문자열 정렬 순서로 다시 매긴 코드 array("i"), 코드 → 문자열 list).
+    order(행 번호들)를 주면 그 순서로 재배치한 코드를 만듦.
+    """
+    labels = sorted(index)
+    rank = [0] * len(labels)
+    for code, s in enumerate(labels):
+        rank[index[s]] = code
+    rows = codes if order is None else map(codes.__getitem__, order)
+    return array("i", map(rank.__getitem__, rows)), labels
+
+
+class RevenueRows(Mapping):
+    """
+    한 달 online revenue (artist_revenue_dict) = {앨범아티스트: ArtistRows} 처럼 쓰는 컬럼 저장소.
+
+      rows.codes[name] → array("i"), rows.labels[name] → 코드 → 문자열 list  (name: REVENUE_TEXT_COLUMNS)
+      rows.revenues → array("d")
+      rows.ranges = {앨범아티스트: (start, stop)}  아티스트는 처음 나온 순서, 아티스트 안의 행은 원본 순서
+      rows[artist] → ArtistRows (그 아티스트 구간), rows.records() → iter_revenue_records와 같은 tuple
+    """
+    __slots__ = ("codes", "labels", "revenues", "ranges")
+
+    def __init__(self, codes=None, labels=None, revenues=(), ranges=None):
+        self.codes = codes or {name: array("i") for name in REVENUE_TEXT_COLUMNS}
+        self.labels = labels or {name: [] for name in REVENUE_TEXT_COLUMNS}
+        self.revenues = revenues if isinstance(revenues, array) else array("d", revenues)
+        self.ranges = {} if ranges is None else ranges
+
+    @classmethod
+    def from_records(cls, records):
+        """(앨범아티스트, album, major, middle, service, revenue) tuple들 → 아티스트 순으로 묶은 RevenueRows"""
+        indexes = {name: FirstSeenCodes() for name in REVENUE_TEXT_COLUMNS}
+        codes = {name: array("i") for name in REVENUE_TEXT_COLUMNS}
+        album_index, major_index, middle_index, service_index = indexes.values()
+        add_album, add_major, add_middle, add_service = (c.append for c in codes.values())
+        revenues = array("d")
+        add_revenue = revenues.append
+        positions = {}  # 아티스트 → 원본 행 번호 array
+        last_artist, add_position = object(), None
+        for i, (artist, album, major, middle, service, revenue) in enumerate(records):
+            add_album(album_index[album])
+            add_major(major_index[major])
+            add_middle(middle_index[middle])
+            add_service(service_index[service])
+            add_revenue(revenue)
+            if artist != last_artist:  # 같은 아티스트 행은 보통 이어서 나옴
+                idx = positions.get(artist)
+                if idx is None:
+                    idx = positions[artist] = array("q")
+                last_artist, add_position = artist, idx.append
+            add_position(i)
+
+        ranges, start = {}, 0
+        for artist, idx in positions.items():
+            ranges[artist] = (start, start + len(idx))
+            start += len(idx)
+        # 원장에서 읽은 행처럼 이미 아티스트별로 붙어 있으면 재배치하지 않음
+        order = None
+        if not all(idx[-1] - idx[0] + 1 == len(idx) for idx in positions.values()):
+            order = array("q")
+            for idx in positions.values():
+                order.extend(idx)
+            revenues = array("d", map(revenues.__getitem__, order))
+        del positions
+
+        labels = {}
+        for name in REVENUE_TEXT_COLUMNS:
+            codes[name], labels[name] = sorted_codes(indexes[name], codes[name], order)
+        return cls(codes, labels, revenues, ranges)
+
+    @classmethod
+    def from_frame(cls, df):
+        """clean_revenue_frame 결과 → RevenueRows (아티스트 코드로 안정 정렬 한 번, 문자열 컬럼은 정렬 factorize)"""
+        import numpy as np
+        import pandas as pd
+
+        artist_codes, artists = pd.factorize(df["aartist"], sort=False)
+        order = np.argsort(artist_codes, kind="stable")
+        stops = np.cumsum(np.bincount(artist_codes, minlength=len(artists)))
+        starts = np.concatenate(([0], stops[:-1]))
+
+        codes, labels = {}, {}
+        for name in REVENUE_TEXT_COLUMNS:
+            col_codes, uniques = pd.factorize(df[name], sort=True)
+            codes[name] = array("i")
+            codes[name].frombytes(col_codes[order].astype("int32").tobytes())
+            labels[name] = uniques.tolist()
+        revenues = array("d")
+        revenues.frombytes(np.ascontiguousarray(df["revenue"].to_numpy(dtype="float64")[order]).tobytes())
+        return cls(codes, labels, revenues, dict(zip(artists.tolist(), zip(starts.tolist(), stops.tolist()))))
+
+    def __getitem__(self, artist):
+        start, stop = self.ranges[artist]
+        return ArtistRows(self, start, stop)
+
+    def __contains__(self, artist):
+        return artist in self.ranges
+
+    def __iter__(self):
+        return iter(self.ranges)
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def records(self):
+        for artist, (start, stop) in self.ranges.items():
+            for record in ArtistRows(self, start, stop).rows():
+                yield (artist,) + record
+
+
+class ArtistRows:
+    """
+    아티스트 1명의 매출 행 (detail_list) = RevenueRows의 [start, stop) 구간. len()은 행 수.
 
-    header_or = rows_or[0]
-    body_or = rows_or[1:]
+      rows.codes("album") → 구간의 코드 array, rows.labels("album") → 코드 → 문자열 list (묶기 / 정렬용)
+      rows.albums / majors / middles / services → 문자열 list, rows.revenues → array("d")
+      rows.rows() → (album, major, middle, service, revenue) tuple (셀 기록용)
+
+    프로세스 풀로 넘길 때는 이 구간의 문자열 / 금액만 pickle 되고 받는 쪽에서 다시 코드로 바꿈.
+    """
+    __slots__ = ("source", "start", "stop")
+
+    def __init__(self, source, start, stop):
+        self.source = source
+        self.start = start
+        self.stop = stop
+
+    @classmethod
+    def from_records(cls, records):
+        """(album, major, middle, service, revenue) tuple들 → ArtistRows (아티스트 구분 없는 한 구간)"""
+        source = RevenueRows.from_records((None,) + record for record in records)
+        return cls(source, 0, len(source.revenues))
+
+    @classmethod
+    def from_columns(cls, albums=(), majors=(), middles=(), services=(), revenues=()):
+        return cls.from_records(zip(albums, majors, middles, services, revenues))
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __reduce__(self):
+        # Streamlit(__main__)에서 만든 객체도 worker가 찾을 수 있도록 import 가능한 클래스로
+        return pool_target(ArtistRows).from_columns, (
+            self.albums, self.majors, self.middles, self.services, self.revenues
+        )
+
+    def codes(self, name):
+        return self.source.codes[name][self.start:self.stop]
+
+    def labels(self, name):
+        return self.source.labels[name]
+
+    def column(self, name):
+        """name 컬럼을 문자열 list로 (같은 값은 같은 str 객체)"""
+        return list(map(self.source.labels[name].__getitem__, self.codes(name)))
+
+    @property
+    def albums(self):
+        return self.column("album")
+
+    @property
+    def majors(self):
+        return self.column("major")
+
+    @property
+    def middles(self):
+        return self.column("middle")
+
+    @property
+    def services(self):
+        return self.column("service")
+
+    @property
+    def revenues(self):
+        return self.source.revenues[self.start:self.stop]
+
+    def rows(self):
+        """(album, major, middle, service, revenue) tuple iterator"""
+        return zip(
+            *(map(self.source.labels[name].__getitem__, self.codes(name)) for name in REVENUE_TEXT_COLUMNS),
+            self.revenues
+        )
+
+
+# online revenue에 없는 (곡비만 있는) 아티스트의 detail_list
+NO_REVENUE_ROWS = ArtistRows.from_columns()
+
+
+# --------------------------------------------------
+# 입력 엑셀 파싱 (read-only 스트리밍)
+# --------------------------------------------------
+# 입력 시트에서 읽어오는 컬럼 (내부 key → 엑셀 헤더명)
+SONG_COST_COLUMNS = {
+    "artist": "아티스트명",
+    "rate": "정산 요율",
+    "prev": "전월 잔액",
+    "deduct": "당월 차감액",
+    "remain": "당월 잔액",
+}
+
+REVENUE_COLUMNS = {
+    "aartist": "앨범아티스트",
+    "album": "앨범명",
+    "major": "대분류",
+    "middle": "중분류",
+    "service": "서비스명",
+    "revenue": "권리사정산금액",
+}
+
+
+class IngestError(Exception):
+    """입력 파일 파싱 실패. 메시지는 그대로 사용자에게 표시."""
+
+
+def to_num(x):
+    if not x:
+        return 0.0
+    if isinstance(x, (int, float)):
+        return float(x)
+    x = str(x).replace("%", "").replace(",", "")
+    try:
+        return float(x)
+    except ValueError:
+        return 0.0
+
+
+def open_workbook(file, label, metrics=None):
+    """
+    file을 read-only 모드로 열어 workbook을 반환 (호출 측에서 다 읽은 뒤 close() 해야 함).
+
+    - 시트는 실제로 읽을 때 지연 로딩되므로, 여러 달을 만들 때도 한 번만 열면 됨
+    - metrics(RunMetrics)가 있으면 load_workbook 시간을 "ingest.<label>.load_workbook"에 기록
+    """
+    import openpyxl
+
+    timer = metrics.stage(f"ingest.{label}.load_workbook") if metrics is not None else nullcontext()
     try:
-        col_aartist = header_or.index("앨범아티스트")
-        col_album = header_or.index("앨범명")
-        col_major = header_or.index("대분류")
-        col_middle = header_or.index("중분류")
-        col_service = header_or.index("서비스명")
-        col_revenue = header_or.index("권리사정산금액")
+        with timer:
+            return openpyxl.load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise IngestError(f"엑셀 파일을 읽는 중 오류가 발생했습니다: {e}")
+
+
+def ym_sheet_rows(wb, ym, label):
+    """
+    열린 workbook에서 ym 시트의 (header, 본문 행 iterator)를 반환.
+    본문은 iter_rows(values_only=True)로 한 행씩 읽으며, 시트 전체를 list로 만들지 않음.
+    """
+    if ym not in wb.sheetnames:
+        raise IngestError(f"[{label}] 파일에 '{ym}' 시트가 없습니다.")
+
+    rows = wb[ym].iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        raise IngestError(f"[{label}] '{ym}' 시트가 비어있습니다.")
+    return header, rows
+
+
+def parse_xlsx_months(file, yms, label, parse_sheet, metrics=None):
+    """
+    file을 한 번만 열어 yms 각 시트를 parse_sheet(header, rows)로 파싱 → {ym: 결과}.
+    (다른 월 시트는 건드리지 않음)
+    """
+    wb = open_workbook(file, label, metrics)
+    try:
+        return {ym: parse_sheet(*ym_sheet_rows(wb, ym, label)) for ym in yms}
+    finally:
+        wb.close()
+
+
+def iter_padded_rows(rows, width):
+    """
+    read-only 시트는 (dimension 정보가 없으면) 뒤쪽 빈 셀을 잘라서 돌려주므로
+    width 길이에 못 미치는 행은 None으로 채워서 넘긴다. 완전히 빈 행은 건너뜀.
+    """
+    for row in rows:
+        if not row:
+            continue
+        if len(row) < width:
+            row = row + (None,) * (width - len(row))
+        yield row
+
+
+def song_cost_sheet_to_dict(header, rows):
+    """
+    song cost 시트 → artist_cost_dict
+      {아티스트명: {"정산요율":..., "전월잔액":..., "당월차감액":..., "당월잔액":...}}
+    """
+    # 필요한 컬럼 인덱스 찾기
+    try:
+        idx_artist, idx_rate, idx_prev, idx_deduct, idx_remain = (
+            header.index(name) for name in SONG_COST_COLUMNS.values()
+        )
     except ValueError as e:
-        st.error(f"[online revenue] 시트 컬럼명이 올바른지 확인 필요: {e}")
-        return None
+        raise IngestError(f"[song cost] 시트 컬럼명이 올바른지 확인 필요: {e}")
 
-    artist_revenue_dict = defaultdict(list)
-    for row in body_or:
-        if not row or len(row) < len(header_or):
+    artist_cost_dict = {}
+    for row in iter_padded_rows(rows, len(header)):
+        artist_name = row[idx_artist]
+        if not artist_name:
             continue
+        artist_cost_dict[artist_name] = {
+            "정산요율": to_num(row[idx_rate]),
+            "전월잔액": to_num(row[idx_prev]),
+            "당월차감액": to_num(row[idx_deduct]),
+            "당월잔액": to_num(row[idx_remain])
+        }
+    return artist_cost_dict
+
+
+def iter_revenue_records(header, rows):
+    """
+    online revenue 시트 행 → (앨범아티스트, album, major, middle, service, revenue) tuple generator.
+    앨범아티스트가 빈 행은 건너뜀.
+    """
+    try:
+        col_aartist, col_album, col_major, col_middle, col_service, col_revenue = (
+            header.index(name) for name in REVENUE_COLUMNS.values()
+        )
+    except ValueError as e:
+        raise IngestError(f"[online revenue] 시트 컬럼명이 올바른지 확인 필요: {e}")
+
+    for row in iter_padded_rows(rows, len(header)):
         aartist = str(row[col_aartist]).strip() if row[col_aartist] else ""
-        album   = str(row[col_album])   if row[col_album]   else ""
-        major   = str(row[col_major])   if row[col_major]   else ""
-        middle  = str(row[col_middle])  if row[col_middle]  else ""
-        srv     = str(row[col_service]) if row[col_service] else ""
-        rev_val = to_num(row[col_revenue])
-
-        if aartist:
-            artist_revenue_dict[aartist].append({
-                "album": album,
-                "major": major,
-                "middle": middle,
-                "service": srv,
-                "revenue": rev_val
-            })
-
-    # ---------------------- (B) 아티스트 목록 비교 ----------------------
-    song_artists = sorted(artist_cost_dict.keys())
-    revenue_artists = sorted(artist_revenue_dict.keys())
-    check_dict["song_artists"] = song_artists
-    check_dict["revenue_artists"] = revenue_artists
-
-    compare_res = compare_artists(song_artists, revenue_artists)
-    check_dict["artist_compare_result"] = compare_res
-
-    # 전체 아티스트(둘 중 하나라도 존재)
-    all_artists = sorted(set(song_artists) | set(revenue_artists))
+        if not aartist:
+            continue
+        yield (
+            aartist,
+            str(row[col_album]) if row[col_album] else "",
+            str(row[col_major]) if row[col_major] else "",
+            str(row[col_middle]) if row[col_middle] else "",
+            str(row[col_service]) if row[col_service] else "",
+            to_num(row[col_revenue]),
+        )
 
-    # ---------------------- (C) 아티스트별 엑셀 생성 & ZIP ----------------------
-    zip_buf = io.BytesIO()
-    with zipfile.ZipFile(zip_buf, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-        progress_bar = st.progress(0.0)
-        artist_placeholder = st.empty()
-
-        for i, artist in enumerate(all_artists):
-            ratio = (i + 1) / len(all_artists)
-            progress_bar.progress(ratio)
-            artist_placeholder.info(f"[{i+1}/{len(all_artists)}] {artist} 처리 중...")
-
-            # 1) 해당 아티스트의 cost_data, revenue_list
-            cost_data = artist_cost_dict.get(artist, {
-                "정산요율":0, "전월잔액":0, "당월차감액":0, "당월잔액":0
-            })
-            detail_list = artist_revenue_dict[artist]  # [{album, major, middle, service, revenue}, ...]
-
-            # (A) 세부매출내역(.xlsx)
-            #   write_detail_data + apply_detail_style 방식
-            detail_wb = create_detail_excel(artist, ym, detail_list)
-            detail_buf = io.BytesIO()
-            detail_wb.save(detail_buf)
-            detail_buf.seek(0)
-            zf.writestr(f"{artist}(세부매출내역).xlsx", detail_buf.getvalue())
-
-            # (B) 정산서(.xlsx)
-            #   4섹션(write_service_table + style_service_table, etc.)
-            #   우선 "service_list", "album_list", "deduction_list", "rate_list"를 구성
-            #   또는, 단순히 detail_list를 가공해서 service_list, album_list 만들 수도 있음
-
-            # (예시) service_list = detail_list와 동일하게 구성
-            service_list = []
-            for d in detail_list:
-                service_item = {
-                    "album": d["album"],
-                    "major": d["major"],
-                    "middle": d["middle"],
-                    "service": d["service"],
-                    "year": ym[:4],
-                    "month": ym[4:],
-                    "revenue": d["revenue"]
+
+def revenue_sheet_to_dict(header, rows):
+    """online revenue 시트 → artist_revenue_dict (RevenueRows, {앨범아티스트: ArtistRows})"""
+    return RevenueRows.from_records(iter_revenue_records(header, rows))
+
+
+def parse_song_cost(file, ym, metrics=None):
+    """song cost 파일의 ym 시트 → artist_cost_dict (song_cost_sheet_to_dict)"""
+    return parse_xlsx_months(file, [ym], "song cost", song_cost_sheet_to_dict, metrics)[ym]
+
+
+def parse_online_revenue(file, ym, metrics=None):
+    """online revenue 파일의 ym 시트 → artist_revenue_dict (행 단위 스트리밍)"""
+    return parse_xlsx_months(file, [ym], "online revenue", revenue_sheet_to_dict, metrics)[ym]
+
+
+# --------------------------------------------------
+# online revenue 컬럼 단위(벡터) 파싱 (CSV / Parquet 입력)
+# --------------------------------------------------
+NUMBER_PATTERN = r"[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?"
+
+
+def to_text_column(s):
+    """str(x) if x else "" 를 컬럼 전체에 한 번에 적용."""
+    import pandas as pd
+
+    if isinstance(s.dtype, pd.StringDtype):
+        return s.fillna("")  # CSV / Parquet: 이미 문자열 (빈 칸만 NaN)
+    s = s.astype(object)
+    keep = s.notna() & s.astype(bool)
+    return s.where(keep, "").astype(str)
+
+
+def to_num_column(s):
+    """
+    to_num을 컬럼 전체에 한 번에 적용 (콤마/%/빈칸 → 숫자, 실패 시 0.0). 빈 셀(NaN / NA)은 0.0.
+    흔한 숫자 문자열은 NUMBER_PATTERN으로 한 번에 바꾸고, 나머지 문자열("nan", "inf", "1_000", 글자 등)은
+    셀마다 to_num으로 바꿔서 결과가 to_num과 항상 같음.
+    """
+    import pandas as pd
+
+    if pd.api.types.is_numeric_dtype(s):
+        return s.fillna(0.0).astype(float)
+
+    if isinstance(s.dtype, pd.StringDtype):
+        # CSV / Parquet: 문자열 전용 컬럼은 object로 바꾸지 않고 그대로 처리 (훨씬 빠름)
+        txt = s.str.replace(",", "", regex=False).str.replace("%", "", regex=False).str.strip()
+        valid = txt.str.fullmatch(NUMBER_PATTERN).fillna(False).astype(bool)
+        num = pd.Series(0.0, index=s.index)
+        num[valid] = txt[valid].astype(float)
+        rest = ~valid & s.notna()
+        if rest.any():
+            num[rest] = [to_num(x) for x in s[rest]]
+        return num
+
+    s = s.astype(object)
+    num = pd.to_numeric(s, errors="coerce").fillna(0.0).astype(float)
+
+    # 문자열 셀은 콤마/% 제거 후 float()로 다시 변환
+    # (pd.to_numeric의 문자열 파서는 마지막 자리 오차가 있어 to_num과 값이 달라질 수 있음)
+    is_str = s.str.len().notna()
+    if is_str.any():
+        txt = (
+            s[is_str].str.replace(",", "", regex=False)
+                     .str.replace("%", "", regex=False)
+                     .str.strip()
+        )
+        valid = txt.str.fullmatch(NUMBER_PATTERN)
+        num[is_str] = 0.0
+        num[valid[valid].index] = txt[valid].astype(float)
+        rest = valid[~valid].index
+        if len(rest):
+            num[rest] = [to_num(x) for x in s[rest]]
+    return num
+
+
+def clean_revenue_frame(df):
+    """
+    컬럼명이 REVENUE_COLUMNS의 key(aartist, album, ...)인 DataFrame →
+    iter_revenue_records와 같은 규칙으로 정리한 DataFrame (앨범아티스트가 빈 행 제외).
+    """
+    import pandas as pd
+
+    df = pd.DataFrame({
+        "aartist": to_text_column(df["aartist"]).str.strip(),
+        "album": to_text_column(df["album"]),
+        "major": to_text_column(df["major"]),
+        "middle": to_text_column(df["middle"]),
+        "service": to_text_column(df["service"]),
+        "revenue": to_num_column(df["revenue"]),
+    })
+    return df[df["aartist"] != ""].reset_index(drop=True)
+
+
+def revenue_frame_records(df):
+    """clean_revenue_frame 결과 → iter_revenue_records와 같은 tuple iterator"""
+    return zip(*(df[k].tolist() for k in REVENUE_COLUMNS))
+
+
+def revenue_frame_to_dict(df):
+    """
+    컬럼명이 REVENUE_COLUMNS의 key(aartist, album, ...)인 DataFrame →
+    parse_online_revenue와 같은 artist_revenue_dict (RevenueRows).
+    앨범아티스트 코드로 안정 정렬 한 번으로 나누며, 아티스트 안의 행 순서는 원본 순서를 유지.
+    """
+    return RevenueRows.from_frame(clean_revenue_frame(df))
+
+
+# --------------------------------------------------
+# CSV / Parquet 입력 (xlsx와 같은 컬럼명)
+# --------------------------------------------------
+# xlsx는 월별 시트로 나뉘지만, CSV/Parquet은 한 파일이므로
+# 이 컬럼이 있으면 ym과 같은 행만 사용하고, 없으면 파일 전체를 ym 데이터로 봄
+YM_COLUMN = "진행기간"
+
+
+def input_file_types():
+    """
+    업로드 / CLI에서 받는 입력 형식.
+    Parquet은 pyarrow(선택 의존성)가 설치된 경우에만 (import 하지 않고 설치 여부만 확인)
+    """
+    return ["xlsx", "csv"] + (["parquet"] if importlib.util.find_spec("pyarrow") else [])
+
+
+INPUT_FILE_TYPES = input_file_types()
+
+# 국내 유통사 export는 utf-8(BOM) 아니면 cp949(엑셀 "CSV" 저장)
+CSV_ENCODINGS = ("utf-8-sig", "cp949")
+
+
+def peek_bytes(file, n):
+    """파일 앞 n바이트 (file-like는 읽은 뒤 원래 위치로 되돌림)."""
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            return f.read(n)
+    pos = file.tell()
+    head = file.read(n)
+    file.seek(pos)
+    return head
+
+
+def input_format(file):
+    """파일 내용(매직 바이트)으로 "xlsx" / "parquet" / "csv" 판별."""
+    head = peek_bytes(file, 4)
+    if head.startswith(b"PK"):
+        return "xlsx"
+    if head == b"PAR1":
+        return "parquet"
+    return "csv"
+
+
+def detect_csv_encoding(file, sample_size=1 << 20):
+    """앞부분 sample_size 바이트가 utf-8로 읽히면 utf-8-sig, 아니면 cp949."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        decoder.decode(peek_bytes(file, sample_size), final=False)
+    except UnicodeDecodeError:
+        return CSV_ENCODINGS[1]
+    return CSV_ENCODINGS[0]
+
+
+def rewind(file):
+    if hasattr(file, "seek"):
+        file.seek(0)
+
+
+def table_columns(file, fmt, label, columns):
+    """
+    CSV / Parquet 파일에서 읽을 컬럼 → (csv 인코딩 또는 None, [읽을 컬럼명]).
+    columns의 컬럼이 빠져 있으면 IngestError.
+    """
+    import pandas as pd
+
+    encoding = None
+    try:
+        if fmt == "parquet":
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise IngestError(
+                    f"[{label}] Parquet 파일을 읽으려면 pyarrow가 필요합니다. (pip install pyarrow)"
+                )
+            rewind(file)
+            names = pq.read_schema(file).names
+        else:
+            encoding = detect_csv_encoding(file)
+            rewind(file)
+            names = list(pd.read_csv(file, nrows=0, encoding=encoding).columns)
+    except IngestError:
+        raise
+    except Exception as e:
+        raise IngestError(f"[{label}] 파일을 읽는 중 오류가 발생했습니다: {e}")
+
+    missing = [c for c in columns.values() if c not in names]
+    if missing:
+        raise IngestError(f"[{label}] 시트 컬럼명이 올바른지 확인 필요: {missing} 컬럼이 없습니다.")
+    rewind(file)
+    return encoding, [c for c in (*columns.values(), YM_COLUMN) if c in names]
+
+
+def period_months(periods):
+    """YM_COLUMN 값들 → {값: "YYYYMM"} (숫자만 남긴 앞 6자리, 2024-10 → 202410)"""
+    return {p: re.sub(r"\D", "", str(p))[:6] for p in periods}
+
+
+def read_tables(file, yms, label, columns, metrics=None):
+    """
+    CSV / Parquet 파일을 한 번 읽어서 → {ym: 컬럼명이 columns의 key인 DataFrame (그 달 행만)}.
+
+    - 모든 값은 문자열로 읽음 (숫자 변환은 to_num_column이 xlsx 경로와 같은 규칙으로 처리)
+    - YM_COLUMN이 있으면 숫자만 남긴 앞 6자리(2024-10 → 202410)로 달을 나눔
+      (없으면 파일 전체를 한 달 데이터로 보므로, 여러 달을 요청하면 IngestError)
+    - Parquet은 pyarrow(선택 의존성)가 있어야 읽을 수 있음 (CSV는 없어도 되지만 있으면 더 빠름)
+    """
+    import pandas as pd
+
+    fmt = input_format(file)
+    timer = metrics.stage(f"ingest.{label}.read_table") if metrics is not None else nullcontext()
+    with timer:
+        encoding, wanted = table_columns(file, fmt, label, columns)
+        try:
+            if fmt == "parquet":
+                df = pd.read_parquet(file, columns=wanted)
+            else:
+                # pyarrow가 있으면 멀티스레드 CSV 파서 사용 (결과는 기본 C 파서와 같음)
+                engine = "pyarrow" if importlib.util.find_spec("pyarrow") else "c"
+                df = pd.read_csv(file, usecols=wanted, dtype=str, encoding=encoding,
+                                 keep_default_na=False, na_values=[""], engine=engine)
+        except Exception as e:
+            raise IngestError(f"[{label}] 파일을 읽는 중 오류가 발생했습니다: {e}")
+
+    def select(frame):
+        return frame.rename(columns={v: k for k, v in columns.items()})[list(columns)].reset_index(drop=True)
+
+    if YM_COLUMN not in df.columns:
+        if len(yms) > 1:
+            raise IngestError(f"[{label}] '{YM_COLUMN}' 컬럼이 없는 파일로는 여러 달을 한 번에 만들 수 없습니다.")
+        return {yms[0]: select(df)}
+
+    # 진행기간 값 종류는 몇 개뿐이므로 고유값만 정규화해서 비교
+    period_ym = period_months(df[YM_COLUMN].dropna().unique())
+    tables = {}
+    for ym in yms:
+        month = df[df[YM_COLUMN].isin([p for p, v in period_ym.items() if v == ym])]
+        if month.empty:
+            raise IngestError(f"[{label}] 파일에 '{ym}' {YM_COLUMN} 데이터가 없습니다.")
+        tables[ym] = select(month)
+    return tables
+
+
+def iter_table_chunks(file, yms, label, columns, chunk_rows):
+    """
+    read_tables의 나눠 읽기 버전 → (ym, 그 달 행만 담은 DataFrame 조각) generator.
+    CSV는 chunk_rows 행씩, Parquet은 row group 배치 단위로 읽으므로 파일 전체를 메모리에 올리지 않음.
+    (pyarrow CSV 엔진은 나눠 읽기를 지원하지 않으므로 기본 C 파서 사용)
+    요청한 달 중 행이 하나도 없는 달이 있으면 다 읽은 뒤 IngestError.
+    """
+    import pandas as pd
+
+    fmt = input_format(file)
+    encoding, wanted = table_columns(file, fmt, label, columns)
+    if YM_COLUMN not in wanted and len(yms) > 1:
+        raise IngestError(f"[{label}] '{YM_COLUMN}' 컬럼이 없는 파일로는 여러 달을 한 번에 만들 수 없습니다.")
+    rename = {v: k for k, v in columns.items()}
+
+    def chunks():
+        try:
+            if fmt == "parquet":
+                import pyarrow.parquet as pq
+
+                for batch in pq.ParquetFile(file).iter_batches(batch_size=chunk_rows, columns=wanted):
+                    yield batch.to_pandas()
+            else:
+                yield from pd.read_csv(file, usecols=wanted, dtype=str, encoding=encoding,
+                                       keep_default_na=False, na_values=[""], chunksize=chunk_rows)
+        except Exception as e:
+            raise IngestError(f"[{label}] 파일을 읽는 중 오류가 발생했습니다: {e}")
+
+    seen = set()
+    period_ym = {}
+    for df in chunks():
+        if YM_COLUMN not in df.columns:
+            parts = [(yms[0], df)]
+        else:
+            period_ym.update(period_months(p for p in df[YM_COLUMN].dropna().unique() if p not in period_ym))
+            parts = [(ym, df[df[YM_COLUMN].isin([p for p, v in period_ym.items() if v == ym])]) for ym in yms]
+        for ym, part in parts:
+            if not part.empty:
+                seen.add(ym)
+                yield ym, part.rename(columns=rename)[list(columns)].reset_index(drop=True)
+    for ym in yms:
+        if ym not in seen:
+            raise IngestError(f"[{label}] 파일에 '{ym}' {YM_COLUMN} 데이터가 없습니다.")
+
+
+def read_table(file, ym, label, columns, metrics=None):
+    """read_tables의 한 달 버전 → ym 행만 담은 DataFrame."""
+    return read_tables(file, [ym], label, columns, metrics)[ym]
+
+
+def song_cost_frame_to_dict(df):
+    """컬럼명이 SONG_COST_COLUMNS의 key인 DataFrame → parse_song_cost와 같은 artist_cost_dict."""
+    artist = to_text_column(df["artist"])
+    keep = artist != ""
+    values = zip(
+        artist[keep].tolist(),
+        *(to_num_column(df[k])[keep].tolist() for k in ("rate", "prev", "deduct", "remain"))
+    )
+    return {
+        a: {"정산요율": rate, "전월잔액": prev, "당월차감액": deduct, "당월잔액": remain}
+        for a, rate, prev, deduct, remain in values
+    }
+
+
+def parse_song_cost_table(file, ym, metrics=None):
+    """parse_song_cost의 CSV / Parquet 버전."""
+    return song_cost_frame_to_dict(read_table(file, ym, "song cost", SONG_COST_COLUMNS, metrics))
+
+
+def revenue_table_to_dict(df):
+    if df.empty:
+        return RevenueRows()
+    return revenue_frame_to_dict(df)
+
+
+def parse_online_revenue_table(file, ym, metrics=None):
+    """parse_online_revenue의 CSV / Parquet 버전 (항상 컬럼 단위 처리)."""
+    return revenue_table_to_dict(read_table(file, ym, "online revenue", REVENUE_COLUMNS, metrics))
+
+
+def parse_months(label, file, yms, metrics=None):
+    """
+    입력 파일 하나(label = "song cost" / "online revenue")에서 yms 각 달을 파싱 → {ym: 결과}.
+
+    - xlsx: workbook을 한 번만 열고 월별 시트를 차례로 스트리밍 파싱
+    - CSV / Parquet: 파일을 한 번만 읽고 YM_COLUMN으로 나눔
+    - file이 bytes면 메모리 파일로 읽음 (프로세스 풀 worker로 업로드 파일을 넘길 때)
+    """
+    if isinstance(file, (bytes, bytearray)):
+        file = io.BytesIO(file)
+    if label == "song cost":
+        parse_sheet, columns, frame_to_dict = song_cost_sheet_to_dict, SONG_COST_COLUMNS, song_cost_frame_to_dict
+    else:
+        parse_sheet, columns, frame_to_dict = revenue_sheet_to_dict, REVENUE_COLUMNS, revenue_table_to_dict
+    if input_format(file) == "xlsx":
+        return parse_xlsx_months(file, yms, label, parse_sheet, metrics)
+    return {ym: frame_to_dict(df) for ym, df in read_tables(file, yms, label, columns, metrics).items()}
+
+
+def iter_revenue_month_records(file, yms, chunk_rows, metrics=None):
+    """
+    online revenue 파일의 yms 행을 (진행기간, 앨범아티스트, 앨범명, 대분류, 중분류, 서비스명, 매출) tuple로 차례로 내보냄.
+    parse_months와 달리 결과를 RevenueRows로 모으지 않음 (저메모리 모드에서 LedgerStore.save_records로 바로 저장).
+
+    - xlsx: read-only workbook을 시트 순서대로 스트리밍
+    - CSV / Parquet: iter_table_chunks로 chunk_rows 행씩 읽어서 revenue_frame_to_dict와 같은 정리 후 변환
+    """
+    label = "online revenue"
+    if isinstance(file, (bytes, bytearray)):
+        file = io.BytesIO(file)
+    if input_format(file) == "xlsx":
+        wb = open_workbook(file, label, metrics)
+        try:
+            for ym in yms:
+                for record in iter_revenue_records(*ym_sheet_rows(wb, ym, label)):
+                    yield (ym,) + record
+        finally:
+            wb.close()
+        return
+    for ym, df in iter_table_chunks(file, yms, label, REVENUE_COLUMNS, chunk_rows):
+        for record in revenue_frame_records(clean_revenue_frame(df)):
+            yield (ym,) + record
+
+
+# --------------------------------------------------
+# 파싱 결과 캐시 (Streamlit rerun 간 재사용)
+# --------------------------------------------------
+def file_digest(file, chunk_size=1 << 20):
+    """업로드 파일(file-like) 또는 경로의 내용 sha256. file-like는 읽은 뒤 처음 위치로 되돌림."""
+    h = hashlib.sha256()
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                h.update(chunk)
+        return h.hexdigest()
+    if hasattr(file, "getbuffer"):
+        h.update(file.getbuffer())
+        return h.hexdigest()
+    pos = file.tell()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(chunk_size), b""):
+        h.update(chunk)
+    file.seek(pos)
+    return h.hexdigest()
+
+
+class ParseCache:
+    """
+    (파일 내용 해시, 시트명, 컬럼 매핑) → 파싱 결과(artist_cost_dict / artist_revenue_dict).
+
+    - 최근에 쓴 항목부터 max_entries 개까지만 보관 (LRU)
+    - 같은 파일 + 같은 ym 으로 다시 실행하면 엑셀을 열지 않고 바로 결과를 돌려줌
+      (여러 달을 만들 때는 lookup으로 없는 달만 골라 파싱한 뒤 store)
+    - 캐시된 dict는 여러 실행이 공유하므로 호출 측에서 수정하면 안 됨
+    - 세션의 캐시 하나를 여러 작업 스레드가 같이 쓰므로 lookup / store는 lock 안에서 처리
+      (파일 해시 계산과 파싱은 lock 밖)
+    """
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.last_status = {}  # {"song cost": "hit"/"miss", "online revenue": ...}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, label, file, sheets, columns, digest=None):
+        """
+        sheets 중 캐시에 있는 것 → ({sheet: 결과}, {없는 sheet: 캐시 key}).
+        없는 sheet는 호출 측에서 파싱한 뒤 store(캐시 key들, {sheet: 결과})로 넣음.
+        digest: 이미 계산한 file_digest(file)이 있으면 넘김
+        """
+        digest = digest or file_digest(file)
+        found, missing = {}, {}
+        with self._lock:
+            for sheet in sheets:
+                key = (digest, sheet, tuple(columns.items()))
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[sheet] = self._entries[key]
+                else:
+                    missing[sheet] = key
+            self.hits += len(found)
+            self.misses += len(missing)
+            self.last_status[label] = "partial" if found and missing else "miss" if missing else "hit"
+        return found, missing
+
+    def store(self, keys, values):
+        with self._lock:
+            for sheet, key in keys.items():
+                self._entries[key] = values[sheet]
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+# --------------------------------------------------
+# 정산 원장 (파싱한 달별 입력을 로컬 SQLite에 보관)
+# --------------------------------------------------
+LEDGER_DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".revenue2report", "ledger.sqlite")
+
+LEDGER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingests (
+    kind TEXT NOT NULL,          -- "song cost" / "online revenue"
+    ym TEXT NOT NULL,
+    digest TEXT,                 -- 원본 파일 sha256 (file_digest)
+    rows INTEGER NOT NULL,
+    stored_at TEXT NOT NULL,
+    PRIMARY KEY (kind, ym)
+);
+CREATE TABLE IF NOT EXISTS song_cost (
+    ym TEXT NOT NULL,
+    artist NOT NULL,             -- 타입 없음: 엑셀의 숫자 아티스트명도 파싱 결과 그대로 보관
+    seq INTEGER NOT NULL,
+    rate REAL, prev REAL, deduct REAL, remain REAL,
+    PRIMARY KEY (ym, artist)
+);
+CREATE TABLE IF NOT EXISTS revenue (
+    ym TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    artist TEXT NOT NULL,
+    album TEXT, major TEXT, middle TEXT, service TEXT,
+    revenue REAL,
+    PRIMARY KEY (ym, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS revenue_artist ON revenue (ym, artist);
+"""
+
+
+def previous_ym(ym):
+    """"202401" → "202312" """
+    year, month = int(ym[:4]), int(ym[4:])
+    return f"{year - 1}12" if month == 1 else f"{year}{month - 1:02d}"
+
+
+class LedgerStore:
+    """
+    파싱한 달별 입력(song cost 잔액 / online revenue 행)을 보관하는 로컬 SQLite 원장.
+
+      ledger.save("online revenue", "202410", artist_revenue_dict, digest)
+      ledger.load("online revenue", "202410")   → 파싱 결과와 같은 RevenueRows (아티스트/행 순서 포함)
+      ledger.balance_continuity("202410")       → 전월 잔액 vs 지난달 당월 잔액
+
+    - (종류, 진행기간)마다 원본 파일 sha256을 같이 저장 → 같은 파일이면 파싱 없이 원장에서 읽음
+    - 같은 달을 다른 파일로 다시 저장하면 그 달 데이터를 통째로 교체
+    - 연결은 호출마다 새로 엶 (Streamlit rerun은 다른 스레드에서 실행될 수 있음)
+    """
+
+    def __init__(self, path=LEDGER_DEFAULT_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(LEDGER_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:  # 블록이 끝나면 commit, 예외면 rollback
+                yield conn
+        finally:
+            conn.close()
+
+    def ingests(self):
+        """저장된 (종류, 진행기간) 목록 → [{"kind", "ym", "digest", "rows", "stored_at"}, ...]"""
+        with self._connect() as conn:
+            cur = conn.execute("SELECT kind, ym, digest, rows, stored_at FROM ingests ORDER BY ym, kind")
+            return [dict(zip(("kind", "ym", "digest", "rows", "stored_at"), row)) for row in cur]
+
+    def stored_months(self):
+        """두 입력이 모두 저장되어 있어 파일 없이 재발행할 수 있는 달 목록."""
+        with self._connect() as conn:
+            cur = conn.execute("SELECT ym FROM ingests GROUP BY ym HAVING COUNT(*) = 2 ORDER BY ym")
+            return [ym for ym, in cur]
+
+    def digest(self, label, ym):
+        """label / ym을 저장할 때의 원본 파일 sha256 (저장된 적 없으면 None)."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT digest FROM ingests WHERE kind = ? AND ym = ?", (label, ym)).fetchone()
+        return row[0] if row else None
+
+    def save(self, label, ym, data, digest=None):
+        """파싱 결과(artist_cost_dict / artist_revenue_dict)로 label의 ym 데이터를 교체."""
+        with self._connect() as conn:
+            if label == "song cost":
+                conn.execute("DELETE FROM song_cost WHERE ym = ?", (ym,))
+                conn.executemany(
+                    "INSERT INTO song_cost VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    ((ym, artist, seq, c["정산요율"], c["전월잔액"], c["당월차감액"], c["당월잔액"])
+                     for seq, (artist, c) in enumerate(data.items()))
+                )
+                rows = len(data)
+            else:
+                # 아티스트별로 묶인 순서대로 seq를 매기므로, seq 순으로 읽으면 같은 RevenueRows가 됨
+                records = ((ym,) + record for record in data.records())
+                rows = sum(self._insert_revenue(conn, [ym], records)[ym].values())
+            self._record_ingest(conn, label, ym, digest, rows)
+
+    def save_records(self, yms, records, digest=None):
+        """
+        online revenue 행을 RevenueRows로 모으지 않고 바로 저장 (records: (진행기간,) + iter_revenue_records 형식 tuple).
+        sqlite가 iterator를 한 행씩 소비하므로 메모리에는 아티스트별 행 수만 남음.
+        중간에 예외가 나면 yms 전체가 rollback 됨.
+        반환: {ym: {아티스트: 행 수} (처음 나온 순서)}
+        """
+        with self._connect() as conn:
+            counts = self._insert_revenue(conn, yms, records)
+            for ym in yms:
+                self._record_ingest(conn, "online revenue", ym, digest, sum(counts[ym].values()))
+        return counts
+
+    @staticmethod
+    def _insert_revenue(conn, yms, records):
+        counts = {ym: {} for ym in yms}
+        seqs = dict.fromkeys(yms, 0)
+
+        def numbered():
+            for ym, artist, *rest in records:
+                ym_counts = counts[ym]
+                ym_counts[artist] = ym_counts.get(artist, 0) + 1
+                seqs[ym] += 1
+                yield (ym, seqs[ym] - 1, artist, *rest)
+
+        conn.executemany("DELETE FROM revenue WHERE ym = ?", ((ym,) for ym in yms))
+        conn.executemany("INSERT INTO revenue VALUES (?, ?, ?, ?, ?, ?, ?, ?)", numbered())
+        return counts
+
+    @staticmethod
+    def _record_ingest(conn, label, ym, digest, rows):
+        conn.execute(
+            "INSERT OR REPLACE INTO ingests VALUES (?, ?, ?, ?, ?)",
+            (label, ym, digest, rows, time.strftime("%Y-%m-%dT%H:%M:%S"))
+        )
+
+    @staticmethod
+    def _require(conn, label, ym):
+        if conn.execute("SELECT 1 FROM ingests WHERE kind = ? AND ym = ?", (label, ym)).fetchone() is None:
+            raise IngestError(f"[{label}] 원장에 '{ym}' 데이터가 없습니다. 입력 파일을 업로드하세요.")
+
+    def revenue_counts(self, ym):
+        """ym online revenue의 {아티스트: 행 수} (처음 나온 순서). 없으면 IngestError."""
+        with self._connect() as conn:
+            self._require(conn, "online revenue", ym)
+            cur = conn.execute(
+                "SELECT artist, COUNT(*) FROM revenue WHERE ym = ? GROUP BY artist ORDER BY MIN(seq)", (ym,)
+            )
+            return dict(cur)
+
+    def artist_revenue(self, ym, artist):
+        """ym online revenue 중 artist 1명의 ArtistRows (load(...)[artist]와 같음)"""
+        with self._connect() as conn:
+            # 통계가 없으면 planner가 ORDER BY seq 때문에 그 달 전체를 PK 순으로 훑으므로 인덱스를 지정
+            # (WITHOUT ROWID 테이블의 인덱스는 PK(ym, seq)를 포함하므로 정렬도 필요 없음)
+            cur = conn.execute(
+                "SELECT album, major, middle, service, revenue FROM revenue INDEXED BY revenue_artist "
+                "WHERE ym = ? AND artist = ? ORDER BY seq", (ym, artist)
+            )
+            return ArtistRows.from_records(cur)
+
+    def load(self, label, ym):
+        """save 한 label의 ym 데이터 → 파싱 결과와 같은 dict / RevenueRows. 없으면 IngestError."""
+        with self._connect() as conn:
+            self._require(conn, label, ym)
+            if label == "song cost":
+                cur = conn.execute(
+                    "SELECT artist, rate, prev, deduct, remain FROM song_cost WHERE ym = ? ORDER BY seq", (ym,)
+                )
+                return {
+                    artist: {"정산요율": rate, "전월잔액": prev, "당월차감액": deduct, "당월잔액": remain}
+                    for artist, rate, prev, deduct, remain in cur
                 }
-                service_list.append(service_item)
-
-            # (앨범별) album_list
-            #   album별 revenue 합산
-            album_dict = defaultdict(float)
-            for d in detail_list:
-                album_dict[d["album"]] += d["revenue"]
-            album_list = []
-            for alb, amt in album_dict.items():
-                album_list.append({
-                    "album": alb,
-                    "year": ym[:4],
-                    "month": ym[4:],
-                    "revenue": amt
-                })
-
-            # (공제 내역) deduction_list
-            #   cost_data["전월잔액"], cost_data["당월차감액"], cost_data["당월잔액"]
-            #   after_deduct = (album합계 - 당월차감액) 등
-            total_album_sum = sum(album_dict.values())
-            after_deduct = total_album_sum - cost_data["당월차감액"]
-            ded_list = [{
-                "album": ", ".join(album_dict.keys()) if album_dict else "(앨범 없음)",
-                "prev_cost": cost_data["전월잔액"],
-                "deduct_cost": cost_data["당월차감액"],
-                "remain_cost": cost_data["당월잔액"],
-                "after_deduct": after_deduct
-            }]
-
-            # (수익 배분) rate_list
-            #   rate = cost_data["정산요율"]
-            #   applied_amount = after_deduct * (rate/100)
-            applied_amount = after_deduct * (cost_data["정산요율"]/100.0)
-            rate_list = [{
-                "album": ", ".join(album_dict.keys()) if album_dict else "(앨범 없음)",
-                "rate": cost_data["정산요율"],
-                "applied_amount": applied_amount
-            }]
-
-            report_wb = create_report_excel(
-                artist,
-                service_list,
-                album_list,
-                ded_list,
-                rate_list
+            cur = conn.execute(
+                "SELECT artist, album, major, middle, service, revenue FROM revenue WHERE ym = ? ORDER BY seq",
+                (ym,)
             )
-            report_buf = io.BytesIO()
-            report_wb.save(report_buf)
-            report_buf.seek(0)
-            zf.writestr(f"{artist}(정산서).xlsx", report_buf.getvalue())
+            return RevenueRows.from_records(cur)
+
+    def balance_continuity(self, ym):
+        """
+        ym의 song cost 전월 잔액 vs 지난달 당월 잔액 (지난달 song cost가 원장에 없으면 None).
+
+        반환: {"prev_ym", "checked": 비교한 아티스트 수,
+               "mismatches": [{"artist", "전월잔액", "지난달_당월잔액", "차이"}, ...]}
+          한쪽 달에만 있는 아티스트는 없는 쪽을 0으로 보고 비교 (표시는 None)
+        """
+        prev_ym = previous_ym(ym)
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM ingests WHERE kind = 'song cost' AND ym = ?", (prev_ym,)).fetchone() is None:
+                return None
+            current = dict(conn.execute("SELECT artist, prev FROM song_cost WHERE ym = ? ORDER BY seq", (ym,)))
+            last = dict(conn.execute("SELECT artist, remain FROM song_cost WHERE ym = ? ORDER BY seq", (prev_ym,)))
+
+        mismatches = []
+        for artist in {**current, **last}:
+            prev, remain = current.get(artist), last.get(artist)
+            if not almost_equal(prev or 0.0, remain or 0.0):
+                mismatches.append({"artist": artist, "전월잔액": prev, "지난달_당월잔액": remain,
+                                   "차이": (prev or 0.0) - (remain or 0.0)})
+        return {"prev_ym": prev_ym, "checked": len(current.keys() | last.keys()), "mismatches": mismatches}
+
+
+class LedgerRows:
+    """
+    저메모리 모드에서 detail_list 자리에 두는 아티스트 1명의 매출 행 참조.
+    len()은 행 수, load()는 그때 원장에서 읽은 ArtistRows. pickle 되므로 worker 프로세스가 직접 읽음.
+    """
+    __slots__ = ("path", "ym", "artist", "rows")
+
+    def __init__(self, path, ym, artist, rows):
+        self.path = path
+        self.ym = ym
+        self.artist = artist
+        self.rows = rows
+
+    def __len__(self):
+        return self.rows
+
+    def __reduce__(self):
+        return pool_target(LedgerRows), (self.path, self.ym, self.artist, self.rows)
 
-        artist_placeholder.success("모든 아티스트 처리 완료!")
-        progress_bar.progress(1.0)
+    def load(self):
+        return LedgerStore(self.path).artist_revenue(self.ym, self.artist)
 
-    return zip_buf.getvalue()
+
+def load_details(detail_list):
+    """ArtistRows 또는 LedgerRows → ArtistRows"""
+    return detail_list.load() if isinstance(detail_list, LedgerRows) else detail_list
+
+
+# --------------------------------------------------
+# 결과 ZIP (메모리 → 디스크 스풀)
+# --------------------------------------------------
+ZIP_SPOOL_MAX_SIZE = 32 * 1024 * 1024  # 이 크기를 넘으면 임시 파일로 옮겨감
+
+
+def open_zip_spool(max_size=ZIP_SPOOL_MAX_SIZE):
+    """결과 ZIP을 쓸 임시 파일. max_size까지는 메모리, 넘어가면 디스크."""
+    return tempfile.SpooledTemporaryFile(max_size=max_size, mode="w+b", suffix=".zip")
+
+
+# 끝난 작업의 ZIP 스풀은 ?job= 으로 붙은 여러 세션이 같은 파일 객체를 공유하므로,
+# 위치를 옮기는 읽기는 이 lock 안에서만 함 (다운로드가 동시에 눌려도 서로의 seek에 끼어들지 않도록)
+_ZIP_READ_LOCK = threading.Lock()
+
+
+def zip_file_size(zip_file):
+    with _ZIP_READ_LOCK:
+        pos = zip_file.tell()
+        size = zip_file.seek(0, io.SEEK_END)
+        zip_file.seek(pos)
+    return size
+
+
+def read_zip_file(zip_file):
+    """다운로드 버튼 클릭 시에만 호출: 스풀된 ZIP 전체를 bytes로 (Streamlit도 어차피 bytes로 읽어 감)."""
+    with _ZIP_READ_LOCK:
+        zip_file.seek(0)
+        return zip_file.read()
+
+
+ZIP_SAVE_DIR = os.path.join(os.path.expanduser("~"), ".revenue2report", "output")
+
+
+def save_zip_file(zip_file, path, chunk_size=1 << 20):
+    """스풀된 ZIP을 path에 chunk_size씩 복사 (ZIP 전체를 bytes로 만들지 않음). 폴더가 없으면 만듦."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with _ZIP_READ_LOCK, open(path, "wb") as out:
+        zip_file.seek(0)
+        shutil.copyfileobj(zip_file, out, chunk_size)
+        zip_file.seek(0)
+    return path
+
+
+# 파일 종류별 ZIP 압축 방식 (확장자 → compress_type, "*" = 그 외)
+#   .xlsx는 그 자체가 이미 deflate된 ZIP이라 다시 압축해도 거의 줄지 않음
+ZIP_POLICIES = {
+    "auto": {".xlsx": zipfile.ZIP_STORED, "*": zipfile.ZIP_DEFLATED},
+    "deflated": {"*": zipfile.ZIP_DEFLATED},
+    "stored": {"*": zipfile.ZIP_STORED},
+}
+
+
+def entry_compression(name, policy):
+    rules = ZIP_POLICIES[policy]
+    return rules.get(os.path.splitext(name)[1].lower(), rules["*"])
+
+
+class ZipPackager:
+    """
+    결과 ZIP 기록 전담 스레드.
+
+    렌더링 쪽은 완성된 (파일명, bytes)를 put()으로 넘기기만 하고,
+    압축과 기록은 별도 스레드가 받은 순서대로 처리한다.
+    (zlib은 압축 중 GIL을 놓기 때문에 렌더링과 실제로 겹쳐서 돌아감)
+
+    flush() / close() 후 stats:
+      {"policy", "level", "entries", "raw_bytes", "zip_bytes", "cpu_sec"}
+      cpu_sec = ZIP 항목 압축/기록에 쓴 CPU 시간
+                (압축/기록 스레드 + open_entry 스트림의 write / close를 호출한 스레드에서 쓴 시간)
+    """
+
+    def __init__(self, zip_file, policy="auto", level=6, max_pending=8):
+        self.zf = zipfile.ZipFile(zip_file, mode="w", allowZip64=True)
+        self.policy = policy
+        self.level = level
+        self.stats = {"policy": policy, "level": level, "entries": 0,
+                      "raw_bytes": 0, "zip_bytes": 0, "cpu_sec": 0.0}
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._thread_cpu = 0.0  # 압축/기록 스레드
+        self._entry_cpu = 0.0   # open_entry 스트림 (호출한 스레드에서 압축/기록)
+        self._thread = threading.Thread(target=self._run, name="zip-packager", daemon=True)
+        self._thread.start()
+
+    def put(self, name, data):
+        if self._error is not None:
+            raise self._error
+        self._queue.put((name, data))
+
+    def open_entry(self, name):
+        """
+        name 항목에 호출한 스레드가 직접 쓰는 스트림 (with 문으로 사용).
+        중간 버퍼 없이 wb.save(stream)로 바로 ZIP 항목에 직렬화할 때 사용.
+        앞서 put()된 항목을 모두 기록한 뒤에 열리므로 항목 순서는 유지됨.
+        """
+        self._queue.join()
+        if self._error is not None:
+            raise self._error
+        compress_type = entry_compression(name, self.policy)
+        self.zf.compression = compress_type
+        self.zf.compresslevel = self.level if compress_type == zipfile.ZIP_DEFLATED else None
+        return TimedEntry(self.zf.open(name, mode="w"), self)
+
+    def flush(self):
+        """put()된 항목을 모두 기록할 때까지 기다린 뒤, 지금까지의 stats 사본을 반환."""
+        self._queue.join()
+        if self._error is not None:
+            raise self._error
+        self._update_sizes()
+        return dict(self.stats)
+
+    def add_entry_cpu(self, sec):
+        self._entry_cpu += sec
+
+    def _update_sizes(self):
+        self.stats["cpu_sec"] = self._thread_cpu + self._entry_cpu
+        infos = self.zf.infolist()
+        self.stats["entries"] = len(infos)
+        self.stats["raw_bytes"] = sum(i.file_size for i in infos)
+        self.stats["zip_bytes"] = sum(i.compress_size for i in infos)
+
+    def _run(self):
+        cpu_start = time.thread_time()
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    break
+                if self._error is not None:
+                    continue  # 오류 이후 들어온 항목은 버리고 종료 신호만 기다림
+                name, data = item
+                compress_type = entry_compression(name, self.policy)
+                self.zf.writestr(name, data, compress_type=compress_type,
+                                 compresslevel=self.level if compress_type == zipfile.ZIP_DEFLATED else None)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._thread_cpu = time.thread_time() - cpu_start
+                self._queue.task_done()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+        self.zf.close()
+        self._update_sizes()
+        if self._error is not None:
+            raise self._error
+
+
+class TimedEntry:
+    """
+    ZipPackager.open_entry가 돌려주는 ZIP 항목 스트림.
+    write()와 close()(= 항목 압축 + 기록)에 쓴 CPU 시간만 packager의 cpu_sec에 더함 (Workbook 직렬화 시간은 제외).
+    tell / seek가 없으므로 zipfile.ZipFile(stream, "w")로 감싸면 seek 없는 스트림으로 기록됨.
+    """
+
+    def __init__(self, entry, packager):
+        self._entry = entry
+        self._packager = packager
+
+    def write(self, data):
+        t = time.thread_time()
+        try:
+            return self._entry.write(data)
+        finally:
+            self._packager.add_entry_cpu(time.thread_time() - t)
+
+    def flush(self):
+        self._entry.flush()
+
+    def close(self):
+        t = time.thread_time()
+        try:
+            self._entry.close()
+        finally:
+            self._packager.add_entry_cpu(time.thread_time() - t)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --------------------------------------------------
+# 아티스트별 렌더링 (프로세스 풀 worker에서도 그대로 호출)
+# --------------------------------------------------
+def build_report_lists(ym, cost_data, detail_list):
+    """
+    detail_list(ArtistRows) + cost_data → 정산서 4개 섹션 입력
+    (service_rows, album_list, deduction_list, rate_list)
+    """
+    # (음원 서비스별) 세부 행을 복사하지 않고 그대로 쓰고, 기간만 붙임
+    service_rows = {"rows": detail_list, "year": ym[:4], "month": ym[4:]}
+
+    # (앨범별) album_list
+    #   album 코드별 revenue 합산 (처음 나온 순서) → 앨범명
+    album_sums = defaultdict(float)
+    for code, revenue in zip(detail_list.codes("album"), detail_list.revenues):
+        album_sums[code] += revenue
+    album_names = detail_list.labels("album")
+    album_dict = {album_names[code]: amt for code, amt in album_sums.items()}
+    album_list = []
+    for alb, amt in album_dict.items():
+        album_list.append({
+            "album": alb,
+            "year": ym[:4],
+            "month": ym[4:],
+            "revenue": amt
+        })
+
+    # (공제 내역) deduction_list
+    #   cost_data["전월잔액"], cost_data["당월차감액"], cost_data["당월잔액"]
+    #   after_deduct = (album합계 - 당월차감액) 등
+    total_album_sum = sum(album_dict.values())
+    after_deduct = total_album_sum - cost_data["당월차감액"]
+    ded_list = [{
+        "album": ", ".join(album_dict.keys()) if album_dict else "(앨범 없음)",
+        "prev_cost": cost_data["전월잔액"],
+        "deduct_cost": cost_data["당월차감액"],
+        "remain_cost": cost_data["당월잔액"],
+        "after_deduct": after_deduct
+    }]
+
+    # (수익 배분) rate_list
+    #   rate = cost_data["정산요율"]
+    #   applied_amount = after_deduct * (rate/100)
+    applied_amount = after_deduct * (cost_data["정산요율"]/100.0)
+    rate_list = [{
+        "album": ", ".join(album_dict.keys()) if album_dict else "(앨범 없음)",
+        "rate": cost_data["정산요율"],
+        "applied_amount": applied_amount
+    }]
+
+    return service_rows, album_list, ded_list, rate_list
+
+
+def render_artist_workbooks(artist, ym, cost_data, detail_list, detail_backend="openpyxl"):
+    """
+    아티스트 1명의 (ZIP 내 파일명, Workbook)을 하나씩 생성 (generator).
+      1) 세부매출내역 (DETAIL_BACKENDS[detail_backend])
+      2) 정산서 (정산서 골격 복사 + write_*_table)
+    저장은 호출 측에서 한 번만 함. detail_list가 LedgerRows(저메모리 모드)면 여기서 원장에서 읽음.
+    """
+    detail_list = load_details(detail_list)
+    yield f"{artist}(세부매출내역).xlsx", DETAIL_BACKENDS[detail_backend](artist, ym, detail_list)
+
+    service_rows, album_list, ded_list, rate_list = build_report_lists(ym, cost_data, detail_list)
+    report_wb = create_report_excel(
+        artist,
+        service_rows,
+        album_list,
+        ded_list,
+        rate_list
+    )
+    yield f"{artist}(정산서).xlsx", report_wb
+
+
+def render_artist(job, write, record):
+    """
+    job(= render_artist_workbooks 인자)의 Workbook을 하나씩 write(name, wb)로 넘김.
+    record(RunMetrics.artist)에 Workbook 생성(render_sec)과 저장(save_sec) 시간을 나눠서 더함.
+    """
+    t_render = time.perf_counter()
+    for name, wb in render_artist_workbooks(*job):
+        t_save = time.perf_counter()
+        record["render_sec"] += t_save - t_render
+        write(name, wb)
+        t_render = time.perf_counter()
+        record["save_sec"] += t_render - t_save
+
+
+RENDER_IN_FLIGHT_PER_WORKER = 2  # ZIP에 아직 기록하지 않은 아티스트 수 상한 (worker당)
+
+
+def render_artist_files(artist, ym, cost_data, detail_list, detail_backend="openpyxl", trace_memory=False):
+    """
+    프로세스 풀 worker용: 두 파일을 bytes로 직렬화해서
+    ([(ZIP 내 파일명, xlsx bytes), ...], 아티스트 지표 dict) 로 반환
+    (프로세스 경계를 넘기려면 bytes가 필요).
+    """
+    files = []
+
+    def write(name, wb):
+        buf = io.BytesIO()
+        wb.save(buf)
+        files.append((name, buf.getvalue()))
+
+    metrics = RunMetrics(trace_memory)
+    metrics.start()
+    try:
+        with metrics.artist(artist, len(detail_list), ym) as record:
+            render_artist((artist, ym, cost_data, detail_list, detail_backend), write, record)
+    finally:
+        metrics.stop()
+    return files, record
+
+
+def pool_target(func):
+    """
+    프로세스 풀(spawn)에 넘길 함수를 import 가능한 모듈 경로로 바꿔서 반환.
+    Streamlit은 이 파일을 __main__ 으로 실행하므로, 그대로 넘기면 worker가 함수를 찾지 못함.
+    """
+    if func.__module__ != "__main__":
+        return func
+    module = importlib.import_module(os.path.splitext(os.path.basename(__file__))[0])
+    return getattr(module, func.__name__)
+
+
+# --------------------------------------------------
+# 검증 결과 표 (컬럼 단위 보관)
+# --------------------------------------------------
+#   세부매출 검증은 매출 행 수만큼 쌓이므로 행마다 dict를 만들지 않고
+#   컬럼별 배열(array)에 바로 이어 붙인다. 문자열 컬럼은 값 → 코드 사전으로 인코딩.
+#   불일치 수는 추가할 때 집계해 두고, 화면에는 select()로 고른 행 중 한 페이지만 take()로 풀어서 보여 준다.
+#   저메모리 모드에서는 컬럼 배열 자체를 임시 파일(SpilledArray)에 쌓는다.
+class SpilledArray:
+    """array.array처럼 extend / frombytes / len / tobytes를 지원하고, 내용은 이름 없는 임시 파일에 쌓는 배열."""
+
+    def __init__(self, typecode):
+        self.typecode = typecode
+        self.itemsize = array(typecode).itemsize
+        self._file = tempfile.TemporaryFile()
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    def frombytes(self, data):
+        self._file.seek(0, os.SEEK_END)
+        self._file.write(data)
+        self._len += len(data) // self.itemsize
+
+    def extend(self, values):
+        self.frombytes(array(self.typecode, values).tobytes())
+
+    def tobytes(self):
+        self._file.seek(0)
+        return self._file.read()
+
+
+class VerificationTable:
+    """
+    아티스트 | 라벨 컬럼들 | 원본_{value_name} | {written_name}_{value_name} | match_{value_name}
+
+      table.extend(artist, {"앨범": [...], "서비스명": [...]}, original, written, match)
+      table.rows / table.mismatches / table.artist_mismatches   (바로 조회 가능)
+      table.select(artist, mismatches_only) → 행 번호 (불일치 먼저), table.take(행 번호) → 그 행들만 DataFrame
+      table.frame()   → 전체 pandas DataFrame (라벨 컬럼은 category)
+
+    spill=True면 컬럼 배열을 임시 파일에 쌓음 (라벨 값 → 코드 사전과 집계 값만 메모리에 남음).
+    """
+
+    def __init__(self, labels, value_name, written_name="엑셀", spill=False):
+        self.labels = ("아티스트",) + tuple(labels)
+        self.columns = self.labels + (
+            f"원본_{value_name}", f"{written_name}_{value_name}", f"match_{value_name}"
+        )
+        new_array = SpilledArray if spill else array
+        self._codes = {name: new_array("i") for name in self.labels}
+        self._categories = {name: {} for name in self.labels}
+        self._original = new_array("d")
+        self._written = new_array("d")
+        self._match = new_array("b")
+        self.rows = 0
+        self.mismatches = 0
+        self.artist_mismatches = {}   # {artist: 불일치 행 수}, 불일치가 있는 아티스트만
+        self._frame = None
+        self._category_lists = {}     # take()용 코드 → 값 list (extend 하면 다시 만듦)
+
+    def __len__(self):
+        return self.rows
+
+    def _encode(self, name, values):
+        cats = self._categories[name]
+        self._codes[name].extend(cats.setdefault(v, len(cats)) for v in values)
+
+    def extend(self, artist, labels, original, written, match):
+        """
+        아티스트 1명 분량을 한 번에 추가.
+        labels: {라벨 컬럼: 값 list} (값 하나면 모든 행에 같은 값)
+        original / written: float64 배열, match: bool 배열 (길이 같음)
+        """
+        n = len(match)
+        if not n:
+            return
+        for name in self.labels:
+            values = artist if name == "아티스트" else labels[name]
+            if isinstance(values, (list, tuple)):
+                self._encode(name, values)
+            else:
+                cats = self._categories[name]
+                self._codes[name].frombytes((array("i", [cats.setdefault(values, len(cats))]) * n).tobytes())
+        self._original.frombytes(original.astype("float64").tobytes())
+        self._written.frombytes(written.astype("float64").tobytes())
+        self._match.frombytes(match.astype("int8").tobytes())
+
+        bad = n - int(match.sum())
+        self.rows += n
+        if bad:
+            self.mismatches += bad
+            self.artist_mismatches[artist] = self.artist_mismatches.get(artist, 0) + bad
+        self._frame = None
+        self._category_lists = {}
+
+    def artists(self):
+        """추가된 순서대로 아티스트 목록"""
+        return list(self._categories["아티스트"])
+
+    def _column(self, name):
+        """
+        배열 → numpy view (복사 없음). view가 살아 있는 동안 array는 extend할 수 없으므로
+        호출한 쪽에서는 바로 비교/색인해서 새 배열을 만들고 view 자체는 들고 있지 않음.
+        """
+        import numpy as np
+
+        values = self._codes[name] if name in self._codes else getattr(self, name)
+        dtype = f"i{values.itemsize}" if name in self._codes else "int8" if name == "_match" else "float64"
+        return np.frombuffer(values if isinstance(values, array) else values.tobytes(), dtype=dtype)
+
+    def select(self, artist=None, mismatches_only=False):
+        """
+        조건에 맞는 행 번호 (numpy 배열). 불일치 행이 먼저, 그 안에서는 추가된 순서.
+        artist: None이면 전체, mismatches_only: 불일치 행만
+        """
+        import numpy as np
+
+        bad = self._column("_match") == 0
+        if artist is not None:
+            code = self._categories["아티스트"].get(artist)
+            if code is None:
+                return np.empty(0, dtype=np.intp)
+            mine = self._column("아티스트") == code
+            first = np.flatnonzero(bad & mine)
+            rest = None if mismatches_only else np.flatnonzero(~bad & mine)
+        else:
+            first = np.flatnonzero(bad)
+            rest = None if mismatches_only else np.flatnonzero(~bad)
+        return first if rest is None else np.concatenate([first, rest])
+
+    def take(self, rows):
+        """행 번호 배열 → 그 행들만 담은 DataFrame (index = 행 번호). 페이지 단위 표시용."""
+        import pandas as pd
+
+        data = {}
+        for name in self.labels:
+            values = self._category_lists.get(name)
+            if values is None:
+                values = self._category_lists[name] = list(self._categories[name])
+            data[name] = [values[c] for c in self._column(name)[rows]]
+        original, written, match = self.columns[-3:]
+        data[original] = self._column("_original")[rows]
+        data[written] = self._column("_written")[rows]
+        data[match] = self._column("_match")[rows].astype(bool)
+        return pd.DataFrame(data, columns=list(self.columns), index=rows)
+
+    def frame(self):
+        """컬럼 배열 → DataFrame (캐시. extend 하면 다시 만듦)"""
+        if self._frame is None:
+            import pandas as pd
+
+            data = {}
+            for name in self.labels:
+                data[name] = pd.Categorical.from_codes(
+                    self._column(name).copy(), categories=pd.Index(list(self._categories[name]), dtype=object)
+                )
+            original, written, match = self.columns[-3:]
+            data[original] = self._column("_original").copy()
+            data[written] = self._column("_written").copy()
+            data[match] = self._column("_match").astype(bool)
+            self._frame = pd.DataFrame(data, columns=list(self.columns))
+        return self._frame
+
+
+def record_verification(check_dict, name, artist, labels, original, written, tol=1e-3):
+    """
+    아티스트 1명의 검증 결과(원본 값 vs 파일에 쓴 값)를 check_dict["details_verification"][name]에 추가.
+    비교는 numpy로 한 번에 (almost_equal과 같은 허용오차). 불일치 행 수를 반환하고,
+    불일치가 있으면 verification_summary도 같이 갱신.
+    """
+    import numpy as np
+
+    original = np.asarray(original, dtype="float64")
+    written = np.asarray(written, dtype="float64")
+    match = np.abs(original - written) < tol
+    table = check_dict["details_verification"][name]
+    before = table.mismatches
+    table.extend(artist, labels, original, written, match)
+    bad = table.mismatches - before
+    if bad:
+        check_dict["verification_summary"]["total_errors"] += bad
+        check_dict["verification_summary"]["artist_error_list"].append(artist)
+    return bad
+
+
+# --------------------------------------------------
+# 생성 파일 재검증 (ZIP에서 다시 읽어 원본과 비교)
+# --------------------------------------------------
+#   ZIP에 들어간 (정산서) / (세부매출내역) xlsx를 다시 열어서 (시트 XML을 읽기만 함)
+#   파일에 실제로 적힌 값(합계, 공제/배분 값, 세부 행 금액)을 원본 데이터로 계산한 값과 비교.
+#   읽기는 worker에서, 비교는 부모 프로세스에서 아티스트 단위로 한 번에 (record_verification).
+VERIFY_FILE_KINDS = ("정산서", "세부매출내역")
+
+# 정산서 섹션 제목(write_*_table) → 검증 표의 구분
+REPORT_SECTION_TITLES = {
+    "1) 음원 서비스별 정산내역": "음원 서비스별",
+    "2) 앨범별 정산 내역": "앨범별",
+    "3) 공제 내역": "공제 내역",
+    "4) 수익 배분": "수익 배분",
+}
+VERIFY_IN_FLIGHT_PER_WORKER = 4  # 풀에 한 번에 넘기는 아티스트 수 (ZIP 항목 bytes를 메모리에 쌓지 않도록)
+
+
+def read_back_number(value):
+    """파일에서 읽은 셀 값 → float (숫자가 아니거나 비어 있으면 nan → 항상 불일치)."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return float("nan")
+
+
+def read_back_percent(value):
+    """수익 배분율 셀("70%", "70.0%") → 70.0"""
+    if isinstance(value, str) and value.endswith("%"):
+        try:
+            return float(value[:-1])
+        except ValueError:
+            pass
+    return float("nan")
+
+
+def xlsx_sheet_rows(data, max_col):
+    """
+    xlsx bytes의 첫 시트 → 행마다 A~max_col열 값 tuple (빈 셀은 None) generator. XML에 있는 행만.
+
+    openpyxl load_workbook(read_only)은 파일마다 스타일 시트 등을 전부 읽고 빈 서식 셀도 셀 객체로 만들어서
+    작은 파일 수천 개를 읽으면 생성하는 시간만큼 걸림. 재검증에는 값만 필요하므로 시트 XML을 직접 읽음.
+    (공유 문자열 / inline 문자열 / 숫자 / bool. 수식은 저장된 결과 값)
+    """
+    from xml.etree.ElementTree import fromstring
+    from openpyxl.utils import get_column_letter
+
+    ns = "{%s}" % SHEET_MAIN_NS
+    row_tag, cell_tag, value_tag, text_tag = ns + "row", ns + "c", ns + "v", ns + "t"
+    columns = {get_column_letter(i): i - 1 for i in range(1, max_col + 1)}
+    digits = "0123456789"
+
+    # 아티스트 1명 분량이라 시트 전체를 한 번에 트리로 만듦 (이벤트마다 Python으로 돌아오지 않음)
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        names = zf.namelist()
+        strings = []
+        if "xl/sharedStrings.xml" in names:
+            strings = ["".join(t.text or "" for t in si.iter(text_tag))
+                       for si in fromstring(zf.read("xl/sharedStrings.xml"))]
+        sheet = min(n for n in names if n.startswith("xl/worksheets/sheet") and n.endswith(".xml"))
+        root = fromstring(zf.read(sheet))
+
+    for el in root.iter(row_tag):
+        values = [None] * max_col
+        for c in el.iter(cell_tag):
+            col = columns.get(c.get("r", "").rstrip(digits))
+            if col is None:
+                continue
+            kind = c.get("t", "n")
+            if kind == "inlineStr":
+                values[col] = "".join(t.text or "" for t in c.iter(text_tag))
+                continue
+            v = c.find(value_tag)
+            if v is None or v.text is None:
+                continue
+            if kind == "s":
+                values[col] = strings[int(v.text)]
+            elif kind == "n":
+                values[col] = float(v.text)
+            elif kind == "b":
+                values[col] = v.text == "1"
+            else:
+                values[col] = v.text
+        yield tuple(values)
+
+
+def read_back_report(data):
+    """
+    (정산서).xlsx bytes → {(구분, 항목): 파일에 적힌 값}
+    행 번호가 아니라 B열의 섹션 제목 / "합계" / "총 정산금액" 표시로 위치를 찾음.
+    """
+    values = {}
+    section, header, count, total = None, False, 0, 0.0
+    for _, b, c, d, _, f, g in xlsx_sheet_rows(data, 7):
+        if b in REPORT_SECTION_TITLES:
+            section, header, count, total = REPORT_SECTION_TITLES[b], True, 0, 0.0
+            continue
+        if section is None:
+            continue
+        if header:
+            header = False
+            continue
+        if section in ("음원 서비스별", "앨범별"):
+            if b == "합계":
+                values[section, "행 수"] = count
+                values[section, "행 합계"] = total
+                values[section, "합계"] = read_back_number(g)
+                section = None
+            else:
+                count += 1
+                total += read_back_number(g)
+        elif section == "공제 내역":
+            values[section, "곡비"] = read_back_number(c)
+            values[section, "공제 금액"] = read_back_number(d)
+            values[section, "공제 후 남은 곡비"] = read_back_number(f)
+            values[section, "공제 적용 금액"] = read_back_number(g)
+            section = None
+        elif b == "총 정산금액":
+            values[section, "총 정산금액"] = read_back_number(g)
+            section = None
+        else:
+            values[section, "적용율"] = read_back_percent(d)
+            values[section, "적용 금액"] = read_back_number(g)
+    return values
+
+
+def read_back_detail(data):
+    """
+    (세부매출내역).xlsx bytes → (본문 G열 금액 array("d"), 합계행 금액)
+    첫 행은 헤더, 마지막 행은 합계행.
+    """
+    revenues = array("d")
+    total = float("nan")
+    rows = xlsx_sheet_rows(data, 7)
+    next(rows, None)  # 헤더
+    prev = None
+    for row in rows:
+        if prev is not None:
+            revenues.append(read_back_number(prev[6]))
+        prev = row
+    if prev is not None and prev[0] == "합계":
+        total = read_back_number(prev[6])
+    elif prev is not None:
+        revenues.append(read_back_number(prev[6]))
+    return revenues, total
+
+
+def read_back_artist(entries):
+    """
+    worker용: {파일 종류: xlsx bytes 또는 None(ZIP에 없음)} →
+    ({(구분, 항목): 값}, 세부 행 금액 array("d"))
+    """
+    values = {}
+    revenues = array("d")
+    if entries.get("정산서") is not None:
+        values.update(read_back_report(entries["정산서"]))
+    if entries.get("세부매출내역") is not None:
+        revenues, total = read_back_detail(entries["세부매출내역"])
+        values["세부매출내역", "행 수"] = len(revenues)
+        values["세부매출내역", "합계"] = total
+    return values, revenues
+
+
+def expected_report_values(cost_data, detail_list):
+    """원본(cost_data + detail_list)으로 계산한 {(구분, 항목): 파일에 적혀야 하는 값}"""
+    total = sum(detail_list.revenues)
+    albums = set(detail_list.codes("album"))
+    after_deduct = total - cost_data["당월차감액"]
+    applied = after_deduct * (cost_data["정산요율"] / 100.0)
+    return {
+        ("음원 서비스별", "행 수"): len(detail_list),
+        ("음원 서비스별", "행 합계"): total,
+        ("음원 서비스별", "합계"): total,
+        ("앨범별", "행 수"): len(albums),
+        ("앨범별", "행 합계"): total,
+        ("앨범별", "합계"): total,
+        ("공제 내역", "곡비"): cost_data["전월잔액"],
+        ("공제 내역", "공제 금액"): cost_data["당월차감액"],
+        ("공제 내역", "공제 후 남은 곡비"): cost_data["당월잔액"],
+        ("공제 내역", "공제 적용 금액"): after_deduct,
+        ("수익 배분", "적용율"): cost_data["정산요율"],
+        ("수익 배분", "적용 금액"): applied,
+        ("수익 배분", "총 정산금액"): applied,
+        ("세부매출내역", "행 수"): len(detail_list),
+        ("세부매출내역", "합계"): total,
+    }
+
+
+def record_read_back(check_dict, artist, cost_data, detail_list, values, revenues):
+    """read_back_artist 결과를 원본과 비교해서 검증 표 두 개에 기록. 반환: 불일치 수"""
+    detail_list = load_details(detail_list)
+    expected = expected_report_values(cost_data, detail_list)
+    keys = list(expected)
+    nan = float("nan")
+    bad = record_verification(
+        check_dict, "정산서", artist,
+        {"구분": [k[0] for k in keys], "항목": [k[1] for k in keys]},
+        [expected[k] for k in keys], [values.get(k, nan) for k in keys],
+    )
+
+    # 세부 행은 순서대로 1:1 비교 (행 수가 다르면 모자란 쪽을 nan으로 채워 불일치로 남김)
+    n = max(len(detail_list), len(revenues))
+    extra = n - len(detail_list)
+    written = list(revenues) + [nan] * (n - len(revenues))
+    bad += record_verification(
+        check_dict, "세부매출", artist,
+        {"구분": "세부매출내역",
+         "앨범": detail_list.albums + [""] * extra,
+         "서비스명": detail_list.services + [""] * extra},
+        detail_list.revenues + array("d", [nan] * extra), written,
+    )
+    return bad
+
+
+def verify_zip(zip_file, jobs, check_dict, pool, workers, ratio, seed, reporter):
+    """
+    ZIP의 아티스트별 xlsx를 다시 읽어 검증 (jobs = [(ZIP 안 폴더, render_artist_workbooks 인자), ...]).
+    ratio < 1이면 아티스트 중 일부만 무작위로 (seed가 같으면 같은 아티스트).
+    run_metrics.json 등 xlsx가 아닌 항목은 jobs에 없으므로 읽지 않음.
+    검증 표의 아티스트는 ZIP 안 경로 기준 (여러 달이면 "YYYYMM/아티스트").
+
+    반환: {"ratio", "artists"(검증한 수), "errors"(불일치 수)}
+    """
+    import random
+
+    picked = range(len(jobs))
+    if ratio < 1.0:
+        k = min(len(jobs), max(1, round(len(jobs) * ratio)))
+        picked = sorted(random.Random(seed).sample(picked, k))
+
+    errors = 0
+    zip_file.seek(0)
+    with zipfile.ZipFile(zip_file) as zf:
+        names = set(zf.namelist())
+
+        def entries(i):
+            folder, job = jobs[i]
+            paths = {kind: f"{folder}{job[0]}({kind}).xlsx" for kind in VERIFY_FILE_KINDS}
+            return {kind: zf.read(path) if path in names else None for kind, path in paths.items()}
+
+        def record(i, result):
+            nonlocal errors
+            folder, (artist, _, cost_data, detail_list, _) = jobs[i]
+            bad = record_read_back(check_dict, f"{folder}{artist}", cost_data, detail_list, *result)
+            errors += bad
+            reporter.artist_verified(f"{folder}{artist}", bad)
+            reporter.progress(done / len(picked), f"[검증 {done}/{len(picked)}] {folder}{artist}")
+
+        if pool is None:
+            for done, i in enumerate(picked, start=1):
+                record(i, read_back_artist(entries(i)))
+        else:
+            # ZIP 항목 bytes를 한꺼번에 꺼내 두지 않도록 풀에 넘겨 둔 작업 수를 제한
+            read_back = pool_target(read_back_artist)
+            pending = {}
+            done = 0
+            for i in picked:
+                if len(pending) >= workers * VERIFY_IN_FLIGHT_PER_WORKER:
+                    fut = next(as_completed(pending))
+                    done += 1
+                    record(pending.pop(fut), fut.result())
+                pending[pool.submit(read_back, entries(i))] = i
+            for fut in as_completed(list(pending)):
+                done += 1
+                record(pending.pop(fut), fut.result())
+    zip_file.seek(0)
+    return {"ratio": ratio, "artists": len(picked), "errors": errors}
+
+
+# --------------------------------------------------
+# 저메모리 모드 (입력 행 / 검증 행을 디스크에 두고 아티스트 단위로 읽음)
+# --------------------------------------------------
+#   memory_budget_mb를 주면
+#     - online revenue 행은 RevenueRows로 모으지 않고 원장(SQLite) 파일에 바로 저장, 아티스트 행은 렌더링 직전에 읽음
+#     - 검증 표 컬럼은 임시 파일에, ZIP 스풀은 예산에 맞춰 더 일찍 디스크로
+#     - workers는 1로 고정 (최대 RSS는 이 프로세스만 재므로 worker 프로세스 메모리가 예산 검증에서 빠지지 않도록)
+LOW_MEMORY_CHUNK_ROWS = 50_000           # CSV / Parquet을 나눠 읽는 행 수
+LOW_MEMORY_ZIP_SPOOL_RATIO = 8           # ZIP 스풀 최대 크기 = 예산 / 8
+
+
+def spill_revenue(yms, file, ledger, spill, metrics):
+    """
+    저메모리 모드의 online revenue 적재 → {ym: {아티스트: LedgerRows}}.
+    파싱한 행은 spill(LedgerStore)에 바로 저장하고 아티스트별 행 수만 메모리에 남김.
+    ledger가 있으면 spill은 ledger 자체이고, 같은 파일(sha256)로 저장된 달은 다시 읽지 않음.
+    """
+    label = "online revenue"
+    if file is None and ledger is None:
+        raise IngestError(f"[{label}] 입력 파일이 없습니다.")
+    counts = {}
+    todo = [] if file is None else list(yms)
+    digest = file_digest(file) if file is not None and ledger is not None else None
+    if ledger is not None:
+        with metrics.stage(f"ingest.{label}.ledger"):
+            for ym in yms:
+                if file is None or ledger.digest(label, ym) == digest:
+                    counts[ym] = ledger.revenue_counts(ym)
+        todo = [ym for ym in todo if ym not in counts]
+    if todo:
+        with metrics.stage(f"ingest.{label}"):
+            counts.update(spill.save_records(
+                todo, iter_revenue_month_records(file, todo, LOW_MEMORY_CHUNK_ROWS, metrics), digest
+            ))
+    return {
+        ym: {artist: LedgerRows(spill.path, ym, artist, rows) for artist, rows in counts[ym].items()}
+        for ym in yms
+    }
+
+
+def memory_summary(budget_mb, start_peak):
+    """
+    run_summary["memory"] → {"budget_mb", "peak_rss_mb"(현재 프로세스, 알 수 없으면 None), "scoped", "over_budget"}
+
+    최대 RSS는 프로세스 시작 이후의 값이라, 실행 시작 때의 값(start_peak)과 비교해서 이번 실행으로 판정할 수 있을 때만
+    over_budget을 True / False로 줌.
+      - 실행 중 최대치가 올라갔으면 그 값이 이번 실행의 최대치 (scoped=True, CLI / 벤치마크 subprocess는 보통 이 경우)
+      - 그대로인데 시작 때 값이 예산 이하면 이번 실행도 예산 이하 (over_budget=False)
+      - 그 외 (계속 떠 있는 Streamlit 서버에서 이전 실행이 더 컸던 경우)는 알 수 없음 (over_budget=None)
+    """
+    peak = peak_rss_bytes()
+    if peak is None or start_peak is None:
+        return {"budget_mb": budget_mb, "peak_rss_mb": None, "scoped": False, "over_budget": None}
+    peak_mb = peak / (1024 * 1024)
+    scoped = peak > start_peak
+    if scoped:
+        over_budget = peak_mb > budget_mb
+    else:
+        over_budget = False if peak_mb <= budget_mb else None
+    return {"budget_mb": budget_mb, "peak_rss_mb": peak_mb, "scoped": scoped, "over_budget": over_budget}
+
+
+# --------------------------------------------------
+# 보고서 생성 (엑셀 기반)
+# --------------------------------------------------
+def new_verification_tables(spill=False):
+    """check_dict["details_verification"]의 빈 검증 표 두 개 (spill=True면 컬럼을 임시 파일에 쌓음)."""
+    return {
+        "정산서": VerificationTable(["구분", "항목"], "값", spill=spill),
+        "세부매출": VerificationTable(["구분", "앨범", "서비스명"], "매출액", spill=spill)
+    }
+
+
+def new_check_dict():
+    """generate_report_excel에 넘길 빈 검증용 딕셔너리."""
+    return {
+        "song_artists": [],
+        "revenue_artists": [],
+        "artist_compare_result": {},
+        "verification_summary": {
+            "total_errors": 0,
+            "artist_error_list": []
+        },
+        "details_verification": new_verification_tables()
+    }
+
+
+def parse_ym_list(text):
+    """
+    진행기간 입력 → 정렬된 YYYYMM 목록 (중복 제거).
+      "202410"                 → ["202410"]
+      "202401-202403, 202406"  → ["202401", "202402", "202403", "202406"]  (범위는 "-" 또는 "~")
+    형식이 틀리면 ValueError (메시지는 그대로 사용자에게 표시).
+    """
+    yms = set()
+    for part in re.split(r"[,\s]+", re.sub(r"\s*[-~]\s*", "-", text.strip())):
+        if not part:
+            continue
+        m = re.fullmatch(r"(\d{6})(?:-(\d{6}))?", part)
+        if not m:
+            raise ValueError(f"진행기간은 YYYYMM 또는 YYYYMM-YYYYMM 형식으로 입력하세요: '{part}'")
+        start, end = m.group(1), m.group(2) or m.group(1)
+        for ym in (start, end):
+            if not 1 <= int(ym[4:]) <= 12:
+                raise ValueError(f"월은 01~12 사이여야 합니다: '{ym}'")
+        if start > end:
+            raise ValueError(f"범위의 시작이 끝보다 늦습니다: '{part}'")
+        year, month = int(start[:4]), int(start[4:])
+        while f"{year}{month:02d}" <= end:
+            yms.add(f"{year}{month:02d}")
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    if not yms:
+        raise ValueError("진행기간을 입력하세요.")
+    return sorted(yms)
+
+
+def file_bytes(file):
+    """업로드 파일(file-like)의 전체 내용 (읽은 뒤 원래 위치로 되돌림)."""
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    pos = file.tell()
+    file.seek(0)
+    data = file.read()
+    file.seek(pos)
+    return data
+
+
+def parse_months_task(label, file, yms):
+    """
+    프로세스 풀 worker용 parse_months → (결과, 오류 메시지).
+    Streamlit에서는 이 파일이 __main__ 이라 worker의 IngestError와 예외 클래스가 달라지므로 메시지로 넘김.
+    """
+    try:
+        return parse_months(label, file, yms), None
+    except IngestError as e:
+        return None, str(e)
+
+
+def ingest_inputs(yms, file_song_cost, file_online_revenue, parse_cache, ledger, pool, workers,
+                  metrics, spill=None):
+    """
+    두 입력 파일에서 yms 각 달을 파싱 → (cost_by_month, revenue_by_month), 각각 {ym: 결과}.
+
+    - parse_cache(메모리)에 있는 달은 다시 읽지 않음
+    - ledger(LedgerStore)가 있으면
+        같은 파일(sha256)로 이미 저장한 달은 파싱 없이 원장에서 읽고, 새로 파싱한 달은 원장에 저장
+        파일이 None이면 (재발행) 그 입력은 원장에 저장된 달만 사용
+    - 파일마다 workbook(또는 CSV/Parquet 표)은 한 번만 열고 남은 달을 차례로 파싱
+    - 여러 달이고 pool이 있으면 파일별로 남은 달을 workers 묶음으로 나눠 두 파일을 동시에 파싱
+      (묶음마다 workbook을 한 번씩 엶)
+    - spill(LedgerStore)이 있으면 (저메모리 모드) online revenue는 spill_revenue로 spill에 흘려 넣고
+      revenue_by_month에는 아티스트별 LedgerRows만 남김 (parse_cache / pool 사용 안 함)
+    """
+    inputs = (("song cost", file_song_cost, SONG_COST_COLUMNS),
+              ("online revenue", file_online_revenue, REVENUE_COLUMNS))
+    found, missing, todo, digests, futures = {}, {}, {}, {}, {}
+    for label, file, columns in inputs:
+        if spill is not None and label == "online revenue":
+            continue
+        if file is None:
+            if ledger is None:
+                raise IngestError(f"[{label}] 입력 파일이 없습니다.")
+            with metrics.stage(f"ingest.{label}.ledger"):
+                found[label] = {ym: ledger.load(label, ym) for ym in yms}
+            missing[label], todo[label] = {}, []
+            continue
+
+        digests[label] = digest = file_digest(file) if parse_cache is not None or ledger is not None else None
+        if parse_cache is None:
+            found[label], missing[label] = {}, dict.fromkeys(yms)
+        else:
+            found[label], missing[label] = parse_cache.lookup(label, file, yms, columns, digest)
+        if ledger is not None:
+            with metrics.stage(f"ingest.{label}.ledger"):
+                for ym in yms:
+                    stored = ledger.digest(label, ym) == digest
+                    if ym in found[label]:
+                        if not stored:  # 원장을 켜기 전에 캐시에만 들어간 달
+                            ledger.save(label, ym, found[label][ym], digest)
+                    elif stored:
+                        found[label][ym] = ledger.load(label, ym)
+        todo[label] = [ym for ym in missing[label] if ym not in found[label]]
+        if pool is not None and len(todo[label]) > 1:
+            data = file if isinstance(file, (str, os.PathLike)) else file_bytes(file)
+            n = min(workers, len(todo[label]))
+            futures[label] = [
+                pool.submit(pool_target(parse_months_task), label, data, todo[label][i::n])
+                for i in range(n)
+            ]
+
+    results = []
+    for label, file, columns in inputs:
+        if spill is not None and label == "online revenue":
+            results.append(spill_revenue(yms, file, ledger, spill, metrics))
+            continue
+        with metrics.stage(f"ingest.{label}"):
+            if label in futures:
+                parsed = {}
+                for fut in futures[label]:
+                    chunk, error = fut.result()
+                    if error is not None:
+                        raise IngestError(error)
+                    parsed.update(chunk)
+            elif todo[label]:
+                parsed = parse_months(label, file, todo[label], metrics)
+            else:
+                parsed = {}
+        if ledger is not None and parsed:
+            with metrics.stage(f"ingest.{label}.ledger"):
+                for ym, value in parsed.items():
+                    ledger.save(label, ym, value, digests[label])
+        found[label].update(parsed)
+        if parse_cache is not None:
+            parse_cache.store(missing[label], found[label])
+        results.append({ym: found[label][ym] for ym in yms})
+    return results
+
+
+def generate_report_excel(ym, report_date, file_song_cost, file_online_revenue, check_dict,
+                          parse_cache=None, workers=1,
+                          zip_spool_size=ZIP_SPOOL_MAX_SIZE, zip_policy="auto", zip_level=6,
+                          reporter=None, trace_memory=False, detail_backend="openpyxl", ledger=None,
+                          verify=0.0, verify_seed=None, memory_budget_mb=None):
+    """
+    업로드된 두 입력 파일(file_song_cost, file_online_revenue)을 파싱 →
+    아티스트별로:
+      1) 세부매출내역(artist).xlsx
+      2) 정산서(artist).xlsx
+    을 각각 생성, ZIP으로 묶어 반환.
+
+    - ym: "YYYYMM"
+    - report_date: "YYYY-MM-DD" (화면에서 입력받지만 지금의 정산서 양식에는 적지 않음. CLI는 None)
+    - file_song_cost: 업로드된 엑셀( song cost.xlsx ) 또는 같은 컬럼의 csv / parquet
+    - file_online_revenue: 업로드된 엑셀( online revenue.xlsx ) 또는 같은 컬럼의 csv / parquet
+    - check_dict: 검증용 딕셔너리 (실제 계산/비교 결과를 저장)
+    - parse_cache: ParseCache (None이면 매번 새로 파싱)
+    - workers: 아티스트별 렌더링 프로세스 수 (1이면 현재 프로세스에서 순차 처리)
+    - zip_spool_size: ZIP을 메모리에 두는 최대 크기. 넘어가면 임시 파일(디스크)로 옮겨감
+    - zip_policy / zip_level: ZIP_POLICIES의 압축 방식, deflate 압축 레벨(1~9)
+    - reporter: ProgressReporter (진행률/오류 표시. None이면 표시 안 함)
+    - trace_memory: 단계별/아티스트별 최대 메모리도 기록 (tracemalloc, 실행이 느려짐)
+    - detail_backend: 세부매출내역 렌더링 방식 (DETAIL_BACKENDS)
+        "openpyxl" = openpyxl write-only (기본)
+        "native"   = SpreadsheetML 직접 작성 (셀 값/스타일은 같고 더 빠름)
+    - ledger: LedgerStore (None이면 사용 안 함)
+        파싱 결과를 원장에 저장하고, 같은 파일로 저장된 달은 원장에서 읽음.
+        입력 파일을 None으로 주면 원장에 저장된 달로 재발행.
+        전월 잔액 vs 지난달 당월 잔액 비교는 check_dict["balance_continuity"]에 저장
+    - verify: ZIP의 xlsx를 다시 읽어 원본과 비교할 아티스트 비율 (0 = 안 함, 1 = 전체)
+        결과는 check_dict["details_verification"] / ["verification_summary"], 요약은 run_summary["verify"]
+    - verify_seed: verify < 1일 때 표본 추출 seed (None이면 매번 다름)
+    - memory_budget_mb: 저메모리 모드의 메모리 예산(MB). None이면 보통 모드
+        online revenue 행은 원장(ledger가 없으면 임시 SQLite 파일)에 흘려 넣고 아티스트마다 그때 읽으며,
+        검증 표는 임시 파일에 쌓고 ZIP 스풀도 예산에 맞춰 줄임 (parse_cache는 song cost만).
+        workers는 1로 고정 (worker 프로세스 메모리는 최대 RSS에 잡히지 않으므로).
+        이 프로세스의 최대 RSS는 run_summary["memory"]에 기록 (예산을 넘으면 over_budget=True,
+        프로세스의 이전 최대치 때문에 이번 실행으로 판정할 수 없으면 None. memory_summary 참고)
+
+    실행 지표(RunMetrics.to_dict())는 check_dict["run_metrics"]와 ZIP 안의 run_metrics.json에 저장.
+
+    반환: ZIP 파일 객체(SpooledTemporaryFile, 처음 위치로 되감긴 상태) or None
+    """
+    return _generate_reports(
+        [ym], False, file_song_cost, file_online_revenue, check_dict, parse_cache,
+        workers, zip_spool_size, zip_policy, zip_level, detail_backend, ledger, reporter, trace_memory,
+        verify, verify_seed, memory_budget_mb
+    )
+
+
+def generate_report_batch(yms, report_date, file_song_cost, file_online_revenue, check_dict,
+                          parse_cache=None, workers=1,
+                          zip_spool_size=ZIP_SPOOL_MAX_SIZE, zip_policy="auto", zip_level=6,
+                          reporter=None, trace_memory=False, detail_backend="openpyxl", ledger=None,
+                          verify=0.0, verify_seed=None, memory_budget_mb=None):
+    """
+    여러 달(yms: ["YYYYMM", ...])의 보고서를 한 번에 생성 → ZIP 하나 (달마다 "YYYYMM/" 폴더).
+    나머지 인자는 generate_report_excel과 같음.
+
+    달마다 따로 실행하는 것과 달리
+      - 두 입력 파일은 각각 한 번만 열어서 요청한 시트를 모두 파싱 (캐시에 있는 달은 건너뜀)
+      - workers > 1이면 프로세스 풀을 한 번만 띄워 파싱과 렌더링에 같이 사용
+        (worker의 스타일 골격/템플릿도 프로세스당 한 번만 생성)
+
+    check_dict["months"][ym]에 달별 아티스트 목록 비교 / 잔액 연속성, run_summary / run_metrics는 전체 기준.
+    """
+    return _generate_reports(
+        list(yms), True, file_song_cost, file_online_revenue, check_dict, parse_cache,
+        workers, zip_spool_size, zip_policy, zip_level, detail_backend, ledger, reporter, trace_memory,
+        verify, verify_seed, memory_budget_mb
+    )
+
+
+def run_report_job(yms, report_date, file_song_cost, file_online_revenue, options, reporter):
+    """
+    JobRegistry용 작업: 한 달이면 generate_report_excel, 여러 달이면 generate_report_batch.
+    반환: 세션에 붙일 {"zip_data", "check_dict"} (실패면 None. 오류 내용은 reporter로 이미 전달됨)
+    """
+    check_dict = new_check_dict()
+    generate = generate_report_excel if len(yms) == 1 else generate_report_batch
+    zip_data = generate(yms[0] if len(yms) == 1 else yms, report_date, file_song_cost, file_online_revenue,
+                        check_dict, reporter=reporter, **options)
+    return None if zip_data is None else {"zip_data": zip_data, "check_dict": check_dict}
+
+
+def _generate_reports(yms, month_folders, file_song_cost, file_online_revenue, check_dict, parse_cache,
+                      workers, zip_spool_size, zip_policy, zip_level, detail_backend, ledger,
+                      reporter, trace_memory, verify, verify_seed, memory_budget_mb):
+    if reporter is None:
+        reporter = ProgressReporter()
+    metrics = RunMetrics(trace_memory)
+    metrics.start()
+    try:
+        with ExitStack() as stack:
+            # 저메모리 모드: online revenue 행을 둘 원장 (원장을 쓰지 않으면 실행이 끝나면 지우는 임시 파일)
+            spill = None
+            if memory_budget_mb is not None:
+                workers = 1
+                spill = ledger or LedgerStore(
+                    os.path.join(stack.enter_context(tempfile.TemporaryDirectory()), "spill.sqlite")
+                )
+            # worker 프로세스는 처음 submit 할 때 뜨므로, 순차 처리(workers=1)면 풀을 만들지 않음
+            pool = stack.enter_context(
+                ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"))
+                if workers > 1 else nullcontext()
+            )
+            return _generate_reports_in_pool(
+                yms, month_folders, file_song_cost, file_online_revenue, check_dict,
+                parse_cache, ledger, workers, pool, zip_spool_size, zip_policy, zip_level, detail_backend,
+                verify, verify_seed, memory_budget_mb, spill, reporter, metrics
+            )
+    finally:
+        metrics.stop()
+
+
+def _generate_reports_in_pool(yms, month_folders, file_song_cost, file_online_revenue, check_dict,
+                              parse_cache, ledger, workers, pool, zip_spool_size, zip_policy,
+                              zip_level, detail_backend, verify, verify_seed, memory_budget_mb, spill,
+                              reporter, metrics):
+    t_start = time.perf_counter()
+    start_peak = None
+    if spill is not None:
+        start_peak = peak_rss_bytes()
+        zip_spool_size = min(zip_spool_size, max(1, memory_budget_mb * 1024 * 1024 // LOW_MEMORY_ZIP_SPOOL_RATIO))
+        if verify > 0:
+            check_dict["details_verification"] = new_verification_tables(spill=True)
+
+    # ---------------------- (A) 엑셀 파싱 ----------------------
+    #   read-only 모드로 필요한 시트만 열고, 행을 하나씩 흘려보내며 dict에 바로 적재
+    #   CSV / Parquet 입력은 pandas로 필요한 컬럼만 한 번에 읽고 컬럼 단위로 정리
+    #   저메모리 모드면 online revenue는 원장 파일로 흘려 넣고 아티스트별 행 수만 남김
+    try:
+        cost_by_month, revenue_by_month = ingest_inputs(
+            yms, file_song_cost, file_online_revenue, parse_cache, ledger, pool, workers, metrics,
+            spill
+        )
+    except IngestError as e:
+        reporter.error(str(e))
+        return None
+    t_ingest = time.perf_counter()
+
+    # ---------------------- (B) 달별 아티스트 목록 비교 (+ 원장 잔액 연속성) ----------------------
+    empty_cost = {"정산요율":0, "전월잔액":0, "당월차감액":0, "당월잔액":0}
+    jobs = []  # [(ZIP 안 폴더, render_artist_workbooks 인자), ...]
+    for ym in yms:
+        artist_cost_dict, artist_revenue_dict = cost_by_month[ym], revenue_by_month[ym]
+        month_check = check_dict
+        if month_folders:
+            month_check = new_check_dict()
+            check_dict.setdefault("months", {})[ym] = month_check
+
+        song_artists = sorted(artist_cost_dict.keys())
+        revenue_artists = sorted(artist_revenue_dict.keys())
+        month_check["song_artists"] = song_artists
+        month_check["revenue_artists"] = revenue_artists
+        month_check["artist_compare_result"] = compare_artists(song_artists, revenue_artists)
+        if ledger is not None:
+            month_check["balance_continuity"] = ledger.balance_continuity(ym)
+
+        # 전체 아티스트(둘 중 하나라도 존재)
+        folder = f"{ym}/" if month_folders else ""
+        jobs.extend(
+            (folder, (artist, ym, artist_cost_dict.get(artist, empty_cost),
+                      artist_revenue_dict.get(artist, NO_REVENUE_ROWS), detail_backend))
+            for artist in sorted(set(song_artists) | set(revenue_artists))
+        )
+
+    # ---------------------- (C) 아티스트별 엑셀 생성 & ZIP ----------------------
+    def write_entry(name, wb):
+        # 각 Workbook을 ZIP 항목 스트림에 바로 저장 (중간 BytesIO 없음)
+        with packager.open_entry(name) as entry:
+            wb.save(entry)
+
+    zip_file = open_zip_spool(zip_spool_size)
+    packager = ZipPackager(zip_file, policy=zip_policy, level=zip_level)
+    try:
+        with metrics.stage("render"):
+            if pool is None:
+                for i, (folder, job) in enumerate(jobs):
+                    reporter.progress((i + 1) / len(jobs), f"[{i+1}/{len(jobs)}] {folder}{job[0]} 처리 중...")
+                    with metrics.artist(job[0], len(job[3]), job[1]) as record:
+                        render_artist(job, lambda name, wb: write_entry(folder + name, wb), record)
+                    reporter.artist_done(folder + job[0], record)
+            else:
+                # 끝나는 순서대로 진행률을 올리되, ZIP에는 항상 달 → 아티스트 순서대로 기록
+                # 앞 아티스트가 늦게 끝나면 뒤 결과가 finished에 쌓이므로, ZIP에 아직 기록하지 않은
+                # 아티스트(실행 중 + 순서 대기)가 workers * RENDER_IN_FLIGHT_PER_WORKER명이 되면 새로 넘기지 않음
+                render = pool_target(render_artist_files)
+                limit = workers * RENDER_IN_FLIGHT_PER_WORKER
+                pending, finished = {}, {}
+                next_idx = done = 0
+
+                def collect(fut):
+                    nonlocal next_idx, done
+                    done += 1
+                    i = pending.pop(fut)
+                    finished[i], record = fut.result()
+                    metrics.artists.append(record)
+                    folder, job = jobs[i]
+                    reporter.artist_done(folder + job[0], record)
+                    reporter.progress(done / len(jobs), f"[{done}/{len(jobs)}] {folder}{job[0]} 완료")
+                    while next_idx in finished:
+                        for name, data in finished.pop(next_idx):
+                            packager.put(jobs[next_idx][0] + name, data)
+                        next_idx += 1
+
+                for i, (_, job) in enumerate(jobs):
+                    while i - next_idx >= limit:
+                        collect(next(as_completed(pending)))
+                    pending[pool.submit(render, *job, metrics.trace_memory)] = i
+                for fut in as_completed(list(pending)):
+                    collect(fut)
+
+        # 실행 지표를 ZIP에 같이 넣음 (이 시점까지의 단계 + ZIP 통계)
+        with metrics.stage("package.flush"):
+            zip_stats = packager.flush()
+        months = {"yms": yms} if month_folders else {"ym": yms[0]}
+        run_metrics = dict(metrics.to_dict(), **months, workers=workers, detail_backend=detail_backend,
+                           zip=zip_stats)
+        packager.put("run_metrics.json", json.dumps(run_metrics, ensure_ascii=False, indent=2).encode("utf-8"))
+
+        reporter.done("모든 아티스트 처리 완료!")
+    finally:
+        with metrics.stage("package.close"):
+            packager.close()
+    t_package = time.perf_counter()
+
+    # ---------------------- (D) 생성 파일 재검증 ----------------------
+    #   닫힌 ZIP에서 xlsx를 다시 읽어 원본과 비교 (run_metrics.json에는 포함되지 않음)
+    verify_summary = None
+    if verify > 0:
+        with metrics.stage("verify"):
+            verify_summary = verify_zip(zip_file, jobs, check_dict, pool, workers, verify, verify_seed, reporter)
+        reporter.done(f"생성 파일 재검증 완료 (아티스트 {verify_summary['artists']}명, "
+                      f"불일치 {verify_summary['errors']}건)")
+    t_end = time.perf_counter()
+
+    check_dict["run_summary"] = dict(
+        months,
+        artists=len(jobs),
+        workers=workers,
+        detail_backend=detail_backend,
+        timings={
+            "ingest_sec": t_ingest - t_start,
+            "render_package_sec": t_package - t_ingest,
+            "verify_sec": t_end - t_package,
+            "total_sec": t_end - t_start,
+        },
+        zip=packager.stats,
+        verify=verify_summary,
+        memory=memory_summary(memory_budget_mb, start_peak) if spill is not None else None,
+    )
+    check_dict["run_metrics"] = metrics.to_dict()
+
+    zip_file.seek(0)
+    return zip_file
 
 
 # -----------------------------------------
@@ -1073,14 +3841,23 @@ def almost_equal(a, b, tol=1e-3):
     return abs(a - b) < tol
 
 
+def sorted_detail_rows(detail_list):
+    """ArtistRows → (앨범명, 서비스명) 순으로 정렬한 (album, major, middle, service, revenue) list (코드로 정렬)"""
+    albums, services = detail_list.codes("album"), detail_list.codes("service")
+    rows = list(detail_list.rows())
+    return [rows[i] for i in sorted(range(len(rows)), key=lambda i: (albums[i], services[i]))]
+
+
 # -----------------------------------------
 # (A) 세부매출내역 Workbook 생성
 # -----------------------------------------
 def create_detail_workbook(artist, ym, detail_list, check_dict):
     """
     artist에 대한 세부매출내역 엑셀 파일을 생성하여 Workbook 객체로 반환.
-    detail_list: [{"album":..., "major":..., "middle":..., "service":..., "revenue":...}, ...]
+    detail_list: ArtistRows
     """
+    from openpyxl import Workbook
+
     wb = Workbook()
     ws = wb.active
     ws.title = "세부매출내역"
@@ -1088,20 +3865,19 @@ def create_detail_workbook(artist, ym, detail_list, check_dict):
     # 헤더
     ws.append(["앨범아티스트", "앨범명", "대분류", "중분류", "서비스명", "기간", "매출 순수익"])
 
-    # 정렬(앨범명 등으로 정렬)
-    detail_list_sorted = sorted(detail_list, key=lambda x: (x["album"], x["service"]))
+    # 정렬(앨범명, 서비스명 순)
+    detail_list_sorted = sorted_detail_rows(detail_list)
 
     total_revenue = 0.0
     year_val, month_val = ym[:4], ym[4:]
-    for d in detail_list_sorted:
-        rv = d["revenue"]
+    for album, major, middle, service, rv in detail_list_sorted:
         total_revenue += rv
         ws.append([
             artist,
-            d["album"],
-            d["major"],
-            d["middle"],
-            d["service"],
+            album,
+            major,
+            middle,
+            service,
             f"{year_val}년 {month_val}월",
             rv
         ])
@@ -1111,23 +3887,14 @@ def create_detail_workbook(artist, ym, detail_list, check_dict):
 
     # 간단한 스타일 예시
     # 1) 헤더 스타일
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill("solid", fgColor="4CAF50")  # 연두/초록
     for cell in ws[1]:
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal="center", vertical="center")
+        apply_style(cell, "simple_header")
 
     # 2) 합계행 스타일 (마지막 행)
     last_row = ws.max_row
     for c in range(1, 7):
-        cell = ws.cell(row=last_row, column=c)
-        cell.alignment = Alignment(horizontal="center")
-    sum_cell = ws.cell(row=last_row, column=7)
-    sum_font = Font(bold=True, color="000000")
-    sum_fill = PatternFill("solid", fgColor="FFD966")  # 옅은 노랑
-    sum_cell.font = sum_font
-    sum_cell.fill = sum_fill
+        apply_style(ws.cell(row=last_row, column=c), "simple_sum_label")
+    apply_style(ws.cell(row=last_row, column=7), "simple_sum_value")
 
     # (검증 기록) → check_dict["details_verification"]["세부매출"] 에 추가
     # 실제로는 "정산서 값과 match" 여부를 비교해야 하지만,
@@ -1143,8 +3910,10 @@ def create_report_workbook(artist, ym, report_date, cost_data, detail_list, chec
     """
     artist에 대한 "정산서" 엑셀 파일을 생성하여 Workbook 객체로 반환.
     cost_data: {"정산요율":..., "전월잔액":..., "당월차감액":..., "당월잔액":...}
-    detail_list: [{"album":..., "major":..., "middle":..., "service":..., "revenue":...}, ...]
+    detail_list: ArtistRows
     """
+    from openpyxl import Workbook
+
     wb = Workbook()
     ws = wb.active
     ws.title = "정산서"
@@ -1178,17 +3947,16 @@ def create_report_workbook(artist, ym, report_date, cost_data, detail_list, chec
     for i, h in enumerate(headers, start=2):
         ws.cell(row=row_start, column=i, value=h)
 
-    detail_list_sorted = sorted(detail_list, key=lambda x: (x["album"], x["service"]))
+    detail_list_sorted = sorted_detail_rows(detail_list)
     total_1 = 0.0
     curr = row_start + 1
-    for d in detail_list_sorted:
-        rv = d["revenue"]
+    for album, major, middle, service, rv in detail_list_sorted:
         total_1 += rv
 
-        ws.cell(row=curr, column=2, value=d["album"])
-        ws.cell(row=curr, column=3, value=d["major"])
-        ws.cell(row=curr, column=4, value=d["middle"])
-        ws.cell(row=curr, column=5, value=d["service"])
+        ws.cell(row=curr, column=2, value=album)
+        ws.cell(row=curr, column=3, value=major)
+        ws.cell(row=curr, column=4, value=middle)
+        ws.cell(row=curr, column=5, value=service)
         ws.cell(row=curr, column=6, value=f"{year_val}년 {month_val}월")
         ws.cell(row=curr, column=7, value=rv)
         curr += 1
@@ -1212,15 +3980,17 @@ def create_report_workbook(artist, ym, report_date, cost_data, detail_list, chec
     ws.cell(row=curr, column=7, value="매출액")
     curr += 1
 
+    # 앨범 코드로 묶고 정렬 (코드 순서 = 앨범명 순서)
     album_sum = defaultdict(float)
-    for d in detail_list_sorted:
-        album_sum[d["album"]] += d["revenue"]
+    for code, rv in zip(detail_list.codes("album"), detail_list.revenues):
+        album_sum[code] += rv
+    album_names = detail_list.labels("album")
 
     total_2 = 0.0
-    for alb in sorted(album_sum.keys()):
-        amt = album_sum[alb]
+    for code in sorted(album_sum):
+        amt = album_sum[code]
         total_2 += amt
-        ws.cell(row=curr, column=2, value=alb)
+        ws.cell(row=curr, column=2, value=album_names[code])
         ws.cell(row=curr, column=6, value=f"{year_val}년 {month_val}월")
         ws.cell(row=curr, column=7, value=amt)
         curr += 1
@@ -1251,7 +4021,7 @@ def create_report_workbook(artist, ym, report_date, cost_data, detail_list, chec
     # 공제 적용된 매출액 = total_2 - 당월차감액
     공제적용 = total_2 - deduct_val
 
-    alb_list = sorted(album_sum.keys())
+    alb_list = [album_names[code] for code in sorted(album_sum)]
     alb_str = ", ".join(alb_list) if alb_list else "(앨범 없음)"
 
     ws.cell(row=curr, column=2, value=alb_str)
@@ -1290,71 +4060,28 @@ def create_report_workbook(artist, ym, report_date, cost_data, detail_list, chec
     ws.cell(row=curr, column=7, value="* 부가세 별도")
 
     # (검증) check_dict["details_verification"]["정산서"] 에 매핑
-    #  - (1) 공제 내역 검증
-    is_match_prev = almost_equal(prev_val, cost_data.get("전월잔액", 0))
-    is_match_deduct = almost_equal(deduct_val, cost_data.get("당월차감액", 0))
-    is_match_remain = almost_equal(remain_val, cost_data.get("당월잔액", 0))
-    if not (is_match_prev and is_match_deduct and is_match_remain):
-        check_dict["verification_summary"]["total_errors"] += 1
-        check_dict["verification_summary"]["artist_error_list"].append(artist)
-
-    row_report_item_3 = {
-        "아티스트": artist,
-        "구분": "공제내역",
-        "원본_곡비": cost_data.get("전월잔액", 0),
-        "정산서_곡비": prev_val,
-        "match_곡비": is_match_prev,
-
-        "원본_공제금액": cost_data.get("당월차감액", 0),
-        "정산서_공제금액": deduct_val,
-        "match_공제금액": is_match_deduct,
-
-        "원본_공제후잔액": cost_data.get("당월잔액", 0),
-        "정산서_공제후잔액": remain_val,
-        "match_공제후잔액": is_match_remain,
-    }
-    check_dict["details_verification"]["정산서"].append(row_report_item_3)
-
-    #  - (2) 수익 배분율 검증
-    original_rate = cost_data.get("정산요율", 0)
-    is_rate_match = almost_equal(original_rate, rate_val)
-    if not is_rate_match:
-        check_dict["verification_summary"]["total_errors"] += 1
-        check_dict["verification_summary"]["artist_error_list"].append(artist)
+    #  - 공제 내역 3항목 + 수익 배분율을 한 번에 비교
+    record_verification(
+        check_dict, "정산서", artist,
+        {"구분": ["공제내역", "공제내역", "공제내역", "수익배분율"],
+         "항목": ["곡비", "공제금액", "공제후잔액", "정산율(%)"]},
+        [cost_data.get("전월잔액", 0), cost_data.get("당월차감액", 0),
+         cost_data.get("당월잔액", 0), cost_data.get("정산요율", 0)],
+        [prev_val, deduct_val, remain_val, rate_val],
+    )
 
-    row_report_item_4 = {
-        "아티스트": artist,
-        "구분": "수익배분율",
-        "원본_정산율(%)": original_rate,
-        "정산서_정산율(%)": rate_val,
-        "match_정산율": is_rate_match,
-    }
-    check_dict["details_verification"]["정산서"].append(row_report_item_4)
-
-    # 세부매출 검증(비교)
-    for d in detail_list_sorted:
-        original_val = d["revenue"]
-        # 정산서 쪽도 사실상 d["revenue"] 그대로 사용
-        report_val = d["revenue"]
-        is_match = almost_equal(original_val, report_val)
-        if not is_match:
-            check_dict["verification_summary"]["total_errors"] += 1
-            check_dict["verification_summary"]["artist_error_list"].append(artist)
-
-        row_report_item = {
-            "아티스트": artist,
-            "구분": "음원서비스별매출",
-            "앨범": d["album"],
-            "서비스명": d["service"],
-            "원본_매출액": original_val,
-            "정산서_매출액": report_val,
-            "match_매출액": is_match,
-        }
-        check_dict["details_verification"]["세부매출"].append(row_report_item)
+    # 세부매출 검증(비교): 정산서 쪽도 사실상 revenue 그대로 사용
+    revenues = [d[4] for d in detail_list_sorted]
+    record_verification(
+        check_dict, "세부매출", artist,
+        {"구분": "음원서비스별매출",
+         "앨범": [d[0] for d in detail_list_sorted],
+         "서비스명": [d[3] for d in detail_list_sorted]},
+        revenues, revenues,
+    )
 
     # 간단히 “정산서” 제목 행에만 스타일 부여 예시
-    ws["B6"].font = Font(size=14, bold=True, color="000000")
-    ws["B6"].alignment = Alignment(horizontal="center", vertical="center")
+    apply_style(ws["B6"], "report_heading")
 
     return wb
 
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# benchmarks/와 같이 저장소 루트의 revenue2report_xlsx를 바로 import
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+sys.path.insert(0, os.path.join(REPO_ROOT, "benchmarks"))
+
+
+def pytest_addoption(parser):
+    parser.addoption("--run-slow", action="store_true", help="@pytest.mark.slow 테스트도 실행 (대용량 입력, 몇 분)")
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: 대용량 입력으로 몇 분 걸리는 테스트 (--run-slow일 때만 실행)")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-slow"):
+        return
+    skip_slow = pytest.mark.skip(reason="--run-slow일 때만 실행")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
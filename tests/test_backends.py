@@ -0,0 +1,116 @@
+import io
+from copy import copy
+
+import pytest
+from openpyxl import Workbook, load_workbook
+
+import revenue2report_xlsx as r2r
+
+YM = "202410"
+STYLE_ATTRS = ("font", "fill", "alignment", "border", "number_format", "protection")
+
+# XML 이스케이프 / 앞뒤 공백 / "="로 시작 (수식) / 오류값 / 빈 칸 / 같은 문자열 반복
+TRICKY_TEXT = ['<&>"', "a & b", " lead", "trail ", "  ", "=SUM(1,2)", "=", "#N/A", "", "앨범 A", "앨범 A"]
+TRICKY_REVENUES = [0.0, -1.5, 1e20, 1 / 3, 12345.678, 7.0, -0.0, 2.5e-7, 100.0, 1.1, 3.3]
+
+
+def tricky_rows():
+    n = len(TRICKY_TEXT)
+    return r2r.ArtistRows.from_columns(
+        albums=TRICKY_TEXT,
+        majors=TRICKY_TEXT[::-1],
+        middles=["중분류"] * n,
+        services=[TRICKY_TEXT[(i * 3) % n] for i in range(n)],
+        revenues=TRICKY_REVENUES[:n],
+    )
+
+
+def saved(wb):
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def assert_same_workbook(actual, expected):
+    """두 xlsx(bytes)를 열어 시트 이름, 셀 값 / 스타일, 병합, 열너비를 셀 단위로 비교."""
+    a_wb, e_wb = load_workbook(io.BytesIO(actual)), load_workbook(io.BytesIO(expected))
+    assert a_wb.sheetnames == e_wb.sheetnames
+    for a, e in zip(a_wb.worksheets, e_wb.worksheets):
+        assert (a.max_row, a.max_column) == (e.max_row, e.max_column)
+        for a_row, e_row in zip(a.iter_rows(), e.iter_rows()):
+            for a_cell, e_cell in zip(a_row, e_row):
+                assert a_cell.value == e_cell.value, a_cell.coordinate
+                assert a_cell.data_type == e_cell.data_type, a_cell.coordinate
+                for attr in STYLE_ATTRS:
+                    # StyleProxy끼리는 ==가 항상 False라서 실제 스타일 객체(copy)로 비교
+                    assert copy(getattr(a_cell, attr)) == copy(getattr(e_cell, attr)), (a_cell.coordinate, attr)
+        assert sorted(map(str, a.merged_cells.ranges)) == sorted(map(str, e.merged_cells.ranges))
+        widths = {col: dim.width for col, dim in e.column_dimensions.items()}
+        assert {col: a.column_dimensions[col].width for col in widths} == widths
+
+
+@pytest.mark.parametrize("artist", ["아티스트", 'A&B <"x">', " 앞뒤 공백 "])
+def test_native_detail_matches_openpyxl(artist):
+    """세부매출내역: native 백엔드와 openpyxl 백엔드가 셀 단위로 같음."""
+    rows = tricky_rows()
+    native = saved(r2r.DETAIL_BACKENDS["native"](artist, YM, rows))
+    expected = saved(r2r.DETAIL_BACKENDS["openpyxl"](artist, YM, rows))
+    assert_same_workbook(native, expected)
+
+    ws = load_workbook(io.BytesIO(native)).active
+    albums = [ws.cell(row=r, column=2).value for r in range(2, len(TRICKY_TEXT) + 2)]
+    assert albums == [t or None for t in TRICKY_TEXT]
+
+
+def test_native_detail_matches_openpyxl_without_rows():
+    assert_same_workbook(saved(r2r.create_detail_native("아티스트", YM, r2r.NO_REVENUE_ROWS)),
+                         saved(r2r.create_detail_excel("아티스트", YM, r2r.NO_REVENUE_ROWS)))
+
+
+# --------------------------------------------------
+# 정산서: 골격 복사 vs 셀마다 스타일 적용 (골격 도입 전 방식)
+# --------------------------------------------------
+def reference_report_excel(artist, service_rows, album_list, deduction_list, rate_list):
+    """create_report_excel의 골격 도입 전 구현: 섹션마다 apply_style, 전체 thin 테두리, merge_cells."""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = f"{r2r.sanitize_sheet_title(artist)}(정산서)"[:31]
+
+    def style(info, header_cols, header_role, body_cols, even, odd, sum_role=None):
+        r2r.apply_style(ws.cell(row=info["section_title_row"], column=2), "report_title")
+        for c in header_cols:
+            r2r.apply_style(ws.cell(row=info["header_row"], column=c), header_role)
+        ds = info["data_start"]
+        for r in range(ds, info["data_end"] + 1):
+            for c in body_cols:
+                r2r.apply_style(ws.cell(row=r, column=c), even if (r - ds) % 2 == 0 else odd)
+        if sum_role is not None:
+            sr = info["sum_row"]
+            ws.merge_cells(start_row=sr, start_column=2, end_row=sr, end_column=6)
+            for c in range(2, 8):
+                r2r.apply_style(ws.cell(row=sr, column=c), sum_role)
+
+    row_cursor = 12
+    info = r2r.write_service_table(ws, row_cursor, service_rows)
+    style(info, range(2, 8), "report_header", range(2, 8), "report_even", "report_odd", "report_sum")
+    info = r2r.write_album_table(ws, info["next_start_row"], album_list)
+    style(info, (2, 6, 7), "report_header", (2, 6, 7), "report_even", "report_odd", "report_sum_h")
+    info = r2r.write_deduction_table(ws, info["next_start_row"], deduction_list)
+    style(info, (2, 3, 4, 6, 7), "report_header", range(2, 8), "report_even", "report_odd")
+    info = r2r.write_rate_table(ws, info["next_start_row"], rate_list)
+    style(info, (2, 3, 4, 7), "report_header_h", range(2, 8), "report_even_h", "report_odd_h", "report_sum_h")
+
+    for r in range(1, info["next_start_row"] + 10):
+        for c in range(1, 9):
+            r2r.apply_style(ws.cell(row=r, column=c), "thin_border")
+    for col, width in {"A": 5, "B": 25, "C": 16, "D": 15, "E": 16, "F": 16, "G": 16, "H": 5}.items():
+        ws.column_dimensions[col].width = width
+    return wb
+
+
+@pytest.mark.parametrize("rows", [tricky_rows(), r2r.NO_REVENUE_ROWS], ids=["tricky", "empty"])
+def test_report_skeleton_matches_cell_by_cell_styling(rows):
+    cost = {"정산요율": 30.0, "전월잔액": 1000.0, "당월차감액": 250.5, "당월잔액": 749.5}
+    lists = r2r.build_report_lists(YM, cost, rows)
+    assert_same_workbook(saved(r2r.create_report_excel('A&B <"x">', *lists)),
+                         saved(reference_report_excel('A&B <"x">', *lists)))
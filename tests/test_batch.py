@@ -0,0 +1,74 @@
+import json
+import zipfile
+
+import pytest
+
+import revenue2report_cli as cli
+import revenue2report_xlsx as r2r
+from synthetic_data import generate_inputs
+
+YMS = ("202410", "202411")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("202410", ["202410"]),
+    ("202410-202412", ["202410", "202411", "202412"]),
+    ("202411 ~ 202502", ["202411", "202412", "202501", "202502"]),  # 연도 넘김
+    ("202401,202406", ["202401", "202406"]),
+    ("202406, 202401-202402 202401", ["202401", "202402", "202406"]),  # 정렬 + 중복 제거
+])
+def test_parse_ym_list(text, expected):
+    assert r2r.parse_ym_list(text) == expected
+
+
+@pytest.mark.parametrize("text, message", [
+    ("202412-202410", "시작이 끝보다"),
+    ("202413", "01~12"),
+    ("202410-202413", "01~12"),
+    ("202400", "01~12"),
+    ("2024-10", "YYYYMM"),
+    ("20241", "YYYYMM"),
+    (" , ", "입력하세요"),
+])
+def test_parse_ym_list_rejects(text, message):
+    with pytest.raises(ValueError, match=message):
+        r2r.parse_ym_list(text)
+
+
+@pytest.fixture(scope="module")
+def inputs(tmp_path_factory):
+    return generate_inputs(str(tmp_path_factory.mktemp("inputs")), months=YMS, artists=3, rows_per_artist=10)
+
+
+def test_batch_zip_has_month_folders_and_one_run_metrics(inputs):
+    check_dict = r2r.new_check_dict()
+    zip_file = r2r.generate_report_batch(list(YMS), None, *inputs, check_dict, verify=1.0)
+    with zip_file, zipfile.ZipFile(zip_file) as zf:
+        names = zf.namelist()
+        run_metrics = json.loads(zf.read("run_metrics.json"))
+
+    assert set(check_dict["months"]) == set(YMS)
+    expected = []
+    for ym in YMS:
+        month = check_dict["months"][ym]
+        artists = sorted(set(month["song_artists"]) | set(month["revenue_artists"]))
+        assert artists
+        expected += [f"{ym}/{a}({kind}).xlsx" for a in artists for kind in ("세부매출내역", "정산서")]
+    assert names == expected + ["run_metrics.json"]  # 달 → 아티스트 순서, 실행 지표는 맨 끝에 하나
+
+    assert run_metrics["yms"] == list(YMS) and "ym" not in run_metrics
+    assert sorted({a["ym"] for a in run_metrics["artists"]}) == list(YMS)
+    assert len(run_metrics["artists"]) == len(expected) // 2
+    summary = check_dict["run_summary"]
+    assert summary["yms"] == list(YMS) and summary["artists"] == len(expected) // 2
+    assert summary["verify"]["errors"] == 0
+
+
+def test_cli_batch(inputs, tmp_path):
+    out = tmp_path / "batch.zip"
+    code = cli.main(["--ym", f"{YMS[0]}-{YMS[-1]}", "--song-cost", inputs[0], "--revenue", inputs[1],
+                     "--out", str(out), "--quiet"])
+    assert code == cli.EXIT_OK
+    with zipfile.ZipFile(out) as zf:
+        folders = {name.split("/")[0] for name in zf.namelist() if "/" in name}
+    assert folders == set(YMS)
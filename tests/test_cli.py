@@ -0,0 +1,54 @@
+import pytest
+
+import revenue2report_cli as cli
+import revenue2report_xlsx as r2r
+from synthetic_data import generate_inputs
+
+YM = "202410"
+
+
+@pytest.fixture(scope="module")
+def inputs(tmp_path_factory):
+    return generate_inputs(str(tmp_path_factory.mktemp("inputs")), months=(YM,), artists=3, rows_per_artist=10)
+
+
+def run(inputs, tmp_path, *extra):
+    song_cost, revenue = inputs
+    out = tmp_path / "out.zip"
+    code = cli.main(["--ym", YM, "--song-cost", song_cost, "--revenue", revenue, "--out", str(out), "--quiet",
+                     *extra])
+    return code, out
+
+
+def test_exit_ok(inputs, tmp_path):
+    code, out = run(inputs, tmp_path, "--verify")
+    assert code == cli.EXIT_OK
+    assert out.exists()
+
+
+def test_exit_failed_without_zip(inputs, tmp_path):
+    code, out = run(inputs, tmp_path, "--ym", "209901")  # 없는 달 → 시트 없음
+    assert code == cli.EXIT_FAILED
+    assert not out.exists()
+
+
+def test_exit_on_verify_mismatch(inputs, tmp_path, monkeypatch):
+    read_back = r2r.read_back_artist
+
+    def corrupted(entries):
+        values, revenues = read_back(entries)
+        values["수익 배분", "총 정산금액"] = values.get(("수익 배분", "총 정산금액"), 0.0) + 1.0
+        return values, revenues
+    monkeypatch.setattr(r2r, "read_back_artist", corrupted)
+    code, out = run(inputs, tmp_path, "--verify")
+    assert code == cli.EXIT_VERIFY_MISMATCH
+    assert out.exists()  # 결과는 남기고 종료 코드로만 알림
+
+
+def test_exit_on_memory_over_budget(inputs, tmp_path, monkeypatch):
+    monkeypatch.setattr(r2r, "memory_summary", lambda budget_mb, start_peak: {
+        "budget_mb": budget_mb, "peak_rss_mb": budget_mb * 2.0, "scoped": True, "over_budget": True
+    })
+    code, out = run(inputs, tmp_path, "--memory-budget", "64")
+    assert code == cli.EXIT_OVER_BUDGET
+    assert out.exists()
@@ -0,0 +1,104 @@
+import threading
+import time
+
+import revenue2report_xlsx as r2r
+
+
+def wait_until(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "시간 안에 상태가 바뀌지 않음"
+        time.sleep(0.01)
+
+
+def wait_finished(registry, *job_ids):
+    wait_until(lambda: all(registry.get(job_id).finished_at is not None for job_id in job_ids))
+
+
+def test_two_jobs_status_result_and_errors():
+    """성공 / 예외 작업 2건: queued → running → done / error, 결과와 오류 메시지가 남음."""
+    registry = r2r.JobRegistry(max_running=1)
+    release = threading.Event()
+
+    def ok(reporter):
+        reporter.progress(0.5, "절반")
+        release.wait(10)
+        return {"zip_data": b"zip", "check_dict": {}}
+
+    def fail(reporter):
+        reporter.error("입력 오류")
+        raise ValueError("boom")
+
+    ok_id = registry.submit("202410", ok)
+    fail_id = registry.submit("202411", fail)
+
+    wait_until(lambda: registry.get(ok_id).snapshot()["message"] == "절반")
+    assert registry.get(ok_id).status == "running"
+    assert registry.get(fail_id).status == "queued"  # 자리가 1개라 앞 작업이 끝날 때까지 대기
+
+    release.set()
+    wait_finished(registry, ok_id, fail_id)
+
+    ok_job, fail_job = registry.get(ok_id), registry.get(fail_id)
+    assert ok_job.status == "done"
+    assert ok_job.result == {"zip_data": b"zip", "check_dict": {}}
+    assert ok_job.errors == []
+    assert ok_job.started_at <= ok_job.finished_at <= fail_job.started_at
+
+    assert fail_job.status == "error"
+    assert fail_job.result is None
+    assert fail_job.errors[0] == "입력 오류"
+    assert "ValueError: boom" in fail_job.errors[1]
+    assert fail_job.snapshot()["label"] == "202411"
+
+
+def test_none_result_is_error():
+    registry = r2r.JobRegistry()
+    job_id = registry.submit("202410", lambda reporter: None)
+    wait_finished(registry, job_id)
+    assert registry.get(job_id).status == "error"
+
+
+def test_exclusive_job_runs_alone():
+    """exclusive 작업은 앞 작업이 끝난 뒤 혼자 실행되고, 뒤에 낸 작업은 그 다음에 시작."""
+    registry = r2r.JobRegistry(max_running=2)
+    events = []
+    lock = threading.Lock()
+    release_first = threading.Event()
+
+    def job(name, wait=None):
+        def run(reporter):
+            with lock:
+                events.append(("start", name))
+            if wait is not None:
+                wait.wait(10)
+            time.sleep(0.05)
+            with lock:
+                events.append(("end", name))
+            return {}
+        return run
+
+    first = registry.submit("a", job("a", release_first))
+    wait_until(lambda: registry.get(first).status == "running")
+    traced = registry.submit("traced", job("traced"), exclusive=True)
+    after = registry.submit("b", job("b"))
+
+    time.sleep(0.1)
+    assert registry.get(traced).status == "queued"
+    assert registry.get(after).status == "queued"  # 빈 자리가 있어도 기다리는 exclusive 작업 뒤에서 대기
+
+    release_first.set()
+    wait_finished(registry, first, traced, after)
+    assert events == [("start", "a"), ("end", "a"), ("start", "traced"), ("end", "traced"),
+                      ("start", "b"), ("end", "b")]
+
+
+def test_finished_jobs_are_pruned():
+    registry = r2r.JobRegistry(keep_finished=1)
+    first = registry.submit("a", lambda reporter: {})
+    wait_finished(registry, first)
+    second = registry.submit("b", lambda reporter: {})
+    wait_finished(registry, second)
+    registry.submit("c", lambda reporter: {})  # 제출할 때 정리
+    assert registry.get(first) is None
+    assert registry.get(second) is not None
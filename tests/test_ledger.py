@@ -0,0 +1,148 @@
+import io
+import pathlib
+import zipfile
+
+import pytest
+
+import revenue2report_xlsx as r2r
+from synthetic_data import generate_inputs
+from test_backends import assert_same_workbook
+
+YMS = ("202410", "202411")
+
+# 아티스트 행이 떨어져 있는 online revenue (B, A, B) + 빈 텍스트 칸
+REVENUE_RECORDS = [
+    ("B", "앨범2", "스트리밍", "", "멜론", 1000.0),
+    ("A", "", "다운로드", "국내", "지니", 12.5),
+    ("B", "앨범1", "", "국내", "", 0.0),
+    ("A", "앨범1", "스트리밍", "국내", "멜론", -3.0),
+]
+
+
+def cost(rate, prev, deduct, remain):
+    return {"정산요율": rate, "전월잔액": prev, "당월차감액": deduct, "당월잔액": remain}
+
+
+@pytest.fixture(scope="module")
+def inputs(tmp_path_factory):
+    return generate_inputs(str(tmp_path_factory.mktemp("inputs")), months=YMS, artists=4, rows_per_artist=10)
+
+
+def assert_same_revenue_rows(actual, expected):
+    assert list(actual.ranges.items()) == list(expected.ranges.items())
+    assert actual.labels == expected.labels
+    assert actual.codes == expected.codes
+    assert actual.revenues == expected.revenues
+
+
+def test_save_load_round_trip(tmp_path):
+    ledger = r2r.LedgerStore(str(tmp_path / "sub" / "ledger.sqlite"))  # 없는 폴더도 만듦
+    song = {"B": cost(30.0, 100.0, 20.0, 80.0), 2024: cost(50.0, 0.0, 0.0, 0.0), "A": cost(0.0, 1.5, 0.5, 1.0)}
+    revenue = r2r.RevenueRows.from_records(REVENUE_RECORDS)
+    ledger.save("song cost", "202410", song, "d-song")
+    ledger.save("online revenue", "202410", revenue, "d-revenue")
+
+    loaded = ledger.load("song cost", "202410")
+    assert loaded == song and list(loaded) == list(song)  # 숫자 아티스트명 / 순서 그대로
+    loaded = ledger.load("online revenue", "202410")
+    assert_same_revenue_rows(loaded, revenue)
+    assert list(loaded) == ["B", "A"]
+    assert list(loaded.records()) == list(revenue.records())
+    for artist in revenue:
+        assert list(ledger.artist_revenue("202410", artist).rows()) == list(revenue[artist].rows())
+    assert ledger.revenue_counts("202410") == {"B": 2, "A": 2}
+
+    assert [(i["kind"], i["ym"], i["digest"], i["rows"]) for i in ledger.ingests()] == [
+        ("online revenue", "202410", "d-revenue", 4), ("song cost", "202410", "d-song", 3)
+    ]
+    assert ledger.stored_months() == ["202410"]
+    assert ledger.digest("song cost", "202410") == "d-song"
+    assert ledger.digest("song cost", "202411") is None
+    with pytest.raises(r2r.IngestError, match="202411"):
+        ledger.load("online revenue", "202411")
+
+    # 같은 달을 다시 저장하면 통째로 교체
+    ledger.save("online revenue", "202410", r2r.RevenueRows.from_records(REVENUE_RECORDS[:1]), "d-new")
+    assert list(ledger.load("online revenue", "202410").records()) == [REVENUE_RECORDS[0]]
+    assert ledger.digest("online revenue", "202410") == "d-new"
+
+
+def test_save_records_matches_save(tmp_path):
+    """저메모리 모드의 save_records도 save와 같은 행 / 순서로 읽힘 (여러 달 한 번에)."""
+    ledger = r2r.LedgerStore(str(tmp_path / "ledger.sqlite"))
+    records = [(ym,) + record for record in REVENUE_RECORDS for ym in YMS]
+    counts = ledger.save_records(list(YMS), iter(records), "d")
+    assert counts == {ym: {"B": 2, "A": 2} for ym in YMS}
+    for ym in YMS:
+        assert_same_revenue_rows(ledger.load("online revenue", ym), r2r.RevenueRows.from_records(REVENUE_RECORDS))
+
+
+def xlsx_entries(zip_file):
+    with zip_file, zipfile.ZipFile(zip_file) as zf:
+        return {name: zf.read(name) for name in zf.namelist() if name.endswith(".xlsx")}
+
+
+@pytest.mark.parametrize("memory_budget_mb", [None, 256])
+def test_reissue_from_ledger_matches_upload_run(inputs, tmp_path, memory_budget_mb):
+    """업로드 파일로 만든 보고서와, 원장만으로(파일 없이) 다시 만든 보고서가 셀 단위로 같음."""
+    ledger = r2r.LedgerStore(str(tmp_path / "ledger.sqlite"))
+    uploaded = xlsx_entries(r2r.generate_report_batch(
+        list(YMS), None, *inputs, r2r.new_check_dict(), ledger=ledger, memory_budget_mb=memory_budget_mb
+    ))
+    assert ledger.stored_months() == list(YMS)
+
+    check_dict = r2r.new_check_dict()
+    reissued = xlsx_entries(r2r.generate_report_excel(
+        YMS[1], None, None, None, check_dict, ledger=ledger, memory_budget_mb=memory_budget_mb, verify=1.0
+    ))
+    assert check_dict["verification_summary"]["total_errors"] == 0
+    expected = {name.split("/", 1)[1]: data for name, data in uploaded.items() if name.startswith(f"{YMS[1]}/")}
+    assert sorted(reissued) == sorted(expected)
+    for name, data in reissued.items():
+        assert_same_workbook(data, expected[name])
+
+
+def test_stored_digest_is_reused_without_parsing(inputs, tmp_path, monkeypatch):
+    ledger = r2r.LedgerStore(str(tmp_path / "ledger.sqlite"))
+    first = r2r.new_check_dict()
+    r2r.generate_report_excel(YMS[0], None, *inputs, first, ledger=ledger).close()
+    stored = ledger.ingests()
+    assert {i["digest"] for i in stored} == {r2r.file_digest(inputs[0]), r2r.file_digest(inputs[1])}
+
+    def no_parse(*args, **kwargs):
+        raise AssertionError("원장에 같은 파일이 있는데 다시 파싱함")
+    monkeypatch.setattr(r2r, "parse_months", no_parse)
+    monkeypatch.setattr(r2r, "iter_revenue_month_records", no_parse)
+    for memory_budget_mb in (None, 256):
+        check_dict = r2r.new_check_dict()
+        zip_file = r2r.generate_report_excel(YMS[0], None, *inputs, check_dict, ledger=ledger,
+                                             memory_budget_mb=memory_budget_mb)
+        assert zip_file is not None
+        zip_file.close()
+        assert check_dict["revenue_artists"] == first["revenue_artists"]
+    assert ledger.ingests() == stored  # 다시 저장하지 않음
+
+    # 내용이 다른 파일이면 다시 파싱해야 함
+    other = io.BytesIO(pathlib.Path(inputs[1]).read_bytes() + b"\0")
+    with pytest.raises(AssertionError, match="다시 파싱"):
+        r2r.generate_report_excel(YMS[0], None, inputs[0], other, r2r.new_check_dict(), ledger=ledger)
+
+
+def test_balance_continuity(tmp_path):
+    ledger = r2r.LedgerStore(str(tmp_path / "ledger.sqlite"))
+    ledger.save("song cost", "202410", {"같음": cost(30, 0, 10, 90), "다름": cost(30, 0, 0, 50)})
+    assert ledger.balance_continuity("202410") is None  # 지난달(202409)이 원장에 없음
+    ledger.save("song cost", "202411", {"같음": cost(30, 90.0004, 10, 80.0), "다름": cost(30, 40, 0, 40)})
+
+    result = ledger.balance_continuity("202411")
+    assert result == {
+        "prev_ym": "202410",
+        "checked": 2,
+        "mismatches": [{"artist": "다름", "전월잔액": 40.0, "지난달_당월잔액": 50.0, "차이": -10.0}],
+    }
+    # 연도 넘김 + 한쪽 달에만 있는 아티스트는 없는 쪽을 0으로 비교
+    ledger.save("song cost", "202312", {"전월만": cost(30, 0, 0, 5)})
+    ledger.save("song cost", "202401", {"이번달만": cost(30, 0, 0, 0)})
+    result = ledger.balance_continuity("202401")
+    assert result["prev_ym"] == "202312" and result["checked"] == 2
+    assert result["mismatches"] == [{"artist": "전월만", "전월잔액": None, "지난달_당월잔액": 5.0, "차이": -5.0}]
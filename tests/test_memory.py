@@ -0,0 +1,71 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import revenue2report_xlsx as r2r
+from synthetic_data import SONG_COST_FILE, REVENUE_FILE
+
+MB = 1024 * 1024
+REPO_DIR = os.path.dirname(os.path.abspath(r2r.__file__))
+
+
+@pytest.mark.parametrize("start_mb, end_mb, scoped, over_budget", [
+    (50, 300, True, True),     # 이번 실행에서 최대치가 올라감 → 그 값으로 판정
+    (50, 100, True, False),
+    (100, 100, False, False),  # 그대로지만 시작 때부터 예산 이하 → 이번 실행도 예산 이하
+    (900, 900, False, None),   # 이전 실행의 최대치가 예산보다 큼 → 알 수 없음
+])
+def test_memory_summary_verdict_is_scoped_to_run(monkeypatch, start_mb, end_mb, scoped, over_budget):
+    monkeypatch.setattr(r2r, "peak_rss_bytes", lambda: end_mb * MB)
+    mem = r2r.memory_summary(200, start_mb * MB)
+    assert mem["peak_rss_mb"] == end_mb
+    assert mem["scoped"] is scoped
+    assert mem["over_budget"] is over_budget
+
+
+def test_memory_summary_without_resource(monkeypatch):
+    monkeypatch.setattr(r2r, "peak_rss_bytes", lambda: None)
+    assert r2r.memory_summary(200, None) == {"budget_mb": 200, "peak_rss_mb": None, "scoped": False,
+                                             "over_budget": None}
+
+
+# 새 프로세스에서 generate_report_excel(memory_budget_mb=...) 1회 → run_summary["memory"]를 JSON으로 출력
+CHILD_SCRIPT = """
+import json, sys
+import revenue2report_xlsx as r2r
+song_cost, revenue, budget_mb = sys.argv[1], sys.argv[2], int(sys.argv[3])
+check_dict = r2r.new_check_dict()
+zip_file = r2r.generate_report_excel("202410", None, song_cost, revenue, check_dict,
+                                     detail_backend="native", verify=1.0, memory_budget_mb=budget_mb)
+if zip_file is None:
+    raise SystemExit("보고서 생성 실패")
+zip_file.close()
+print(json.dumps(check_dict["run_summary"]["memory"]))
+"""
+SLOW_BUDGET_MB = 256
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(r2r.peak_rss_bytes() is None, reason="최대 RSS를 잴 수 없는 OS (resource 모듈 없음)")
+def test_low_memory_mode_stays_within_budget_at_1m_rows(tmp_path):
+    """아티스트 2000명 × 500행 = 100만 행 csv를 저메모리 모드로 생성해도 최대 RSS가 예산 이하."""
+    # 자식 프로세스는 부모의 최대 RSS를 물려받으므로 (Linux) 입력 생성도 별도 프로세스에서 해서
+    # 이 pytest 프로세스의 최대치를 작게 유지
+    subprocess.run(
+        [sys.executable, os.path.join(REPO_DIR, "benchmarks", "synthetic_data.py"), "--out-dir", str(tmp_path),
+         "--months", "202410", "--artists", "2000", "--rows-per-artist", "500", "--format", "csv"],
+        check=True, stdout=subprocess.DEVNULL
+    )
+    song_path = os.path.join(tmp_path, f"{SONG_COST_FILE}.csv")
+    revenue_path = os.path.join(tmp_path, f"{REVENUE_FILE}.csv")
+    out = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, song_path, revenue_path, str(SLOW_BUDGET_MB)],
+        cwd=REPO_DIR, check=True, capture_output=True, text=True
+    ).stdout
+    mem = json.loads(out.strip().splitlines()[-1])
+    assert mem["budget_mb"] == SLOW_BUDGET_MB
+    assert mem["scoped"] is True, mem
+    assert mem["over_budget"] is False, mem
@@ -0,0 +1,171 @@
+import datetime
+import math
+
+import pandas as pd
+import pytest
+
+import revenue2report_xlsx as r2r
+
+TEXT_VALUES = ["1,234", " 12.5 ", "50%", "-3", ".5", "1e3", "", "  ", "abc", "nan", "NaN", "inf", "-inf",
+               "1_000", "１２", "1,2,3", "12-", "+7.", "0x10"]
+OBJECT_VALUES = TEXT_VALUES + [0, 7, 2.5, True, False, None, datetime.datetime(2024, 10, 1), datetime.date(2024, 10, 1)]
+
+
+def same(a, b):
+    return (math.isnan(a) and math.isnan(b)) or a == b
+
+
+@pytest.mark.parametrize("dtype", [object, "string"])
+def test_to_num_column_matches_to_num(dtype):
+    values = OBJECT_VALUES if dtype is object else TEXT_VALUES
+    result = r2r.to_num_column(pd.Series(values, dtype=dtype)).tolist()
+    expected = [r2r.to_num(x) for x in values]
+    assert all(same(a, b) for a, b in zip(result, expected)), list(zip(values, result, expected))
+
+
+def test_to_num_column_empty_cells_are_zero():
+    assert r2r.to_num_column(pd.Series([1.5, None], dtype=float)).tolist() == [1.5, 0.0]
+    assert r2r.to_num_column(pd.Series(["1", None], dtype="string")).tolist() == [1.0, 0.0]
+
+
+def test_parse_cache_shared_between_threads():
+    """UI 세션의 ParseCache 하나를 여러 작업 스레드가 동시에 lookup / store 해도 깨지지 않음."""
+    import threading
+
+    cache = r2r.ParseCache(max_entries=2)
+    columns = {"ym": "진행기간"}
+    errors = []
+
+    def job(n):
+        try:
+            for i in range(300):
+                digest = f"file{(n + i) % 5}"
+                found, missing = cache.lookup("online revenue", None, ["202410", "202411"], columns, digest)
+                cache.store(missing, {sheet: {"digest": digest} for sheet in missing})
+                assert all(v["digest"] == digest for v in found.values())
+        except Exception as e:  # 스레드 안 예외를 본 스레드에서 확인
+            errors.append(e)
+
+    threads = [threading.Thread(target=job, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert len(cache) <= cache.max_entries
+    assert cache.hits + cache.misses == 8 * 300 * 2
+
+
+def test_parse_cache_lru_digest_columns_and_status():
+    import io
+
+    cache = r2r.ParseCache(max_entries=2)
+    columns = {"ym": "진행기간"}
+    file_a, file_b = io.BytesIO(b"a"), io.BytesIO(b"b")
+
+    found, missing = cache.lookup("song cost", file_a, ["202410", "202411"], columns)
+    assert found == {} and list(missing) == ["202410", "202411"]
+    assert cache.last_status == {"song cost": "miss"}
+    cache.store(missing, {"202410": "a10", "202411": "a11"})
+    assert len(cache) == 2
+
+    found, missing = cache.lookup("song cost", file_a, ["202410", "202412"], columns)
+    assert found == {"202410": "a10"} and list(missing) == ["202412"]
+    assert cache.last_status["song cost"] == "partial"
+    # 202410을 방금 썼으므로 가장 오래된 202411이 밀려남
+    cache.store(missing, {"202412": "a12"})
+    assert len(cache) == 2
+    found, missing = cache.lookup("song cost", file_a, ["202410", "202411", "202412"], columns)
+    assert found == {"202410": "a10", "202412": "a12"} and list(missing) == ["202411"]
+
+    # 내용이 다른 파일 / 다른 컬럼 매핑은 같은 시트명이어도 miss
+    assert cache.lookup("online revenue", file_b, ["202410"], columns)[0] == {}
+    assert cache.lookup("song cost", file_a, ["202410"], {"ym": "기간"})[0] == {}
+    assert cache.last_status == {"song cost": "miss", "online revenue": "miss"}
+
+    found, _ = cache.lookup("song cost", io.BytesIO(b"a"), ["202412"], columns)
+    assert found == {"202412": "a12"} and cache.last_status["song cost"] == "hit"
+    assert (cache.hits, cache.misses) == (4, 6)
+
+
+# 아티스트 행이 떨어져 있고 (B, A, B, C, A) 텍스트 칸에 None / "" / 숫자가 섞인 online revenue 행
+REVENUE_ROWS = [
+    # 앨범아티스트, 앨범명, 대분류, 중분류, 서비스명, 권리사정산금액
+    ("B", "앨범2", "스트리밍", None, "멜론", "1,000"),
+    (" A ", "", "다운로드", "국내", "지니", 12.5),
+    ("B", "앨범1", None, "국내", "", None),
+    (None, "빠짐", "빠짐", "빠짐", "빠짐", 99),  # 앨범아티스트가 빈 행은 제외
+    ("C", 2024, "스트리밍", "해외", "Spotify", "abc"),
+    ("A", "앨범1", "스트리밍", "국내", "멜론", -3),
+    ("", "빠짐", "빠짐", "빠짐", "빠짐", 99),
+    ("B", "앨범2", "스트리밍", None, "멜론", "50%"),
+]
+
+
+def assert_same_revenue_rows(actual, expected):
+    assert list(actual.ranges.items()) == list(expected.ranges.items())  # 아티스트 순서까지 같음
+    for name in r2r.REVENUE_TEXT_COLUMNS:
+        assert actual.labels[name] == expected.labels[name], name
+        assert actual.codes[name] == expected.codes[name], name
+    assert actual.revenues == expected.revenues
+    assert list(actual.records()) == list(expected.records())
+
+
+@pytest.mark.parametrize("dtype", [object, "string"])
+def test_revenue_rows_from_frame_matches_from_records(dtype):
+    """스트리밍 xlsx 경로(from_records)와 CSV / Parquet 경로(from_frame)가 같은 코드 / 표 / 구간 / 행 순서."""
+    rows = REVENUE_ROWS
+    if dtype == "string":  # CSV / Parquet은 모든 칸이 문자열 (빈 칸만 NA)
+        rows = [tuple(None if v is None else str(v) for v in row) for row in rows]
+    header = list(r2r.REVENUE_COLUMNS.values())
+    expected = r2r.RevenueRows.from_records(r2r.iter_revenue_records(header, iter(rows)))
+    df = pd.DataFrame(rows, columns=list(r2r.REVENUE_COLUMNS), dtype=dtype)
+    actual = r2r.RevenueRows.from_frame(r2r.clean_revenue_frame(df))
+    assert_same_revenue_rows(actual, expected)
+
+    assert list(actual) == ["B", "A", "C"]
+    assert actual["B"].albums == ["앨범2", "앨범1", "앨범2"]  # 아티스트 안에서는 원본 순서
+    assert actual["B"].majors == ["스트리밍", "", "스트리밍"]
+    assert actual["A"].albums == ["", "앨범1"]
+    assert list(actual["B"].revenues) == [1000.0, 0.0, 50.0]
+
+
+def test_first_seen_codes_and_sorted_codes():
+    from array import array
+
+    index = r2r.FirstSeenCodes()
+    values = ["다", "가", "다", "나", "가", ""]
+    codes = array("i", (index[v] for v in values))
+    assert dict(index) == {"다": 0, "가": 1, "나": 2, "": 3}  # 처음 나온 순서
+    assert list(codes) == [0, 1, 0, 2, 1, 3]
+
+    sorted_, labels = r2r.sorted_codes(index, codes)
+    assert labels == ["", "가", "나", "다"]
+    assert [labels[c] for c in sorted_] == values
+    # 코드끼리의 대소 / 정렬이 문자열로 한 것과 같음
+    assert sorted(range(len(values)), key=sorted_.__getitem__) == sorted(range(len(values)), key=values.__getitem__)
+
+    order = [5, 3, 1, 0]
+    reordered, labels = r2r.sorted_codes(index, codes, order)
+    assert labels == ["", "가", "나", "다"]
+    assert [labels[c] for c in reordered] == [values[i] for i in order]
+    assert isinstance(reordered, array) and reordered.typecode == "i"
+
+
+def test_artist_rows_pickle_round_trip():
+    """ArtistRows는 __reduce__로 구간의 문자열 / 금액만 넘기고, 받는 쪽에서 같은 행을 다시 만듦."""
+    import pickle
+
+    header = list(r2r.REVENUE_COLUMNS.values())
+    rows = r2r.RevenueRows.from_records(r2r.iter_revenue_records(header, iter(REVENUE_ROWS)))
+    artist_rows = rows["B"]
+    restored = pickle.loads(pickle.dumps(artist_rows))
+    assert type(restored) is r2r.ArtistRows
+    assert list(restored.rows()) == list(artist_rows.rows())
+    assert len(restored) == len(artist_rows) == 3
+    for name in r2r.REVENUE_TEXT_COLUMNS:
+        # 받은 쪽은 이 아티스트의 문자열만으로 다시 코드를 매김 (정렬 순서 유지)
+        labels = restored.labels(name)
+        assert labels == sorted(set(artist_rows.column(name)))
+        assert restored.column(name) == artist_rows.column(name)
+    assert restored.revenues == artist_rows.revenues
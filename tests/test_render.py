@@ -0,0 +1,208 @@
+import os
+import zipfile
+
+import pytest
+from openpyxl.writer.excel import ExcelWriter
+
+import revenue2report_xlsx as r2r
+from synthetic_data import generate_inputs
+
+YM = "202410"
+
+
+@pytest.fixture(scope="module")
+def inputs(tmp_path_factory):
+    return generate_inputs(str(tmp_path_factory.mktemp("inputs")), months=(YM,), artists=6, rows_per_artist=20)
+
+
+def count_calls(monkeypatch, cls, name="save"):
+    calls = []
+    original = getattr(cls, name)
+
+    def wrapper(self, *args, **kwargs):
+        calls.append(self)
+        return original(self, *args, **kwargs)
+    monkeypatch.setattr(cls, name, wrapper)
+    return calls
+
+
+@pytest.mark.parametrize("detail_backend", ["openpyxl", "native"])
+@pytest.mark.parametrize("memory_budget_mb", [None, 256])
+def test_each_workbook_serialized_once(inputs, tmp_path, monkeypatch, detail_backend, memory_budget_mb):
+    """Workbook마다 저장(직렬화)은 ZIP 항목으로 한 번뿐이고, 작업 폴더에는 아무것도 쓰지 않음."""
+    r2r.native_detail_parts()  # 세부매출내역 고정 부분을 만들 때의 저장 1회는 미리 (lru_cache)
+    excel_saves = count_calls(monkeypatch, ExcelWriter)
+    native_saves = count_calls(monkeypatch, r2r.NativeDetailSheet)
+    workdir = tmp_path / "cwd"
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+
+    check_dict = r2r.new_check_dict()
+    zip_file = r2r.generate_report_excel(
+        YM, "2024-11-10", *inputs, check_dict, detail_backend=detail_backend, memory_budget_mb=memory_budget_mb,
+        verify=1.0  # 재검증은 ZIP에서 다시 읽기만 함
+    )
+    assert zip_file is not None
+    with zipfile.ZipFile(zip_file) as zf:
+        names = [name for name in zf.namelist() if name.endswith(".xlsx")]
+    zip_file.close()
+
+    details = [name for name in names if name.endswith("(세부매출내역).xlsx")]
+    reports = [name for name in names if name.endswith("(정산서).xlsx")]
+    assert len(details) == len(reports) == 6
+    if detail_backend == "openpyxl":
+        assert len(excel_saves) == len(names)
+        assert native_saves == []
+    else:
+        assert len(excel_saves) == len(reports)
+        assert len(native_saves) == len(details)
+    assert os.listdir(workdir) == []
+
+
+def test_pool_render_keeps_zip_order_with_capped_in_flight(inputs, monkeypatch):
+    """프로세스 풀 렌더링: 넘겨 둔 아티스트 수를 제한해도 ZIP에는 아티스트 순서대로 모두 기록됨."""
+    monkeypatch.setattr(r2r, "RENDER_IN_FLIGHT_PER_WORKER", 1)
+    check_dict = r2r.new_check_dict()
+    zip_file = r2r.generate_report_excel(YM, "2024-11-10", *inputs, check_dict, workers=2)
+    with zip_file, zipfile.ZipFile(zip_file) as zf:
+        names = [name for name in zf.namelist() if name.endswith(".xlsx")]
+    artists = sorted(set(check_dict["song_artists"]) | set(check_dict["revenue_artists"]))
+    assert names == [f"{a}({kind}).xlsx" for a in artists for kind in ("세부매출내역", "정산서")]
+
+
+def test_save_zip_file_copies_spool(tmp_path):
+    spool = r2r.open_zip_spool(max_size=16)
+    data = os.urandom(100_000)  # max_size를 넘어 디스크로 옮겨간 스풀
+    spool.write(data)
+    path = tmp_path / "out" / "result.zip"
+    assert r2r.save_zip_file(spool, str(path), chunk_size=4096) == str(path)
+    assert path.read_bytes() == data == r2r.read_zip_file(spool)
+
+
+def test_serial_entry_writes_count_in_zip_cpu(inputs):
+    """순차 처리에서 open_entry로 바로 쓴 xlsx 항목의 압축 시간도 run_summary["zip"]["cpu_sec"]에 포함됨."""
+    check_dict = r2r.new_check_dict()
+    zip_file = r2r.generate_report_excel(YM, "2024-11-10", *inputs, check_dict, zip_policy="deflated")
+    zip_file.close()
+    assert check_dict["run_summary"]["zip"]["cpu_sec"] > 0
+
+
+def test_open_entry_compression_time_is_counted():
+    """open_entry 스트림에 쓴 압축 CPU 시간이 packager 스레드 시간과 함께 stats["cpu_sec"]에 잡힘."""
+    import random
+    import time
+
+    data = random.Random(0).randbytes(4 << 20)
+    packager = r2r.ZipPackager(r2r.open_zip_spool(), policy="deflated", level=9)
+    t = time.thread_time()
+    with packager.open_entry("a.xlsx") as entry:
+        entry.write(data)
+    spent = time.thread_time() - t
+    packager.close()
+    assert spent > 0
+    assert packager.stats["cpu_sec"] >= spent * 0.5
+
+
+def generate_zip(inputs, **options):
+    check_dict = r2r.new_check_dict()
+    zip_file = r2r.generate_report_excel(YM, "2024-11-10", *inputs, check_dict, **options)
+    with zip_file, zipfile.ZipFile(zip_file) as zf:
+        infos = zf.infolist()
+    return infos, check_dict["run_summary"]["zip"]
+
+
+@pytest.mark.parametrize("zip_policy", list(r2r.ZIP_POLICIES))
+@pytest.mark.parametrize("workers", [1, 2])
+def test_zip_policy_per_entry(inputs, zip_policy, workers):
+    """항목마다 ZIP_POLICIES대로 압축하고, run_summary["zip"]은 실제 ZIP과 같은 크기 / 0보다 큰 cpu_sec."""
+    infos, stats = generate_zip(inputs, zip_policy=zip_policy, workers=workers)
+    expected = {
+        "auto": {".xlsx": zipfile.ZIP_STORED, ".json": zipfile.ZIP_DEFLATED},
+        "deflated": {".xlsx": zipfile.ZIP_DEFLATED, ".json": zipfile.ZIP_DEFLATED},
+        "stored": {".xlsx": zipfile.ZIP_STORED, ".json": zipfile.ZIP_STORED},
+    }[zip_policy]
+    for info in infos:
+        assert info.compress_type == expected[os.path.splitext(info.filename)[1]], info.filename
+    assert stats["policy"] == zip_policy
+    assert stats["entries"] == len(infos) == 6 * 2 + 1
+    assert stats["raw_bytes"] == sum(i.file_size for i in infos)
+    assert stats["zip_bytes"] == sum(i.compress_size for i in infos)
+    assert stats["cpu_sec"] > 0
+    if zip_policy == "stored":
+        assert stats["zip_bytes"] == stats["raw_bytes"]
+    else:
+        assert stats["zip_bytes"] < stats["raw_bytes"]
+
+
+def test_zip_level_is_applied(inputs):
+    """deflated는 zip_level을 따름: 레벨 9 ZIP이 레벨 1보다 작고, 항목마다 레벨 1로 다시 압축한 크기와 같음."""
+    import zlib
+
+    _, fast = generate_zip(inputs, zip_policy="deflated", zip_level=1)
+    _, best = generate_zip(inputs, zip_policy="deflated", zip_level=9)
+    assert (fast["level"], best["level"]) == (1, 9)
+    assert best["zip_bytes"] < fast["zip_bytes"]
+
+    check_dict = r2r.new_check_dict()
+    zip_file = r2r.generate_report_excel(YM, "2024-11-10", *inputs, check_dict, zip_policy="deflated", zip_level=1)
+    with zip_file, zipfile.ZipFile(zip_file) as zf:
+        for info in zf.infolist():
+            raw = zf.read(info)
+            compressor = zlib.compressobj(1, zlib.DEFLATED, -15)
+            assert info.compress_size == len(compressor.compress(raw) + compressor.flush()), info.filename
+
+
+def test_zip_policy_size_cpu_trade_off(inputs):
+    """deflated는 stored보다 작은 ZIP을 만들고, 그만큼 압축 CPU 시간이 더 듦."""
+    _, stored = generate_zip(inputs, zip_policy="stored")
+    _, deflated = generate_zip(inputs, zip_policy="deflated", zip_level=9)
+    assert deflated["zip_bytes"] < stored["zip_bytes"]
+    assert deflated["cpu_sec"] > stored["cpu_sec"]
+
+
+def assert_timing(record, trace_memory):
+    assert record["wall_sec"] >= 0 and record["cpu_sec"] >= 0
+    if trace_memory:
+        assert record["peak_bytes"] >= 0
+    else:
+        assert record["peak_bytes"] is None
+
+
+@pytest.mark.parametrize("trace_memory", [False, True])
+def test_run_metrics_schema(inputs, trace_memory):
+    """UI / CLI --json이 보여 주는 단계별·아티스트별 지표와 ZIP 안 run_metrics.json의 형태."""
+    import json
+
+    check_dict = r2r.new_check_dict()
+    zip_file = r2r.generate_report_excel(YM, "2024-11-10", *inputs, check_dict, verify=1.0,
+                                         trace_memory=trace_memory)
+    with zip_file, zipfile.ZipFile(zip_file) as zf:
+        in_zip = json.loads(zf.read("run_metrics.json"))
+
+    ingest = {f"ingest.{label}{part}" for label in ("song cost", "online revenue") for part in ("", ".load_workbook")}
+    rm = check_dict["run_metrics"]
+    assert set(rm) == {"trace_memory", "stages", "artists"}
+    assert rm["trace_memory"] is trace_memory
+    assert set(rm["stages"]) == ingest | {"render", "package.flush", "package.close", "verify"}
+    for record in rm["stages"].values():
+        assert_timing(record, trace_memory)
+    artists = sorted(set(check_dict["song_artists"]) | set(check_dict["revenue_artists"]))
+    assert [a["artist"] for a in rm["artists"]] == artists
+    for record in rm["artists"]:
+        assert set(record) == {"artist", "ym", "rows", "wall_sec", "cpu_sec", "peak_bytes", "render_sec",
+                               "save_sec"}
+        assert record["ym"] == YM and record["rows"] >= 0
+        assert record["render_sec"] >= 0 and record["save_sec"] >= 0
+        assert_timing(record, trace_memory)
+
+    # run_metrics.json은 ZIP을 닫기 전에 쓰므로 package.close / verify 단계는 없음
+    assert set(in_zip) == {"trace_memory", "stages", "artists", "ym", "workers", "detail_backend", "zip"}
+    assert (in_zip["ym"], in_zip["workers"], in_zip["detail_backend"]) == (YM, 1, "openpyxl")
+    assert set(in_zip["stages"]) == ingest | {"render", "package.flush"}
+    assert in_zip["artists"] == rm["artists"]
+    assert set(in_zip["zip"]) == {"policy", "level", "entries", "raw_bytes", "zip_bytes", "cpu_sec"}
+
+    summary = check_dict["run_summary"]
+    assert set(summary["timings"]) == {"ingest_sec", "render_package_sec", "verify_sec", "total_sec"}
+    assert all(v >= 0 for v in summary["timings"].values())
+    assert summary["timings"]["total_sec"] >= summary["timings"]["render_package_sec"]
@@ -0,0 +1,137 @@
+import io
+import sys
+import zipfile
+
+import pandas as pd
+import pytest
+
+import revenue2report_xlsx as r2r
+from synthetic_data import generate_inputs
+from test_backends import assert_same_workbook
+
+YMS = ("202410", "202411")
+COLUMNS = {"artist": "아티스트명", "amount": "금액"}
+
+
+@pytest.fixture(scope="module")
+def inputs(tmp_path_factory):
+    """같은 seed로 만든 xlsx / csv(utf-8-sig) / parquet 입력 + csv를 cp949로 다시 저장한 입력."""
+    root = tmp_path_factory.mktemp("inputs")
+    paths = {fmt: generate_inputs(str(root / fmt), months=YMS, artists=4, rows_per_artist=15, fmt=fmt)
+             for fmt in ("xlsx", "csv", "parquet")}
+    cp949 = []
+    for path in paths["csv"]:
+        with open(path, encoding="utf-8-sig") as f:
+            text = f.read()
+        out = root / f"cp949_{len(cp949)}.csv"
+        out.write_bytes(text.encode("cp949"))
+        cp949.append(str(out))
+    paths["cp949"] = tuple(cp949)
+    return paths
+
+
+def xlsx_entries(zip_file):
+    with zip_file, zipfile.ZipFile(zip_file) as zf:
+        return {name: zf.read(name) for name in zf.namelist() if name.endswith(".xlsx")}
+
+
+@pytest.fixture(scope="module")
+def xlsx_reports(inputs):
+    return xlsx_entries(r2r.generate_report_batch(list(YMS), None, *inputs["xlsx"], r2r.new_check_dict()))
+
+
+@pytest.mark.parametrize("fmt", ["csv", "cp949", "parquet"])
+def test_table_inputs_render_same_reports_as_xlsx(inputs, xlsx_reports, fmt):
+    """CSV / Parquet은 진행기간으로 달을 나누고, 월별 시트 xlsx와 같은 보고서를 만듦."""
+    if fmt != "parquet":
+        assert r2r.detect_csv_encoding(inputs[fmt][1]) == ("cp949" if fmt == "cp949" else "utf-8-sig")
+    check_dict = r2r.new_check_dict()
+    actual = xlsx_entries(r2r.generate_report_batch(list(YMS), None, *inputs[fmt], check_dict, verify=1.0))
+    assert check_dict["verification_summary"]["total_errors"] == 0
+    assert sorted(actual) == sorted(xlsx_reports)
+    for name, data in actual.items():
+        assert_same_workbook(data, xlsx_reports[name])
+
+
+@pytest.mark.parametrize("fmt", ["csv", "cp949", "parquet"])
+def test_iter_table_chunks_matches_read_tables(inputs, fmt):
+    """저메모리 모드의 나눠 읽기는 read_tables를 달별로 이어 붙인 것과 같음."""
+    path = inputs[fmt][1]
+    tables = r2r.read_tables(path, list(YMS), "online revenue", r2r.REVENUE_COLUMNS)
+    parts = {ym: [] for ym in YMS}
+    for ym, part in r2r.iter_table_chunks(path, list(YMS), "online revenue", r2r.REVENUE_COLUMNS, chunk_rows=7):
+        assert 0 < len(part) <= 7
+        parts[ym].append(part)
+    for ym in YMS:
+        assert len(tables[ym]) == 4 * 15
+        pd.testing.assert_frame_equal(pd.concat(parts[ym], ignore_index=True), tables[ym], check_dtype=False)
+
+
+def test_detect_csv_encoding():
+    text = "진행기간,아티스트명\n202410,가나다\n"
+    assert r2r.detect_csv_encoding(io.BytesIO(text.encode("utf-8-sig"))) == "utf-8-sig"
+    assert r2r.detect_csv_encoding(io.BytesIO(text.encode("utf-8"))) == "utf-8-sig"
+    assert r2r.detect_csv_encoding(io.BytesIO(text.encode("cp949"))) == "cp949"
+    # 표본 끝에서 잘린 utf-8 글자는 오류로 보지 않음
+    assert r2r.detect_csv_encoding(io.BytesIO(text.encode("utf-8")), sample_size=5) == "utf-8-sig"
+    f = io.BytesIO(text.encode("cp949"))
+    f.seek(3)
+    r2r.detect_csv_encoding(f)
+    assert f.tell() == 3  # 읽은 뒤 원래 위치로
+
+
+def csv_file(text, encoding="utf-8-sig"):
+    return io.BytesIO(text.encode(encoding))
+
+
+def test_read_tables_splits_by_period():
+    text = "진행기간,아티스트명,금액,비고\n2024-10,A,1,\n202411,B,2,x\n2024.10,C,3,\n202412,D,4,\n"
+    tables = r2r.read_tables(csv_file(text), ["202410", "202411"], "song cost", COLUMNS)
+    assert tables["202410"].to_dict("list") == {"artist": ["A", "C"], "amount": ["1", "3"]}
+    assert tables["202411"].to_dict("list") == {"artist": ["B"], "amount": ["2"]}
+
+    with pytest.raises(r2r.IngestError, match="'202501' 진행기간 데이터가 없습니다"):
+        r2r.read_tables(csv_file(text), ["202410", "202501"], "song cost", COLUMNS)
+    with pytest.raises(r2r.IngestError, match="'202501' 진행기간 데이터가 없습니다"):
+        list(r2r.iter_table_chunks(csv_file(text), ["202501"], "song cost", COLUMNS, chunk_rows=2))
+
+    # 진행기간 컬럼이 없으면 파일 전체가 한 달 (여러 달은 오류)
+    text = "아티스트명,금액\nA,1\nB,\n"
+    table = r2r.read_tables(csv_file(text), ["202410"], "song cost", COLUMNS)["202410"]
+    assert table["artist"].tolist() == ["A", "B"]
+    assert table["amount"][0] == "1" and pd.isna(table["amount"][1])  # 빈 칸은 NA (to_num_column에서 0.0)
+    with pytest.raises(r2r.IngestError, match="여러 달"):
+        r2r.read_tables(csv_file(text), list(YMS), "song cost", COLUMNS)
+    with pytest.raises(r2r.IngestError, match="여러 달"):
+        list(r2r.iter_table_chunks(csv_file(text), list(YMS), "song cost", COLUMNS, chunk_rows=2))
+
+
+def test_missing_column_is_ingest_error(tmp_path):
+    text = "진행기간,아티스트명\n202410,A\n"
+    with pytest.raises(r2r.IngestError, match=r"\[song cost\].*\['금액'\] 컬럼이 없습니다"):
+        r2r.read_tables(csv_file(text, "cp949"), ["202410"], "song cost", COLUMNS)
+    path = tmp_path / "x.parquet"
+    pd.DataFrame({"진행기간": ["202410"], "금액": ["1"]}).to_parquet(path)
+    with pytest.raises(r2r.IngestError, match=r"\['아티스트명'\] 컬럼이 없습니다"):
+        r2r.read_tables(str(path), ["202410"], "song cost", COLUMNS)
+
+
+def test_without_pyarrow(inputs, monkeypatch):
+    """
+    pyarrow가 없으면 parquet은 입력 형식에서 빠지고, 그래도 들어온 parquet은 IngestError.
+    CSV는 C 파서로 읽어 같은 결과.
+    """
+    find_spec = r2r.importlib.util.find_spec
+    expected = r2r.read_tables(inputs["csv"][1], list(YMS), "online revenue", r2r.REVENUE_COLUMNS)
+
+    monkeypatch.setattr(r2r.importlib.util, "find_spec",
+                        lambda name, *args: None if name == "pyarrow" else find_spec(name, *args))
+    monkeypatch.setitem(sys.modules, "pyarrow", None)  # import pyarrow → ImportError
+    monkeypatch.setitem(sys.modules, "pyarrow.parquet", None)
+    assert r2r.input_file_types() == ["xlsx", "csv"]
+    with pytest.raises(r2r.IngestError, match="pyarrow가 필요합니다"):
+        r2r.read_tables(inputs["parquet"][1], list(YMS), "online revenue", r2r.REVENUE_COLUMNS)
+
+    actual = r2r.read_tables(inputs["csv"][1], list(YMS), "online revenue", r2r.REVENUE_COLUMNS)
+    for ym in YMS:
+        pd.testing.assert_frame_equal(actual[ym], expected[ym])
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import revenue2report_xlsx as r2r
+
+# 아티스트별 (앨범, 서비스명, 원본 매출액, 파일에 쓴 매출액)
+DETAIL = {
+    "가수A": [("앨범1", "멜론", 100.0, 100.0), ("앨범1", "지니", 2.5, 2.5004), ("앨범2", "멜론", 7.0, 8.0)],
+    "가수B": [("앨범3", "멜론", 0.0, 0.0)],
+    "가수C": [("앨범1", "Spotify", 1.0, 0.0), ("앨범4", "멜론", -3.0, -3.0), ("앨범1", "Spotify", 5.0, 5.0)],
+}
+
+
+def almost_equal(a, b, tol=1e-3):
+    return abs(a - b) < tol
+
+
+def per_row_dicts():
+    """컬럼 단위 표 도입 전: 세부매출 검증 행마다 dict 하나."""
+    return [
+        {"아티스트": artist, "구분": "음원서비스별매출", "앨범": album, "서비스명": service,
+         "원본_매출액": original, "엑셀_매출액": written, "match_매출액": almost_equal(original, written)}
+        for artist, rows in DETAIL.items()
+        for album, service, original, written in rows
+    ]
+
+
+def filled_table(spill):
+    check_dict = r2r.new_check_dict()
+    check_dict["details_verification"] = r2r.new_verification_tables(spill=spill)
+    for artist, rows in DETAIL.items():
+        albums, services, original, written = zip(*rows)
+        r2r.record_verification(check_dict, "세부매출", artist,
+                                {"구분": "음원서비스별매출", "앨범": list(albums), "서비스명": list(services)},
+                                original, written)
+    return check_dict, check_dict["details_verification"]["세부매출"]
+
+
+@pytest.mark.parametrize("spill", [False, True])
+def test_table_holds_same_rows_as_per_row_dicts(spill):
+    check_dict, table = filled_table(spill)
+    if spill:
+        assert isinstance(table._original, r2r.SpilledArray)
+    expected = pd.DataFrame(per_row_dicts())
+    frame = table.frame()
+    assert list(frame.columns) == list(expected.columns) == list(table.columns)
+    as_object = {name: object for name in table.labels}
+    pd.testing.assert_frame_equal(frame.astype(as_object), expected.astype(as_object))
+
+    assert len(table) == table.rows == len(expected)
+    assert table.mismatches == (~expected["match_매출액"]).sum() == 2
+    assert table.artist_mismatches == {"가수A": 1, "가수C": 1}
+    assert table.artists() == list(DETAIL)
+    assert check_dict["verification_summary"]["total_errors"] == 2
+    assert check_dict["verification_summary"]["artist_error_list"] == ["가수A", "가수C"]
+
+
+def test_spilled_array_matches_array():
+    from array import array
+
+    spilled, plain = r2r.SpilledArray("d"), array("d")
+    for values in ([1.5, -2.0], [], [3.25] * 1000):
+        spilled.extend(values)
+        plain.extend(values)
+    data = np.arange(5, dtype="float64")
+    spilled.frombytes(data.tobytes())
+    plain.frombytes(data.tobytes())
+    assert len(spilled) == len(plain) == 1007
+    assert spilled.tobytes() == plain.tobytes()
+
+
+@pytest.mark.parametrize("spill", [False, True])
+def test_select_puts_mismatches_first_and_filters_artist(spill):
+    _, table = filled_table(spill)
+    # 행 번호: 가수A 0 1 2(불일치) / 가수B 3 / 가수C 4(불일치) 5 6
+    assert table.select().tolist() == [2, 4, 0, 1, 3, 5, 6]
+    assert table.select(mismatches_only=True).tolist() == [2, 4]
+    assert table.select("가수C").tolist() == [4, 5, 6]
+    assert table.select("가수A", mismatches_only=True).tolist() == [2]
+    assert table.select("가수B", mismatches_only=True).tolist() == []
+    assert table.select("없는 가수").tolist() == []
+
+
+@pytest.mark.parametrize("spill", [False, True])
+def test_take_returns_page_rows(spill):
+    _, table = filled_table(spill)
+    expected = pd.DataFrame(per_row_dicts())
+    rows = table.select()
+    page_size = 3
+    pages = [rows[start:start + page_size] for start in range(0, len(rows), page_size)]  # 화면과 같은 페이지 나누기
+    assert [p.tolist() for p in pages] == [[2, 4, 0], [1, 3, 5], [6]]
+
+    for page_rows in pages:
+        df = table.take(page_rows)
+        assert df.index.tolist() == page_rows.tolist()
+        pd.testing.assert_frame_equal(df, expected.loc[page_rows], check_dtype=False)
+    assert table.take(pages[0])["match_매출액"].tolist() == [False, False, True]
+
+    page = table.take(table.select("가수C")[:2])
+    assert page["아티스트"].tolist() == ["가수C", "가수C"]
+    assert page["앨범"].tolist() == ["앨범1", "앨범4"]
+    assert page["엑셀_매출액"].tolist() == [0.0, -3.0]